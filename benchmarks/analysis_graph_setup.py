@@ -0,0 +1,43 @@
+"""Benchmark the per-analysis setup cost of the chart workflow graph.
+
+Compares building the agents and compiling the StateGraph on every analysis
+(the previous behaviour of generate_visualization) with reusing the
+process-wide graph from get_analysis_graph. No LLM calls are made.
+
+Usage:
+    python benchmarks/analysis_graph_setup.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Client construction needs a key, but nothing is sent to the API
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from components.map.analysis_graph import create_analysis_graph, get_analysis_graph
+
+
+def time_per_call(func, iterations: int) -> float:
+    """Return the mean wall time of func in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main(iterations: int = 20) -> None:
+    first_call = time_per_call(get_analysis_graph, 1)
+    rebuilt = time_per_call(create_analysis_graph, iterations)
+    shared = time_per_call(get_analysis_graph, iterations)
+
+    print(f"Iterations:                  {iterations}")
+    print(f"Build + compile per analysis: {rebuilt:10.3f} ms")
+    print(f"Process-wide graph (first):   {first_call:10.3f} ms")
+    print(f"Process-wide graph (reused):  {shared:10.3f} ms")
+    print(f"Setup saved per analysis:     {rebuilt - shared:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
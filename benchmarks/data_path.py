@@ -0,0 +1,287 @@
+"""Micro-benchmarks of the data-path hot spots on synthetic LAMAS-shaped data.
+
+Each case is timed at 10k, 100k and 1M rows. Results are stored per commit in
+benchmarks/results/<git sha>.json, so two commits can be compared.
+
+Cases:
+- preprocess.*: the stages of preprocess_lamas_accident_data, including the
+  row-wise UTM conversion
+- sql.fetch: SqlDb.execute_query fetching a whole table into a DataFrame
+- sql.*_query: the static analysis queries on a local SQLite engine
+- map.filter_locations: the map view's address table filter
+- research.process_citations: citation URL lookup in search results
+- rag.split_documents: DocumentProcessor.split_documents
+
+Cases that scale with something other than table rows, or that are too slow
+to run on every row, run on rows / scale items.
+
+Usage:
+    python benchmarks/data_path.py run [--sizes 10000,100000] [--cases sql] [--repeats 3]
+    python benchmarks/data_path.py compare <base sha> [<head sha>] [--threshold 1.1]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+# The research stages import their siblings as top-level modules
+sys.path.append(os.path.join(ROOT, "components", "research"))
+
+from sqlalchemy import create_engine
+
+from benchmarks.lamas_data import (
+    MAPPING_FILE,
+    make_address_table,
+    make_citations,
+    make_documents,
+    make_raw_accidents,
+    make_search_results,
+)
+from components.map.data_component import filter_locations
+from components.map.static_queries import CAUSE_ANALYSIS_QUERY, GENERAL_ANALYSIS_QUERY, OUTCOME_ANALYSIS_QUERY
+from data.preprocessing import add_lat_long, add_urban_flag, decode_columns, finalize_columns, load_value_mappings
+from loadtest.fake_data import build_accidents, build_geographical_locations, build_locations
+from rag.document_processor import DocumentProcessor
+from stages.citations import process_citations
+from utils.sql.sql_db import SqlDb
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+BASE_QUERY = (
+    "WITH base_data AS (SELECT a.* FROM accidents a JOIN geographical_locations g "
+    "ON a.lat = g.lat AND a.lon = g.lon WHERE g.CITY = 'Haifa')"
+)
+
+
+@dataclass
+class Case:
+    """A benchmark case. setup builds the inputs and returns the timed callable."""
+    name: str
+    setup: Callable[[int], Callable[[], object]]
+    scale: int = 1
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str, scale: int = 1):
+    def register(setup: Callable[[int], Callable[[], object]]):
+        CASES[name] = Case(name, setup, scale)
+        return setup
+    return register
+
+
+@lru_cache(maxsize=1)
+def _raw_accidents(num_rows: int):
+    return make_raw_accidents(num_rows)
+
+
+@lru_cache(maxsize=1)
+def _accident_db(num_rows: int) -> SqlDb:
+    """SqlDb on a SQLite file holding num_rows processed accidents."""
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "accidents.sqlite")
+    engine = create_engine(f"sqlite:///{path}")
+    locations = build_locations()
+    build_accidents(locations, num_rows).to_sql("accidents", engine, index=False)
+    build_geographical_locations(locations).to_sql("geographical_locations", engine, index=False)
+
+    # Only the engine is needed, the Supabase and LLM wrappers are not created
+    db = SqlDb.__new__(SqlDb)
+    db.engine = engine
+    return db
+
+
+@case("preprocess.add_urban_flag")
+def bench_add_urban_flag(num_rows: int):
+    df = _raw_accidents(num_rows)
+    return lambda: add_urban_flag(df.copy())
+
+
+@case("preprocess.decode_columns")
+def bench_decode_columns(num_rows: int):
+    df = _raw_accidents(num_rows)
+    value_mappings = load_value_mappings(MAPPING_FILE)
+    return lambda: decode_columns(df.copy(), value_mappings)
+
+
+# The row-wise conversion builds a pyproj transformer per row, ~50 ms each
+@case("preprocess.add_lat_long", scale=1000)
+def bench_add_lat_long(num_rows: int):
+    df = _raw_accidents(num_rows)[["X", "Y"]]
+    return lambda: add_lat_long(df.copy())
+
+
+@case("preprocess.finalize_columns")
+def bench_finalize_columns(num_rows: int):
+    df = decode_columns(add_urban_flag(_raw_accidents(num_rows).copy()), load_value_mappings(MAPPING_FILE))
+    return lambda: finalize_columns(df)
+
+
+@case("sql.fetch")
+def bench_sql_fetch(num_rows: int):
+    db = _accident_db(num_rows)
+    return lambda: db.execute_query("SELECT * FROM accidents")
+
+
+@case("sql.general_query")
+def bench_general_query(num_rows: int):
+    db = _accident_db(num_rows)
+    query = GENERAL_ANALYSIS_QUERY.format(base_query=BASE_QUERY)
+    return lambda: db.execute_query(query)
+
+
+@case("sql.cause_query")
+def bench_cause_query(num_rows: int):
+    db = _accident_db(num_rows)
+    query = CAUSE_ANALYSIS_QUERY.format(base_query=BASE_QUERY)
+    return lambda: db.execute_query(query)
+
+
+@case("sql.outcome_query")
+def bench_outcome_query(num_rows: int):
+    db = _accident_db(num_rows)
+    query = OUTCOME_ANALYSIS_QUERY.format(base_query=BASE_QUERY)
+    return lambda: db.execute_query(query)
+
+
+@case("map.filter_locations")
+def bench_filter_locations(num_rows: int):
+    df = make_address_table(num_rows)
+    locations = list(df["CITY"].unique()[:3])
+    return lambda: filter_locations(df, "CITY", locations)
+
+
+@case("research.process_citations", scale=100)
+def bench_process_citations(num_results: int):
+    search_results = make_search_results(num_results)
+    citations = make_citations(search_results, 50)
+    return lambda: process_citations(citations, search_results, 1, "Main Factors")
+
+
+@case("rag.split_documents", scale=100)
+def bench_split_documents(num_pages: int):
+    documents = make_documents(num_pages)
+    processor = DocumentProcessor()
+    return lambda: processor.split_documents(documents)
+
+
+def time_case(bench: Case, num_rows: int, repeats: int) -> Dict[str, float]:
+    """Time a case, returning the min and median of its repeats in seconds."""
+    func = bench.setup(max(num_rows // bench.scale, 1))
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "repeats": repeats}
+
+
+def git_revision() -> str:
+    """Short sha of HEAD, suffixed with -dirty when tracked files are modified."""
+    sha = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    dirty = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True
+    ).stdout.strip()
+    return f"{sha}-dirty" if dirty else sha
+
+
+def results_path(revision: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{revision}.json")
+
+
+def load_results(revision: str) -> dict:
+    path = results_path(revision)
+    if not os.path.exists(path):
+        sys.exit(f"No benchmark results for {revision} at {path}")
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def run(args: argparse.Namespace) -> None:
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else DEFAULT_SIZES
+    revision = git_revision()
+    path = results_path(revision)
+
+    # Runs of a subset of cases add to the results stored for the commit
+    stored = {"revision": revision, "results": {}}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            stored = json.load(f)
+    stored.update({"timestamp": time.time(), "python": platform.python_version(), "machine": platform.node()})
+
+    for name, bench in CASES.items():
+        if args.cases and not any(pattern in name for pattern in args.cases.split(",")):
+            continue
+        for num_rows in sizes:
+            # The text splitter and the app print progress, which is not timed output
+            with open(os.devnull, "w") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    timing = time_case(bench, num_rows, args.repeats)
+                finally:
+                    sys.stdout = stdout
+            stored["results"].setdefault(name, {})[str(num_rows)] = timing
+            print(f"{name:<30}{num_rows:>10}{timing['min'] * 1000:>12.2f} ms (min){timing['median'] * 1000:>12.2f} ms (median)")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(stored, f, indent=2)
+    print(f"Results stored in {path}")
+
+
+def compare(args: argparse.Namespace) -> None:
+    base = load_results(args.base)
+    head = load_results(args.head or git_revision())
+    print(f"{'case':<30}{'rows':>10}{'base ms':>12}{'head ms':>12}{'ratio':>8}")
+
+    regressions = 0
+    for name, sizes in head["results"].items():
+        for num_rows, timing in sizes.items():
+            base_timing = base["results"].get(name, {}).get(num_rows)
+            if base_timing is None:
+                continue
+            ratio = timing["min"] / base_timing["min"]
+            flag = "  REGRESSION" if ratio > args.threshold else ""
+            regressions += bool(flag)
+            print(f"{name:<30}{num_rows:>10}{base_timing['min'] * 1000:>12.2f}{timing['min'] * 1000:>12.2f}{ratio:>8.2f}{flag}")
+
+    if regressions:
+        sys.exit(f"{regressions} case(s) slower than {args.threshold}x the base")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Data-path micro-benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and store the results of this commit")
+    run_parser.add_argument("--sizes", help="comma separated row counts, 10k, 100k and 1M by default")
+    run_parser.add_argument("--cases", help="comma separated substrings of the case names to run")
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="compare the stored results of two commits")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head", nargs="?", help="the current commit by default")
+    compare_parser.add_argument("--threshold", type=float, default=1.1, help="slowdown ratio reported as a regression")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
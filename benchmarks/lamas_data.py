@@ -0,0 +1,113 @@
+"""Synthetic LAMAS-shaped data for the data-path benchmarks.
+
+Raw accident rows have the columns and numeric codes of the CBS accident
+file read by data/preprocessing.py, with ITM coordinates inside Israel.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from langchain.docstore.document import Document
+
+from data.preprocessing import COLUMN_VALUE_MAPPINGS, TO_DROP_COLUMNS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAPPING_FILE = os.path.join(ROOT, "data", "accident_data_mapping.json")
+
+# Israeli Transverse Mercator bounds of the populated area
+ITM_X_RANGE = (170000, 250000)
+ITM_Y_RANGE = (550000, 780000)
+
+ADDRESS_LEVELS = ["ROAD", "SUBURB", "CITY_DISTRICT", "TOWN", "CITY"]
+
+
+@lru_cache(maxsize=1)
+def _mapping_codes() -> Dict[str, List[int]]:
+    with open(MAPPING_FILE, "r") as f:
+        mappings = json.load(f)
+    return {
+        column: [int(code) for code in mappings[mapping_name]]
+        for column, mapping_name in COLUMN_VALUE_MAPPINGS.items()
+    }
+
+
+def make_raw_accidents(num_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build raw accident rows as read from the CBS file."""
+    rng = np.random.default_rng(seed)
+    data = {
+        "SHNAT_TEU": rng.integers(2015, 2024, num_rows),
+        "Num_nifgaim": rng.integers(1, 6, num_rows),
+        "kle_rehev_huznu": rng.integers(1, 4, num_rows),
+        "X": rng.uniform(*ITM_X_RANGE, num_rows),
+        "Y": rng.uniform(*ITM_Y_RANGE, num_rows),
+    }
+    for column, codes in _mapping_codes().items():
+        values = rng.choice(codes, num_rows).astype("float64")
+        # Missing codes, as in the source file, are filled with "Unknown"
+        values[rng.random(num_rows) < 0.05] = np.nan
+        data[column] = values
+    for column in TO_DROP_COLUMNS:
+        data.setdefault(column, rng.integers(0, 1000, num_rows))
+    return pd.DataFrame(data)
+
+
+def make_address_table(num_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build an address table like the map view's session DataFrame."""
+    rng = np.random.default_rng(seed)
+    num_cities = max(num_rows // 1000, 5)
+    city_idx = rng.integers(0, num_cities, num_rows)
+    road_idx = rng.integers(0, 200, num_rows)
+    return pd.DataFrame({
+        "ROAD": [f"Road {city}-{road}" for city, road in zip(city_idx, road_idx)],
+        "SUBURB": [f"Suburb {city}-{road % 10}" for city, road in zip(city_idx, road_idx)],
+        "CITY_DISTRICT": [f"District {city}-{road % 3}" for city, road in zip(city_idx, road_idx)],
+        "TOWN": None,
+        "CITY": [f"City {city}" for city in city_idx],
+    })
+
+
+def make_search_results(num_results: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Build web search results in the format matched by find_citation_url."""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "title": f"Result {idx}",
+            "link": f"https://example.com/{idx}",
+            "snippet": f"Study {idx} found that factor {rng.integers(0, 1000)} raised accident rates by "
+                       f"{rng.integers(1, 60)}% in urban areas.",
+        }
+        for idx in range(num_results)
+    ]
+
+
+def make_citations(search_results: List[Dict[str, str]], num_citations: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Build LLM citations without URLs, which are looked up in the search results."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(search_results), num_citations)
+    return [
+        {"text": search_results[idx]["snippet"][:40], "source": search_results[idx]["title"], "url": ""}
+        for idx in picks
+    ]
+
+
+def make_documents(num_pages: int, page_chars: int = 3000, seed: int = 0) -> List[Document]:
+    """Build PDF-like pages for the text splitter."""
+    rng = np.random.default_rng(seed)
+    words = np.array("road accident severity junction driver speed pedestrian vehicle urban night "
+                     "weather injury risk safety lane traffic signal crossing study data".split())
+    documents = []
+    for page in range(num_pages):
+        paragraphs = []
+        length = 0
+        while length < page_chars:
+            paragraph = " ".join(rng.choice(words, 60)) + "."
+            paragraphs.append(paragraph)
+            length += len(paragraph) + 2
+        documents.append(Document(
+            page_content="\n\n".join(paragraphs),
+            metadata={"source": f"report_{page // 20}.pdf", "page": page % 20}
+        ))
+    return documents
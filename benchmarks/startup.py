@@ -0,0 +1,98 @@
+"""Benchmark the cold start of the Streamlit app.
+
+Measures, each in a fresh interpreter:
+- the cumulative import time of streamlit_app (python -X importtime), with
+  the slowest top-level packages it pulls in
+- the time to first render of the main menu, running the app script with
+  streamlit's AppTest
+
+No database, vector store or LLM connections are needed for the main menu.
+
+Usage:
+    python benchmarks/startup.py [runs]
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+FIRST_RENDER_SCRIPT = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("streamlit_app.py", default_timeout=120).run()
+elapsed = time.perf_counter() - start
+assert not at.exception, at.exception
+print(elapsed)
+"""
+
+
+def measure_import_time() -> Tuple[float, List[Tuple[str, float]]]:
+    """Import streamlit_app in a fresh interpreter.
+
+    Returns:
+        Total import time in ms and the top-level packages by cumulative ms
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import streamlit_app"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    packages: Dict[str, float] = defaultdict(float)
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms, module = int(match.group(2)) / 1000, match.group(4)
+        if module == "streamlit_app":
+            total_ms = cumulative_ms
+            continue
+        # The first import of a package includes its submodules, so the
+        # largest cumulative time is the cost of the package
+        package = module.split(".")[0]
+        packages[package] = max(packages[package], cumulative_ms)
+
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return total_ms, top
+
+
+def measure_first_render() -> float:
+    """Run the app script once in a fresh interpreter, returning seconds to first render."""
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER_SCRIPT],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(runs: int = 3) -> None:
+    import_times = []
+    for _ in range(runs):
+        total_ms, top = measure_import_time()
+        import_times.append(total_ms)
+    render_times = [measure_first_render() * 1000 for _ in range(runs)]
+
+    print(f"Runs:                      {runs}")
+    print(f"Import streamlit_app:      {statistics.median(import_times):10.1f} ms (median)")
+    print(f"Time to first render:      {statistics.median(render_times):10.1f} ms (median)")
+    print("Slowest imports (last run):")
+    for package, ms in top[:10]:
+        print(f"  {package:<24} {ms:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
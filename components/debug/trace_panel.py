@@ -0,0 +1,99 @@
+from typing import Any, Dict, List
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from utils.tracing.exporters import get_trace
+
+
+def order_spans(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order spans depth-first, each parent followed by its children by start time.
+
+    Spans whose parent is not in the trace, such as the roots, start a branch.
+    Every span gets a "depth" key used to indent its name.
+    """
+    span_ids = {span["context"]["span_id"] for span in spans}
+    children: Dict[Any, List[Dict[str, Any]]] = {}
+    for span in sorted(spans, key=lambda span: span["start_time"]):
+        parent_id = span["parent_id"] if span["parent_id"] in span_ids else None
+        children.setdefault(parent_id, []).append(span)
+
+    ordered = []
+
+    def visit(parent_id: Any, depth: int) -> None:
+        for span in children.get(parent_id, []):
+            ordered.append(dict(span, depth=depth))
+            visit(span["context"]["span_id"], depth + 1)
+
+    visit(None, 0)
+    return ordered
+
+
+def create_waterfall_chart(spans: List[Dict[str, Any]]) -> go.Figure:
+    """Create a horizontal bar waterfall of the spans of a trace.
+
+    Args:
+        spans: Spans ordered by order_spans
+
+    Returns:
+        Plotly figure with one bar per span, offset by its start time
+    """
+    trace_start = min(span["start_time"] for span in spans)
+    labels = [f"{'  ' * span['depth']}{span['name']} ({idx})" for idx, span in enumerate(spans)]
+    colors = ["#E74C3C" if span["status"]["status_code"] == "ERROR" else "#2E86C1" for span in spans]
+
+    fig = go.Figure(go.Bar(
+        y=labels,
+        x=[span["duration_ms"] for span in spans],
+        base=[(span["start_time"] - trace_start) / 1e6 for span in spans],
+        orientation="h",
+        marker_color=colors,
+        hovertext=[
+            "<br>".join(f"{key}: {value}" for key, value in span["attributes"].items())
+            for span in spans
+        ],
+        hovertemplate="%{y}<br>%{x:.1f} ms<br>%{hovertext}<extra></extra>"
+    ))
+    fig.update_layout(
+        height=max(200, 28 * len(spans)),
+        margin=dict(l=10, r=10, t=10, b=10),
+        xaxis_title="ms since request start",
+        yaxis=dict(autorange="reversed")
+    )
+    return fig
+
+
+def show_trace_panel() -> None:
+    """Display the trace waterfall of the session's last analysis or chat request."""
+    trace_id = st.session_state.get("last_trace_id")
+    spans = order_spans(get_trace(trace_id))
+
+    with st.expander("🐞 Trace of the last request"):
+        if not spans:
+            st.info("No trace recorded yet, run an analysis or ask a question")
+            return
+
+        total_ms = (max(span["end_time"] for span in spans) - min(span["start_time"] for span in spans)) / 1e6
+        llm_spans = [span for span in spans if span["name"] == "llm.call"]
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Total", f"{total_ms / 1000:.2f} s")
+        metric_cols[1].metric("LLM calls", len(llm_spans))
+        metric_cols[2].metric("Tokens", sum(span["attributes"].get("llm.total_tokens") or 0 for span in llm_spans))
+        metric_cols[3].metric("Errors", sum(span["status"]["status_code"] == "ERROR" for span in spans))
+
+        st.caption(f"Trace {trace_id}")
+        st.plotly_chart(create_waterfall_chart(spans), use_container_width=True)
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "span": f"{'  ' * span['depth']}{span['name']}",
+                    "duration ms": round(span["duration_ms"], 1),
+                    "status": span["status"]["status_code"],
+                    "thread": span["thread"],
+                    "attributes": ", ".join(f"{key}={value}" for key, value in span["attributes"].items()),
+                }
+                for span in spans
+            ]),
+            use_container_width=True
+        )
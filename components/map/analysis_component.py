@@ -2,16 +2,26 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from typing import List,  Any, Tuple, Optional, TypedDict
+from typing import List,  Any, Iterator, Tuple, Optional, TypedDict
 import json
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import plotly.io as pio
 from langchain.output_parsers import StructuredOutputParser
 from langchain.output_parsers import ResponseSchema
 from pydantic import BaseModel, Field
 
-from utils.session.session_handler import initialize_session
+from config import (
+    BASE_QUERY_CACHE_TTL,
+    ANALYSIS_RESULT_CACHE_TTL,
+    ANALYSIS_RESULT_MAX_STALE,
+    ANALYSIS_DATA_VERSION,
+)
+from utils.cache.ttl_cache import TTLCache
+from utils.cache.swr_cache import StaleWhileRevalidateCache
+from utils.llm.prompt_data import compact_dataframe
+from utils.session.resources import get_sql_db, get_sql_llm_agent, get_shared_llm_model
+from utils.tracing.tracer import get_current_span, set_span_attributes, start_span, traced
 from components.map.prompts import (
     GENERAL_SUMMARY_PROMPT,
     CAUSE_SUMMARY_PROMPT,
@@ -24,7 +34,18 @@ from components.map.static_queries import (
     CAUSE_ANALYSIS_QUERY, 
     OUTCOME_ANALYSIS_QUERY
 )
-from components.map.analysis_graph import create_analysis_graph
+from components.map.static_charts import has_static_chart, create_static_chart
+from components.map.data_component import filter_locations
+
+# Process-wide cache of parsed base_data queries, keyed by selection
+_BASE_QUERY_CACHE = TTLCache(ttl=BASE_QUERY_CACHE_TTL)
+
+# Process-wide cache of (summary, figure JSON, DataFrame) results, keyed by
+# selection, analysis type and data version
+_ANALYSIS_RESULT_CACHE = StaleWhileRevalidateCache(
+    ttl=ANALYSIS_RESULT_CACHE_TTL,
+    max_stale=ANALYSIS_RESULT_MAX_STALE
+)
 
 
 class SQLQueryResponse(BaseModel):
@@ -36,54 +57,139 @@ class SQLQueryResponse(BaseModel):
         return json.dumps(self.model_dump())
 
 
-def generate_base_query(filter_level: str, location_name_dict: dict, base_query_format_instructions: str) -> str:
+def generate_base_query(
+    filter_level: str,
+    location_name_dict: dict,
+    base_query_format_instructions: str,
+    sql_llm_agent: Optional[Any] = None
+) -> str:
     """Generate the base SQL query for analysis.
     
     Args:
         filter_level: Level of location filtering
         location_name_dict: Dictionary of location names
+        sql_llm_agent: SQL agent to use, defaults to the shared agent
         
     Returns:
         The generated base query
     """
+    sql_llm_agent = sql_llm_agent or get_sql_llm_agent()
     base_prompt = BASE_JOIN_PROMPT.format(
         filter_level=filter_level,
         location_dict=location_name_dict,
         base_query_format_instructions=base_query_format_instructions
     )
-    return st.session_state.sql_llm_agent.execute_sql_query(base_prompt)
+    return sql_llm_agent.execute_sql_query(base_prompt)
+
+
+def canonicalize_location_dict(location_name_dict: dict) -> str:
+    """Build a stable representation of a location selection.
+
+    The SQL agent filters by the values of each row together, so a row is kept
+    as the tuple of its column values. Row indices, duplicate rows and row
+    order do not change the generated SQL, so the rows are de-duplicated and
+    sorted.
 
+    Selections pairing the same values differently get different keys:
+
+    >>> a = {"ROAD": {0: 70, 1: 80}, "CITY": {0: "A", 1: "B"}}
+    >>> b = {"ROAD": {0: 70, 1: 80}, "CITY": {0: "B", 1: "A"}}
+    >>> canonicalize_location_dict(a) != canonicalize_location_dict(b)
+    True
+    >>> canonicalize_location_dict(a) == canonicalize_location_dict({"CITY": {5: "B", 2: "A"}, "ROAD": {5: 80, 2: 70}})
+    True
+
+    Args:
+        location_name_dict: Dictionary of location names, as produced by DataFrame.to_dict()
+
+    Returns:
+        JSON string identifying the selection
+    """
+    columns = sorted(location_name_dict)
+    row_indices = {index for values in location_name_dict.values() for index in values}
+
+    def cell(column: str, index) -> Optional[str]:
+        value = location_name_dict[column].get(index)
+        return None if value is None or pd.isna(value) else str(value)
+
+    rows = {tuple(cell(column, index) for column in columns) for index in row_indices}
+    rows.discard(tuple(None for _ in columns))
+    canonical = {
+        "columns": columns,
+        "rows": sorted(rows, key=lambda row: [(value is not None, value or "") for value in row])
+    }
+    return json.dumps(canonical, ensure_ascii=False)
 
-def generate_visualization(df: pd.DataFrame) -> Optional[Any]:
+
+def get_base_query_sql(filter_level: str, location_name_dict: dict, sql_llm_agent: Optional[Any] = None) -> str:
+    """Get the parsed base_data SQL for a selection, generating it only on a cache miss.
+
+    Args:
+        filter_level: Level of location filtering
+        location_name_dict: Dictionary of location names
+        sql_llm_agent: SQL agent to use, defaults to the shared agent
+
+    Returns:
+        The parsed base query SQL
+    """
+    def build_base_query_sql() -> str:
+        span.set_attribute("cache.hit", False)
+        parser, format_instructions = create_sql_parser()
+        base_query = generate_base_query(filter_level, location_name_dict, format_instructions, sql_llm_agent)
+        return parse_base_query(base_query, parser)
+
+    with start_span("analysis.base_query", {"filter_level": filter_level, "cache.hit": True}) as span:
+        cache_key = (filter_level, canonicalize_location_dict(location_name_dict))
+        return _BASE_QUERY_CACHE.get_or_set(cache_key, build_base_query_sql)
+
+
+def generate_visualization(df: pd.DataFrame, analysis_type: Optional[str] = None) -> Optional[Any]:
     """Generate visualization from the analysis results.
+
+    Results of the static analysis queries are drawn with pre-built charts,
+    only ad-hoc data goes through the LLM chart workflow.
     
     Args:
         df: DataFrame containing the analysis results
+        analysis_type: Type of analysis that produced the DataFrame, if any
         
     Returns:
         Plotly figure or None if generation fails
     """
-    # Create and run the analysis workflow
-    graph = create_analysis_graph()
-      
-    result = graph.invoke({"df": df, "retry_count": 0, "max_retries": 3})
+    if has_static_chart(df, analysis_type):
+        with start_span("analysis.static_chart", {"analysis.type": analysis_type}):
+            return create_static_chart(df, analysis_type)
+
+    # The chart workflow pulls in langgraph and the agents, so it is imported
+    # only when a chart actually needs it
+    from components.map.analysis_graph import get_analysis_graph
+
+    # Run the process-wide analysis workflow
+    graph = get_analysis_graph()
+
+    with start_span("chart_workflow", {"df.rows": len(df)}) as span:
+        result = graph.invoke({"df": df, "retry_count": 0, "max_retries": 3})
+        span.set_attributes({"workflow.retry_count": result.get("retry_count", 0), "workflow.error": result.get("error")})
     
     # Return the figure if successful, None if there was an error
     return result.get("fig") if not result.get("error") else None
 
 
-def generate_summary(df: pd.DataFrame, summary_prompt: str) -> Any:
+@traced("analysis.summary")
+def generate_summary(df: pd.DataFrame, summary_prompt: str, llm_model: Optional[Any] = None) -> Any:
     """Generate summary of the analysis results.
     
     Args:
         df: DataFrame containing the analysis results
         summary_prompt: Prompt template for summary generation
+        llm_model: LLM to use, defaults to the shared model
         
     Returns:
         Generated summary
     """
-    return st.session_state.llm_model.invoke(
-        summary_prompt.format(data=df)
+    llm_model = llm_model or get_shared_llm_model()
+    return llm_model.invoke(
+        summary_prompt.format(data=compact_dataframe(df))
     )
 
 
@@ -137,12 +243,150 @@ def parse_base_query(base_query: str, parser: StructuredOutputParser) -> str:
     return parsed_response.get("sql_query")
 
 
+def query_analysis_data(
+    filter_level: str,
+    location_name_dict: dict,
+    analysis_type: str,
+    db: Any,
+    sql_llm_agent: Any
+) -> pd.DataFrame:
+    """Generate the analysis query for a selection and fetch its results.
+
+    Args:
+        filter_level: Level of location filtering
+        location_name_dict: Dictionary of location names
+        analysis_type: Type of analysis to perform ("general", "cause", or "outcome")
+        db: Database used to execute the analysis query
+        sql_llm_agent: SQL agent used to generate the base query
+
+    Returns:
+        DataFrame containing the analysis query results
+    """
+    with start_span("analysis.query", {"analysis.type": analysis_type}) as span:
+        # Generate and parse base query, reusing it across analysis types
+        base_query_sql = get_base_query_sql(filter_level, location_name_dict, sql_llm_agent)
+
+        # Get analysis configuration
+        query_template, _ = get_analysis_config(analysis_type)
+
+        # Create and execute final query
+        query_data = SQLQueryResponse(sql_query=query_template.format(base_query=base_query_sql))
+        df = db.execute_query(query_data.sql_query)
+        span.set_attribute("db.rows", len(df))
+        return df
+
+
+@traced("analysis.run")
+def run_analysis(
+    filter_level: str,
+    location_name_dict: dict,
+    analysis_type: str,
+    db: Any,
+    sql_llm_agent: Any,
+    llm_model: Any
+) -> Tuple[str, Optional[Any], pd.DataFrame]:
+    """Run the analysis pipeline without touching the Streamlit session.
+
+    All clients are passed in explicitly so the pipeline can also run on a
+    background refresh thread.
+
+    Args:
+        filter_level: Level of location filtering
+        location_name_dict: Dictionary of location names
+        analysis_type: Type of analysis to perform ("general", "cause", or "outcome")
+        db: Database used to execute the analysis query
+        sql_llm_agent: SQL agent used to generate the base query
+        llm_model: LLM used to generate the summary
+
+    Returns:
+        Tuple containing summary text, figure, and DataFrame
+
+    Raises:
+        Exception: If any stage of the pipeline fails
+    """
+    df = query_analysis_data(filter_level, location_name_dict, analysis_type, db, sql_llm_agent)
+
+    # Generate visualization and summary
+    _, summary_prompt = get_analysis_config(analysis_type)
+    fig = generate_visualization(df, analysis_type)
+    summary_output = generate_summary(df, summary_prompt, llm_model)
+
+    return summary_output.content, fig, df
+
+
+def get_analysis_cache_key(filter_level: str, location_name_dict: dict, analysis_type: str) -> tuple:
+    """Build the result cache key of an analysis."""
+    return (
+        filter_level,
+        canonicalize_location_dict(location_name_dict),
+        analysis_type,
+        ANALYSIS_DATA_VERSION
+    )
+
+
+def _make_result_refresh(filter_level: str, location_name_dict: dict, analysis_type: str):
+    """Create a callable recomputing a cacheable analysis result.
+
+    The shared clients are resolved up front, the refresh may run after this
+    script run ends.
+    """
+    db = get_sql_db()
+    sql_llm_agent = get_sql_llm_agent()
+    llm_model = get_shared_llm_model()
+
+    def compute_result() -> Optional[Tuple[str, str, pd.DataFrame]]:
+        summary, fig, df = run_analysis(filter_level, location_name_dict, analysis_type, db, sql_llm_agent, llm_model)
+        # Results without a chart are not cached so the next click retries the chart
+        if fig is None:
+            return None
+        return summary, fig.to_json(), df
+
+    return compute_result
+
+
+def cache_analysis_result(cache_key: tuple, summary: str, fig: Optional[Any], df: pd.DataFrame) -> None:
+    """Store a complete analysis result in the process-wide result cache."""
+    if fig is not None and summary:
+        _ANALYSIS_RESULT_CACHE.set(cache_key, (summary, fig.to_json(), df))
+
+
+def get_cached_analysis_result(
+    filter_level: str,
+    location_name_dict: dict,
+    analysis_type: str
+) -> Optional[Tuple[str, Any, pd.DataFrame]]:
+    """Get a cached analysis result, scheduling a background refresh if it is stale.
+
+    Args:
+        filter_level: Level of location filtering
+        location_name_dict: Dictionary of location names
+        analysis_type: Type of analysis to perform
+
+    Returns:
+        Tuple containing summary text, figure, and DataFrame, or None on a cache miss
+    """
+    cached_result = _ANALYSIS_RESULT_CACHE.get(
+        get_analysis_cache_key(filter_level, location_name_dict, analysis_type),
+        make_refresh=lambda: _make_result_refresh(filter_level, location_name_dict, analysis_type)
+    )
+    if cached_result is None:
+        return None
+
+    summary, fig_json, df = cached_result
+    return summary, pio.from_json(fig_json), df.copy()
+
+
+@traced("analysis.request")
 def execute_analysis_pipeline(
     filter_level: str,
     location_name_dict: dict,
     analysis_type: str
 ) -> Tuple[Optional[str], Optional[Any], Optional[pd.DataFrame]]:
     """Execute the complete analysis pipeline including query generation, data processing, and visualization.
+
+    Results are served from a process-wide cache when the same selection and
+    analysis type were analyzed before on the current data version. Expired
+    results are returned immediately and refreshed in the background.
     
     Args:
         filter_level: Level of location filtering
@@ -150,34 +394,153 @@ def execute_analysis_pipeline(
         analysis_type: Type of analysis to perform ("general", "cause", or "outcome")
         
     Returns:
-        Tuple containing analysis output, figure, and DataFrame
+        Tuple containing summary text, figure, and DataFrame
     """
     try:
-        # Create parser and get format instructions
-        parser, format_instructions = create_sql_parser()
-        
-        # Generate and parse base query
-        base_query = generate_base_query(filter_level, location_name_dict, format_instructions)
-        base_query_sql = parse_base_query(base_query, parser)
-        
-        # Get analysis configuration
-        query_template, summary_prompt = get_analysis_config(analysis_type)
-        
-        # Create and execute final query
-        query_data = SQLQueryResponse(sql_query=query_template.format(base_query=base_query_sql))
-        df = st.session_state.db.execute_query(query_data.sql_query)
-        
-        # Generate visualization and summary
-        fig = generate_visualization(df)
-        summary_output = generate_summary(df, summary_prompt)
+        cached_result = get_cached_analysis_result(filter_level, location_name_dict, analysis_type)
+        set_span_attributes(**{"cache.hit": cached_result is not None})
+        if cached_result is not None:
+            return cached_result
+
+        summary, fig, df = run_analysis(
+            filter_level,
+            location_name_dict,
+            analysis_type,
+            get_sql_db(),
+            get_sql_llm_agent(),
+            get_shared_llm_model()
+        )
+        cache_analysis_result(
+            get_analysis_cache_key(filter_level, location_name_dict, analysis_type),
+            summary,
+            fig,
+            df
+        )
         
-        return summary_output, fig, df
+        return summary, fig, df.copy()
         
     except Exception as e:
         st.error(f"Error executing or parsing query: {str(e)}")
         return None, None, None
 
 
+def stream_summary(df: pd.DataFrame, summary_prompt: str, llm_model: Optional[Any] = None) -> Iterator[str]:
+    """Stream the summary of the analysis results token by token.
+
+    Args:
+        df: DataFrame containing the analysis results
+        summary_prompt: Prompt template for summary generation
+        llm_model: LLM to use, defaults to the shared model
+
+    Yields:
+        Chunks of the generated summary text
+    """
+    llm_model = llm_model or get_shared_llm_model()
+    for chunk in llm_model.stream(summary_prompt.format(data=compact_dataframe(df))):
+        if chunk.content:
+            yield chunk.content
+
+
+def show_analysis_data(df: pd.DataFrame, button_name: str) -> None:
+    """Display the analysis DataFrame in a popover."""
+    with st.popover(f"Show {button_name} Data", use_container_width=True):
+        st.dataframe(
+            df,
+            use_container_width=True,
+            height=500
+        )
+
+
+def show_analysis_chart(fig: Optional[Any], button_name: str) -> None:
+    """Display the analysis chart in a popover."""
+    if fig is None:
+        st.info("No data available to create chart")
+        return
+
+    with st.popover(f"Show {button_name} chart", use_container_width=True):
+        st.plotly_chart(
+            fig,
+            use_container_width=True,
+            height=500,
+            width=1500,
+            config={'displayModeBar': True}
+        )
+
+
+@traced("analysis.request")
+def run_streaming_analysis(
+    filter_level: str,
+    location_name_dict: dict,
+    analysis_type: str,
+    button_name: str,
+    summary_col: Any,
+    chart_col: Any,
+    data_col: Any
+) -> None:
+    """Run an analysis, displaying each result as soon as it is ready.
+
+    The data table is shown right after the query, the chart after it is
+    drawn, and the summary is streamed token by token. Cached results are
+    displayed at once.
+
+    Args:
+        filter_level: Level of location filtering
+        location_name_dict: Dictionary of location names
+        analysis_type: Type of analysis to perform
+        button_name: Display name of the analysis
+        summary_col: Layout column for the summary
+        chart_col: Layout column for the chart
+        data_col: Layout column for the data table
+    """
+    # The debug panel shows the waterfall of the last request
+    st.session_state.last_trace_id = get_current_span().trace_id
+    try:
+        cached_result = get_cached_analysis_result(filter_level, location_name_dict, analysis_type)
+        set_span_attributes(**{"cache.hit": cached_result is not None})
+        if cached_result is not None:
+            summary, fig, df = cached_result
+            with summary_col:
+                with st.popover(f"Show {button_name}"):
+                    st.markdown(summary)
+            with chart_col:
+                show_analysis_chart(fig, button_name)
+            with data_col:
+                show_analysis_data(df, button_name)
+            return
+
+        with st.spinner(f"Querying {analysis_type} accident data..."):
+            df = query_analysis_data(
+                filter_level,
+                location_name_dict,
+                analysis_type,
+                get_sql_db(),
+                get_sql_llm_agent()
+            )
+        with data_col:
+            show_analysis_data(df, button_name)
+
+        with st.spinner("Creating chart..."):
+            fig = generate_visualization(df, analysis_type)
+        with chart_col:
+            show_analysis_chart(fig, button_name)
+
+        _, summary_prompt = get_analysis_config(analysis_type)
+        with summary_col:
+            with st.popover(f"Show {button_name}"), start_span("analysis.summary_stream"):
+                summary = st.write_stream(stream_summary(df, summary_prompt))
+
+        cache_analysis_result(
+            get_analysis_cache_key(filter_level, location_name_dict, analysis_type),
+            summary,
+            fig,
+            df
+        )
+
+    except Exception as e:
+        get_current_span().record_exception(e)
+        st.error(f"Error executing or parsing query: {str(e)}")
+
+
 def analyze_dataframe(
     filtered_locations: List[str],
     filter_level: str,
@@ -220,46 +583,19 @@ def analyze_dataframe(
             elif not filtered_locations:
                 st.error("Please choose locations to analyze.")
             else:
-                # Perform analysis
-                with st.spinner(f"Performing {analysis_type} analysis..."):
-                    output, fig, df = execute_analysis_pipeline(
-                        filter_level,
-                        filtered_df[filtered_df[filter_level].isin(filtered_locations)].to_dict(),
-                        analysis_type
-                    )
-                    
-                    # Display results
-                    with popover_output_col:
-                        with st.popover(f"Show {button_name}"):
-                            st.markdown(output.content)
-                    
-                    if fig is not None:
-                        with chart_output_col:
-                            with st.popover(f"Show {button_name} chart", use_container_width=True):
-                                st.plotly_chart(
-                                    fig,
-                                    use_container_width=True,
-                                    height=500,
-                                    width=1500,
-                                    config={'displayModeBar': True}
-                                )
-                    else:
-                        with chart_output_col:
-                            st.info("No data available to create chart")
-                    
-                    # Display DataFrame
-                    if df is not None:
-                        with data_output_col:
-                            with st.popover(f"Show {button_name} Data", use_container_width=True):
-                                st.dataframe(
-                                    df,
-                                    use_container_width=True,
-                                    height=500
-                                )
+                # Perform analysis, showing each result as it becomes available
+                run_streaming_analysis(
+                    filter_level,
+                    filter_locations(filtered_df, filter_level, filtered_locations).to_dict(),
+                    analysis_type,
+                    button_name,
+                    popover_output_col,
+                    chart_output_col,
+                    data_output_col
+                )
 
 
 if __name__ == "__main__":
-    initialize_session()
     # Example usage 
     analyze_cause, fig, df = execute_analysis_pipeline(
         "ROAD",
@@ -1,11 +1,18 @@
+import threading
 from typing import Dict, TypedDict, Annotated, Sequence, Optional, Any
 import pandas as pd
+from langchain_core.language_models import BaseChatModel
 from langgraph.graph import Graph, StateGraph, END
 from langgraph.prebuilt import ToolNode
+from config import CHART_LLM_MODEL, CHART_WORKFLOW_MODE
 from utils.agents.question_generator_agent import QuestionGeneratorAgent, DataQuestion
 from utils.agents.chart_designer_agent import ChartDesignerAgent, ChartDesign
 from utils.agents.chart_code_generator_agent import ChartCodeGeneratorAgent
 from utils.agents.validator_agent import ValidatorAgent
+from utils.agents.chart_planner_agent import ChartPlannerAgent
+from utils.agents.local_validator import LocalValidator
+from utils.llm.model import get_llm_model
+from utils.tracing.tracer import start_span
 
 
 class AnalysisState(TypedDict):
@@ -19,19 +26,107 @@ class AnalysisState(TypedDict):
     max_retries: int  # Maximum number of retries allowed
 
 
-def create_analysis_graph() -> Graph:
+# Process-wide compiled graph, built on first use
+_ANALYSIS_GRAPH: Optional[Graph] = None
+_ANALYSIS_GRAPH_LOCK = threading.Lock()
+
+
+def _traced_node(name: str, node):
+    """Wrap a workflow node in a span recording its retry count and error."""
+    def run(state: AnalysisState) -> AnalysisState:
+        with start_span(f"chart_workflow.{name}", {"workflow.retry_count": state.get("retry_count", 0)}) as span:
+            result = node(state)
+            span.set_attributes({
+                "workflow.retry_count": result.get("retry_count", 0),
+                "workflow.error": result.get("error"),
+            })
+            return result
+    return run
+
+
+def get_analysis_graph() -> Graph:
+    """Get the process-wide compiled analysis workflow graph.
+
+    The graph and its agents hold no per-invocation state, so a single compiled
+    instance is safely shared by concurrent invocations.
+
+    Returns:
+        Graph: The compiled analysis workflow graph
+    """
+    global _ANALYSIS_GRAPH
+    if _ANALYSIS_GRAPH is None:
+        with _ANALYSIS_GRAPH_LOCK:
+            if _ANALYSIS_GRAPH is None:
+                _ANALYSIS_GRAPH = create_analysis_graph(mode=CHART_WORKFLOW_MODE)
+    return _ANALYSIS_GRAPH
+
+
+def create_analysis_graph(llm: Optional[BaseChatModel] = None, mode: str = "plan") -> Graph:
     """Create the analysis workflow graph.
 
+    In "plan" mode a single structured-output call returns the question and the
+    chart design, which are validated locally before the chart code is generated.
+    In "agents" mode the question and design come from separate agents, each
+    checked by the LLM validator.
+
+    Args:
+        llm: Chat model shared by all agents, a new client is created if not given
+        mode: Workflow mode, "plan" or "agents"
+
     Returns:
         Graph: The configured analysis workflow graph
     """
-    # Initialize agents
-    question_agent = QuestionGeneratorAgent(verbose=True)
-    designer_agent = ChartDesignerAgent(verbose=True)
-    code_agent = ChartCodeGeneratorAgent(verbose=True)
-    validator_agent = ValidatorAgent(verbose=True)
+    if mode not in ("plan", "agents"):
+        raise ValueError(f"Invalid chart workflow mode: {mode}")
+
+    # Initialize agents on one shared client and HTTP connection pool
+    llm = llm or get_llm_model("openai", CHART_LLM_MODEL, feature="charts")
+    question_agent = QuestionGeneratorAgent(verbose=True, llm=llm)
+    designer_agent = ChartDesignerAgent(verbose=True, llm=llm)
+    code_agent = ChartCodeGeneratorAgent(verbose=True, llm=llm)
+    validator_agent = ValidatorAgent(verbose=True, llm=llm)
+    planner_agent = ChartPlannerAgent(verbose=True, llm=llm)
 
     # Define the nodes
+    def plan_chart(state: AnalysisState) -> AnalysisState:
+        """Generate the question and chart design in a single call."""
+        try:
+            plan = planner_agent.get_chart_plan(state["df"], feedback=state.get("error"))
+            if not plan:
+                return dict(
+                    state,
+                    error="Could not plan a chart for the data",
+                    retry_count=state.get("retry_count", 0) + 1
+                )
+            return dict(state, question=plan.question, design=plan.design, error=None)
+        except Exception as e:
+            return dict(
+                state,
+                error=f"Error planning chart: {str(e)}",
+                retry_count=state.get("retry_count", 0) + 1
+            )
+
+    def validate_plan(state: AnalysisState) -> AnalysisState:
+        """Validate the planned question and design against the data, without LLM calls."""
+        if state.get("error"):
+            return dict(state)
+
+        validation = LocalValidator.validate_question(state["question"], state["df"])
+        if validation.is_valid:
+            validation = LocalValidator.validate_design(state["design"], state["question"], state["df"])
+
+        if not validation.is_valid:
+            error_msg = validation.error_message or "Invalid chart plan generated"
+            if validation.suggestions:
+                error_msg += f"\nSuggestions: {', '.join(validation.suggestions)}"
+            return dict(
+                state,
+                error=error_msg,
+                retry_count=state.get("retry_count", 0) + 1
+            )
+
+        return dict(state, retry_count=0)
+
     def generate_question(state: AnalysisState) -> AnalysisState:
         """Generate the most important question to analyze."""
         try:
@@ -108,10 +203,26 @@ def create_analysis_graph() -> Graph:
                 state["design"]
             )
             if not fig:
-                return dict(state, error="Could not generate the visualization")
+                return dict(
+                    state,
+                    error="Could not generate the visualization",
+                    retry_count=state.get("retry_count", 0) + 1
+                )
             return dict(state, fig=fig, error=None)
         except Exception as e:
-            return dict(state, error=f"Error generating chart: {str(e)}")
+            return dict(
+                state,
+                error=f"Error generating chart: {str(e)}",
+                retry_count=state.get("retry_count", 0) + 1
+            )
+
+    def should_retry_plan(state: AnalysisState) -> str:
+        """Determine if we should retry planning or move on to chart generation."""
+        if not state.get("error"):
+            return "generate_chart"
+        if state.get("retry_count") < state.get("max_retries"):
+            return "plan_chart"
+        return "end"
 
     def should_retry_question(state: AnalysisState) -> str:
         """Determine if we should retry question generation."""
@@ -143,12 +254,43 @@ def create_analysis_graph() -> Graph:
     # Create the graph
     workflow = StateGraph(AnalysisState)
 
+    if mode == "plan":
+        workflow.add_node("plan_chart", _traced_node("plan_chart", plan_chart))
+        workflow.add_node("validate_plan", _traced_node("validate_plan", validate_plan))
+        workflow.add_node("generate_chart", _traced_node("generate_chart", generate_chart))
+
+        # Planning and local validation
+        workflow.add_edge("plan_chart", "validate_plan")
+
+        workflow.add_conditional_edges(
+            "validate_plan",
+            should_retry_plan,
+            {
+                "plan_chart": "plan_chart",          # Retry planning with the validation feedback
+                "generate_chart": "generate_chart",  # Move to chart generation
+                "end": END                          # End workflow if max retries reached
+            }
+        )
+
+        # Chart generation
+        workflow.add_conditional_edges(
+            "generate_chart",
+            should_retry_chart,
+            {
+                "generate_chart": "generate_chart",  # Retry chart generation
+                "end": END                          # End workflow
+            }
+        )
+
+        workflow.set_entry_point("plan_chart")
+        return workflow.compile()
+
     # Add nodes
-    workflow.add_node("generate_question", generate_question)
-    workflow.add_node("validate_question", validate_question)
-    workflow.add_node("generate_design", generate_design)
-    workflow.add_node("validate_design", validate_design)
-    workflow.add_node("generate_chart", generate_chart)
+    workflow.add_node("generate_question", _traced_node("generate_question", generate_question))
+    workflow.add_node("validate_question", _traced_node("validate_question", validate_question))
+    workflow.add_node("generate_design", _traced_node("generate_design", generate_design))
+    workflow.add_node("validate_design", _traced_node("validate_design", validate_design))
+    workflow.add_node("generate_chart", _traced_node("generate_chart", generate_chart))
 
     # Add edges with conditions
     # Question generation and validation
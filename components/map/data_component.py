@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from config import DF_COLUMNS, INITIAL_DF
 from utils.map.geocoding import GeoHelper
 
 
+def filter_locations(df: pd.DataFrame, filter_level: str, locations: List[str]) -> pd.DataFrame:
+    """Select the rows of the address table whose filter_level column is one of locations."""
+    return df[df[filter_level].isin(locations)]
 
 
 def filter_dataframe():
@@ -20,7 +23,7 @@ def filter_dataframe():
             f"Select {filter_level}",
             list(st.session_state.df[filter_level].unique())
         )
-        filtered_df = st.session_state.df[st.session_state.df[filter_level].isin(filtered_locations)]
+        filtered_df = filter_locations(st.session_state.df, filter_level, filtered_locations)
 
     return filtered_locations, filter_level, filtered_df
 
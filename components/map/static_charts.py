@@ -0,0 +1,104 @@
+"""Deterministic charts for the static analysis query outputs."""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils.plotting import create_line_chart, create_category_breakdown_chart
+
+
+# Columns returned by each static analysis query
+GENERAL_ANALYSIS_COLUMNS = [
+    "year",
+    "severity",
+    "accident_count",
+    "people_involved",
+    "vehicles_involved",
+    "avg_people_per_accident",
+    "avg_vehicles_per_accident"
+]
+CAUSE_ANALYSIS_COLUMNS = ["year", "severity", "category", "value", "count"]
+OUTCOME_ANALYSIS_COLUMNS = CAUSE_ANALYSIS_COLUMNS + ["avg_casualties", "avg_vehicles"]
+
+
+def create_general_chart(df: pd.DataFrame) -> Any:
+    """Create the yearly accident trend chart, one line per severity."""
+    return create_line_chart(
+        data=df.to_dict("records"),
+        x_column="year",
+        y_column="accident_count",
+        group_column="severity",
+        title="Accidents per Year by Severity",
+        x_label="Year",
+        y_label="Accidents",
+        group_label="Severity"
+    )
+
+
+def create_cause_chart(df: pd.DataFrame) -> Any:
+    """Create the accident conditions chart, split by severity per cause category."""
+    return create_category_breakdown_chart(
+        data=df.to_dict("records"),
+        category_column="category",
+        value_column="value",
+        y_column="count",
+        group_column="severity",
+        title="Accident Conditions by Severity",
+        y_label="Accidents",
+        group_label="Severity"
+    )
+
+
+def create_outcome_chart(df: pd.DataFrame) -> Any:
+    """Create the accident outcomes chart, split by severity per outcome category."""
+    return create_category_breakdown_chart(
+        data=df.to_dict("records"),
+        category_column="category",
+        value_column="value",
+        y_column="count",
+        group_column="severity",
+        title="Accident Outcomes by Severity",
+        y_label="Accidents",
+        group_label="Severity"
+    )
+
+
+STATIC_CHARTS: Dict[str, tuple[List[str], Callable[[pd.DataFrame], Any]]] = {
+    "general": (GENERAL_ANALYSIS_COLUMNS, create_general_chart),
+    "cause": (CAUSE_ANALYSIS_COLUMNS, create_cause_chart),
+    "outcome": (OUTCOME_ANALYSIS_COLUMNS, create_outcome_chart)
+}
+
+
+def has_static_chart(df: pd.DataFrame, analysis_type: Optional[str]) -> bool:
+    """Check whether the DataFrame has the known schema of a static analysis.
+
+    Args:
+        df: DataFrame containing the analysis results
+        analysis_type: Type of analysis that produced the DataFrame
+
+    Returns:
+        True if a deterministic chart can be built for the DataFrame
+    """
+    if analysis_type not in STATIC_CHARTS:
+        return False
+
+    columns, _ = STATIC_CHARTS[analysis_type]
+    return set(columns).issubset(df.columns)
+
+
+def create_static_chart(df: pd.DataFrame, analysis_type: str) -> Optional[Any]:
+    """Create the pre-built chart for a static analysis result.
+
+    Args:
+        df: DataFrame containing the analysis results
+        analysis_type: Type of analysis that produced the DataFrame
+
+    Returns:
+        Plotly figure, or None if there is no data to plot
+    """
+    if df.empty:
+        return None
+
+    _, create_chart = STATIC_CHARTS[analysis_type]
+    return create_chart(df)
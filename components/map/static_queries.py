@@ -63,7 +63,7 @@ def generate_cause_analysis_parts():
         HUMRAT_TEUNA as severity,
         '{column}' as category,
         {column} as value,
-        COUNT(*) as count,
+        COUNT(*) as count
     FROM base_data
     GROUP BY SHNAT_TEU, HUMRAT_TEUNA, {column}""")
     return "\n\n    UNION ALL\n\n".join(parts)
@@ -1,15 +1,31 @@
 import streamlit as st
 from typing import List, Dict, Optional
-from rag.rag_main import RAG
+from utils.session.resources import get_rag
+from utils.tracing.tracer import start_span
 
 class Dialog:
     """Handles the chat dialog interface and state management."""
     
     def __init__(self):
-        """Initialize the dialog with RAG and session state."""
-        self.rag = RAG()
+        """Initialize the dialog state.
+
+        The shared RAG pipeline and this session's conversation are created on
+        first use, so the chat history renders before any client connects.
+        """
         self._initialize_session_state()
-        
+
+    @property
+    def rag(self):
+        """The shared RAG pipeline."""
+        return get_rag()
+
+    @property
+    def conversation(self):
+        """This session's conversation, created on first access."""
+        if "rag_conversation" not in st.session_state:
+            st.session_state.rag_conversation = self.rag.create_conversation()
+        return st.session_state.rag_conversation
+
     def _initialize_session_state(self) -> None:
         """Initialize session state variables if they don't exist."""
         if "messages" not in st.session_state:
@@ -30,23 +46,29 @@ class Dialog:
             
     def process_user_input(self, prompt: str) -> None:
         """Process user input and generate response."""
-        try:
-            # Add user message
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            self.show_message(prompt, "user")
-            
-            # Generate and show response
-            with st.spinner("Thinking..."):
-                response = self.rag.chat(prompt)
-                self.show_message(response, "assistant")
+        with start_span("chat.request", {"chat.question_chars": len(prompt)}) as span:
+            # The debug panel shows the waterfall of the last request
+            st.session_state.last_trace_id = span.trace_id
+            try:
+                # Add user message
+                st.session_state.messages.append({"role": "user", "content": prompt})
+                self.show_message(prompt, "user")
+
+                # Generate and stream the response as it is produced
+                with st.chat_message("assistant"):
+                    response = st.write_stream(self.rag.stream_chat(prompt, self.conversation))
                 st.session_state.messages.append({"role": "assistant", "content": response})
-                
-        except Exception as e:
-            st.error(f"Error processing input: {str(e)}")
+                span.set_attribute("chat.answer_chars", len(response))
+
+            except Exception as e:
+                span.record_exception(e)
+                st.error(f"Error processing input: {str(e)}")
             
     def clear_chat(self) -> None:
         """Clear the chat history."""
         st.session_state.messages = []
+        if "rag_conversation" in st.session_state:
+            st.session_state.rag_conversation.memory.clear()
         st.rerun()
         
     def show_dialog(self) -> None:
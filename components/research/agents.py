@@ -2,19 +2,25 @@ from typing import List, Dict
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.runnables import RunnablePassthrough
-from langchain_openai import ChatOpenAI
 import sys
 import os
 
 # Add the current directory to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
+# The repository root, for the shared LLM factory
+sys.path.append(os.path.dirname(os.path.dirname(current_dir)))
 
 # Now we can import directly from the same directory
 from config import LLM_CONFIG, WORKFLOW_CONFIG
+from utils.llm.model import get_llm_model
 
 # Initialize the LLM
-llm = ChatOpenAI(**LLM_CONFIG)
+llm = get_llm_model("openai", LLM_CONFIG["model"], temperature=LLM_CONFIG["temperature"], feature="research")
+# Steps whose input is the user's raw question, cached for paraphrases of it too
+question_llm = get_llm_model(
+    "openai", LLM_CONFIG["model"], temperature=LLM_CONFIG["temperature"], feature="research_question"
+)
 
 def create_validator_agent():
     prompt = ChatPromptTemplate.from_messages([
@@ -31,7 +37,7 @@ def create_validator_agent():
         - If the question is not related, provide a clear explanation why"""),
         ("human", "{input}")
     ])
-    return prompt | llm | JsonOutputParser()
+    return prompt | question_llm | JsonOutputParser()
 
 def create_planner_agent():
     prompt = ChatPromptTemplate.from_messages([
@@ -61,7 +67,7 @@ def create_planner_agent():
         - Do not exceed {max_sections} main sections"""),
         ("human", "{input}")
     ])
-    return prompt | llm | JsonOutputParser()
+    return prompt | question_llm | JsonOutputParser()
 
 def create_query_generator_agent():
     prompt = ChatPromptTemplate.from_messages([
@@ -9,3 +9,28 @@ SQL_LLM_MODEL = "gpt-3.5-turbo"
 LLM_RAG_EVAL_MODEL = "gpt-4o-mini"
 LLM_SUMMARIZATION_MODEL = "llama3.2:1b-instruct-q2_K"
 MAX_LLM_TOKENS = 30000
+CHART_LLM_MODEL = "gpt-4o-mini"
+CHART_WORKFLOW_MODE = "plan"  # "plan": one structured call + local validation, "agents": separate LLM agents and validator
+
+# Analysis caching
+BASE_QUERY_CACHE_TTL = 60 * 60  # seconds a generated base_data query is reused for the same selection
+ANALYSIS_RESULT_CACHE_TTL = 6 * 60 * 60  # seconds a cached analysis result is served as fresh
+ANALYSIS_RESULT_MAX_STALE = 24 * 60 * 60  # seconds an expired result may be served while it is refreshed
+ANALYSIS_DATA_VERSION = "lamas-2024"  # bump after re-uploading the accident tables to invalidate cached results
+
+# Generated chart code sandbox
+CHART_SANDBOX_WORKERS = 2  # pre-started worker processes executing generated chart code
+CHART_SANDBOX_TIMEOUT = 20  # wall-clock seconds before a chart execution is killed
+CHART_SANDBOX_CPU_SECONDS = 10  # CPU seconds a single chart execution may use
+CHART_SANDBOX_MEMORY_MB = 1536  # address-space limit of each worker process
+
+# Prompt sizes
+PROMPT_DATA_TOKEN_BUDGET = MAX_LLM_TOKENS // 6  # tokens of DataFrame content embedded in a summary prompt
+AGENT_PROMPT_DATA_TOKEN_BUDGET = 2000  # tokens of DataFrame content embedded in a chart agent prompt
+
+# Tracing
+TRACING_ENABLED = True
+TRACING_EXPORTERS = ["memory"]  # "memory" (debug panel), "console", "json" (TRACE_JSON_FILE), "otel" (opentelemetry-api)
+TRACE_JSON_FILE = "traces.jsonl"  # JSON lines file written by the "json" exporter
+TRACE_STORE_MAX_TRACES = 50  # traces kept in memory for the debug panel
+TRACE_DEBUG_PANEL = False  # show the trace waterfall of the last request, also enabled with ?debug=1
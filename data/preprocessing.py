@@ -42,90 +42,102 @@ def map_utm_to_lat_long(row):
     return pd.Series({'latitude': latitude, 'longitude': longitude})
 
 
-def preprocess_lamas_accident_data():
+# Raw columns decoded with each value mapping of MAPPING_FILE_NAME
+COLUMN_VALUE_MAPPINGS = {
+    "SUG_YOM": "sug_yom_mapping",
+    "YOM_LAYLA": "yom_layla_mapping",
+    "RAMZOR": "ramzor_mapping",
+    "HUMRAT_TEUNA": "humra_mapping",
+    "SUG_TEUNA": "sug_teuna_mapping",
+    "ZURAT_DEREH": "zurat_derech_mapping",
+    "SUG_DEREH": "sug_derech_mapping",
+    "HAD_MASLUL": "had_maslul_mapping",
+    "RAV_MASLUL": "rav_maslul_mapping",
+    "MEHIRUT_MUTERET": "mehirut_muteret_mapping",
+    "TKINUT": "tkinut_mapping",
+    "ROHAV": "rohav_mapping",
+    "SIMUN_TIMRUR": "simun_timrur_mapping",
+    "TEURA": "teura_mapping",
+    "BAKARA": "bakara_mapping",
+    "MEZEG_AVIR": "mezeg_avir_mapping",
+    "PNE_KVISH": "pne_kvish_mapping",
+    "SUG_EZEM": "sug_ezem_mapping",
+    "MERHAK_EZEM": "merhak_ezem_mapping",
+    "LO_HAZA": "lo_haza_mapping",
+    "OFEN_HAZIYA": "ofen_haziya_mapping",
+    "MEKOM_HAZIYA": "mekom_haziya_mapping",
+    "KIVUN_HAZIYA": "kivun_haziya_mapping",
+}
+
+TO_DROP_COLUMNS = [
+    "PK_TEUNA_FIKT",
+    "SEMEL_YISHUV",
+    "SEMEL_ZOMET",
+    "REHOV1_KVISH1",
+    "REHOV2_KVISH2",
+    "BAYIT_KM",
+    "X",
+    "Y",
+    "Ezor_Stat_Meuhad",
+    "igun_name",
+    'MAHOZ',
+    'NAFA',
+    'EZOR_TIVI',
+    'METROPOLIN',
+    'MAAMAD_MINIZIPALI'
+]
+
+
+def load_value_mappings(mapping_file_name=MAPPING_FILE_NAME):
+    """Load the code -> label mapping of every decoded column."""
     def convert_keys_to_int(mapping):
         return {int(k): v for k, v in mapping.items()}
 
-    df = pd.read_csv(ACCIDENT_FILE_NAME, encoding_errors='ignore')
+    with open(mapping_file_name, "r") as f:
+        mappings = json.load(f)
+
+    return {
+        column: convert_keys_to_int(mappings[mapping_name])
+        for column, mapping_name in COLUMN_VALUE_MAPPINGS.items()
+    }
+
 
+def add_urban_flag(df):
+    """Flag urban accidents, before SUG_DEREH is decoded to labels."""
     df["urban"] = np.where(df["SUG_DEREH"] <= 2, True, False)
+    return df
 
-    with open(MAPPING_FILE_NAME, "r") as f:
-        mappings = json.load(f)
 
-    # Convert each mapping from the JSON
-    sug_yom_mapping = convert_keys_to_int(mappings["sug_yom_mapping"])
-    yom_layla_mapping = convert_keys_to_int(mappings["yom_layla_mapping"])
-    ramzor_mapping = convert_keys_to_int(mappings["ramzor_mapping"])
-    humra_mapping = convert_keys_to_int(mappings["humra_mapping"])
-    sug_teuna_mapping = convert_keys_to_int(mappings["sug_teuna_mapping"])
-    zurat_derech_mapping = convert_keys_to_int(mappings["zurat_derech_mapping"])
-    sug_derech_mapping = convert_keys_to_int(mappings["sug_derech_mapping"])
-    had_maslul_mapping = convert_keys_to_int(mappings["had_maslul_mapping"])
-    rav_maslul_mapping = convert_keys_to_int(mappings["rav_maslul_mapping"])
-    mehirut_muteret_mapping = convert_keys_to_int(mappings["mehirut_muteret_mapping"])
-    tkinut_mapping = convert_keys_to_int(mappings["tkinut_mapping"])
-    rohav_mapping = convert_keys_to_int(mappings["rohav_mapping"])
-    simun_timrur_mapping = convert_keys_to_int(mappings["simun_timrur_mapping"])
-    teura_mapping = convert_keys_to_int(mappings["teura_mapping"])
-    bakara_mapping = convert_keys_to_int(mappings["bakara_mapping"])
-    mezeg_avir_mapping = convert_keys_to_int(mappings["mezeg_avir_mapping"])
-    pne_kvish_mapping = convert_keys_to_int(mappings["pne_kvish_mapping"])
-    sug_ezem_mapping = convert_keys_to_int(mappings["sug_ezem_mapping"])
-    merhak_ezem_mapping = convert_keys_to_int(mappings["merhak_ezem_mapping"])
-    lo_haza_mapping = convert_keys_to_int(mappings["lo_haza_mapping"])
-    ofen_haziya_mapping = convert_keys_to_int(mappings["ofen_haziya_mapping"])
-    mekom_haziya_mapping = convert_keys_to_int(mappings["mekom_haziya_mapping"])
-    kivun_haziya_mapping = convert_keys_to_int(mappings["kivun_haziya_mapping"])
-
-    # Assuming your DataFrame 'df' is already loaded, apply the mappings:
-    df["SUG_YOM"] = df["SUG_YOM"].map(sug_yom_mapping)
-    df["YOM_LAYLA"] = df["YOM_LAYLA"].map(yom_layla_mapping)
-    df["RAMZOR"] = df["RAMZOR"].map(ramzor_mapping)
-    df["HUMRAT_TEUNA"] = df["HUMRAT_TEUNA"].map(humra_mapping)
-    df["SUG_TEUNA"] = df["SUG_TEUNA"].map(sug_teuna_mapping)
-    df["ZURAT_DEREH"] = df["ZURAT_DEREH"].map(zurat_derech_mapping)
-    df["SUG_DEREH"] = df["SUG_DEREH"].map(sug_derech_mapping)
-    df["HAD_MASLUL"] = df["HAD_MASLUL"].map(had_maslul_mapping)
-    df["RAV_MASLUL"] = df["RAV_MASLUL"].map(rav_maslul_mapping)
-    df["MEHIRUT_MUTERET"] = df["MEHIRUT_MUTERET"].map(mehirut_muteret_mapping)
-    df["TKINUT"] = df["TKINUT"].map(tkinut_mapping)
-    df["ROHAV"] = df["ROHAV"].map(rohav_mapping)
-    df["SIMUN_TIMRUR"] = df["SIMUN_TIMRUR"].map(simun_timrur_mapping)
-    df["TEURA"] = df["TEURA"].map(teura_mapping)
-    df["BAKARA"] = df["BAKARA"].map(bakara_mapping)
-    df["MEZEG_AVIR"] = df["MEZEG_AVIR"].map(mezeg_avir_mapping)
-    df["PNE_KVISH"] = df["PNE_KVISH"].map(pne_kvish_mapping)
-    df["SUG_EZEM"] = df["SUG_EZEM"].map(sug_ezem_mapping)
-    df["MERHAK_EZEM"] = df["MERHAK_EZEM"].map(merhak_ezem_mapping)
-    df["LO_HAZA"] = df["LO_HAZA"].map(lo_haza_mapping)
-    df["OFEN_HAZIYA"] = df["OFEN_HAZIYA"].map(ofen_haziya_mapping)
-    df["MEKOM_HAZIYA"] = df["MEKOM_HAZIYA"].map(mekom_haziya_mapping)
-    df["KIVUN_HAZIYA"] = df["KIVUN_HAZIYA"].map(kivun_haziya_mapping)
+def decode_columns(df, value_mappings):
+    """Replace the numeric codes of the mapped columns with their labels."""
+    for column, mapping in value_mappings.items():
+        df[column] = df[column].map(mapping)
+    return df
+
 
+def add_lat_long(df):
+    """Convert the ITM X/Y coordinates of every accident to latitude and longitude."""
     df[['latitude', 'longitude']] = df.apply(map_utm_to_lat_long, axis=1)
+    return df
 
-    to_drop_columns = [
-        "PK_TEUNA_FIKT",
-        "SEMEL_YISHUV",
-        "SEMEL_ZOMET",
-        "REHOV1_KVISH1",
-        "REHOV2_KVISH2",
-        "BAYIT_KM",
-        "X",
-        "Y",
-        "Ezor_Stat_Meuhad",
-        "igun_name",
-        'MAHOZ',
-        'NAFA',
-        'EZOR_TIVI',
-        'METROPOLIN',
-        'MAAMAD_MINIZIPALI'
-    ]
 
+def finalize_columns(df):
+    """Fill missing values and drop the columns not used by the app."""
     df = df.fillna("Unknown")
-    df = df.drop(columns=to_drop_columns)
-    df.to_csv(ACCIDENT_OUT_FILE_NAME)
+    return df.drop(columns=TO_DROP_COLUMNS)
+
+
+def preprocess_lamas_accident_data(accident_file_name=ACCIDENT_FILE_NAME,
+                                   mapping_file_name=MAPPING_FILE_NAME,
+                                   out_file_name=ACCIDENT_OUT_FILE_NAME):
+    df = pd.read_csv(accident_file_name, encoding_errors='ignore')
+
+    df = add_urban_flag(df)
+    df = decode_columns(df, load_value_mappings(mapping_file_name))
+    df = add_lat_long(df)
+    df = finalize_columns(df)
+
+    df.to_csv(out_file_name)
 
 
 def create_location_df(accident_df):
@@ -0,0 +1,4 @@
+"""Multi-user load test of the app's flows against local stand-ins.
+
+See loadtest/__main__.py for usage.
+"""
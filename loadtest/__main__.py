@@ -0,0 +1,142 @@
+"""Run the load test.
+
+Every flow runs in its own process against the local fakes, so flows do not
+share caches or import state.
+
+Usage:
+    python -m loadtest --users 20 --requests 5
+    python -m loadtest --flows map,chat --users 100 --llm-first-token 0.8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from loadtest.fakes import FakeConfig
+
+FLOW_NAMES = ["map", "chat", "research"]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = FakeConfig()
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("--flows", default=",".join(FLOW_NAMES), help="comma separated flows to run")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users per flow")
+    parser.add_argument("--requests", type=int, default=5, help="requests per user")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between a user's requests")
+    parser.add_argument("--db-rows", type=int, default=50000, help="rows of the synthetic accidents table")
+    parser.add_argument("--search-delay", type=float, default=None,
+                        help="override the research workflow's delay between search results")
+    parser.add_argument("--llm-first-token", type=float, default=defaults.llm_first_token)
+    parser.add_argument("--llm-per-token", type=float, default=defaults.llm_per_token)
+    parser.add_argument("--answer-tokens", type=int, default=defaults.answer_tokens)
+    parser.add_argument("--embedding-latency", type=float, default=defaults.embedding)
+    parser.add_argument("--geocode-latency", type=float, default=defaults.geocode)
+    parser.add_argument("--search-latency", type=float, default=defaults.search)
+    parser.add_argument("--db-latency", type=float, default=defaults.db_query)
+    parser.add_argument("--vector-search-latency", type=float, default=defaults.vector_search)
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own output")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args(argv)
+
+
+def child_argv(args: argparse.Namespace) -> list:
+    """Rebuild the command line options, except --flows and --json, for a per-flow process."""
+    argv = []
+    for name, value in vars(args).items():
+        option = "--" + name.replace("_", "-")
+        if name in ("flows", "json") or value is None or value is False:
+            continue
+        argv += [option] if value is True else [option, str(value)]
+    return argv
+
+
+def run_flow(flow_name: str, args: argparse.Namespace) -> dict:
+    """Run one flow in this process and return its FlowResult dict."""
+    from loadtest.fake_data import create_accident_database
+    from loadtest.fakes import install_fakes
+    from loadtest import flows
+
+    if flow_name == "research":
+        flows.prepare_research_imports()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as tmp_dir:
+        install_fakes(FakeConfig(
+            llm_first_token=args.llm_first_token,
+            llm_per_token=args.llm_per_token,
+            answer_tokens=args.answer_tokens,
+            embedding=args.embedding_latency,
+            geocode=args.geocode_latency,
+            search=args.search_latency,
+            db_query=args.db_latency,
+            vector_search=args.vector_search_latency,
+            db_url=create_accident_database(args.db_rows, path=os.path.join(tmp_dir, "accidents.sqlite")),
+        ))
+
+        # Every run starts with an empty LLM response cache
+        from utils.llm.llm_config import LLM_CACHE_CONFIG
+        LLM_CACHE_CONFIG["path"] = os.path.join(tmp_dir, "llm_cache.sqlite")
+        # and with no local RAG indexing state
+        from rag.rag_config import RAG_CONFIG
+        for key in ("embedding_cache_path", "index_state_path", "bm25_index_path"):
+            RAG_CONFIG[key] = os.path.join(tmp_dir, os.path.basename(RAG_CONFIG[key]))
+
+        if flow_name == "research" and args.search_delay is not None:
+            # The workflow modules import its config both as config and research.config
+            import config
+            import research.config
+            config.SEARCH_CONFIG["delay"] = args.search_delay
+            research.config.SEARCH_CONFIG["delay"] = args.search_delay
+
+        from loadtest.runner import run_load
+
+        output = sys.stdout if args.verbose else io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = run_load(
+                flow_name,
+                flows.FLOWS[flow_name],
+                args.users,
+                args.requests,
+                args.ramp_up,
+                args.think_time
+            )
+    return result.to_dict()
+
+
+def main(argv=None) -> None:
+    from loadtest.runner import format_results
+
+    args = parse_args(argv)
+    flow_names = [name.strip() for name in args.flows.split(",") if name.strip()]
+    unknown = set(flow_names) - set(FLOW_NAMES)
+    if unknown:
+        sys.exit(f"Unknown flows: {', '.join(sorted(unknown))}")
+
+    if len(flow_names) == 1:
+        results = [run_flow(flow_names[0], args)]
+    else:
+        results = []
+        for flow_name in flow_names:
+            print(f"Running {flow_name} with {args.users} users x {args.requests} requests...", file=sys.stderr)
+            completed = subprocess.run(
+                [sys.executable, "-m", "loadtest", "--flows", flow_name, "--json", *child_argv(args)],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                stdout=subprocess.PIPE,
+                text=True,
+                check=True
+            )
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results[0] if len(results) == 1 else results))
+    else:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Deterministic synthetic data for the load-test stand-ins.
+
+Builds a SQLite database with the `accidents` and `geographical_locations`
+tables queried by the map analysis, and a corpus of road safety passages for
+the chat retriever. The same seed always produces the same data.
+"""
+import os
+import random
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from components.map.static_queries import CAUSE_COLUMNS, OUTCOME_COLUMNS
+
+CITIES = ["Haifa", "Tel Aviv", "Jerusalem", "Beer Sheva", "Netanya", "Ashdod", "Rishon LeZion", "Petah Tikva"]
+ROADS_PER_CITY = 6
+SUBURBS_PER_CITY = 3
+SEVERITIES = [1, 2, 3]  # 1 fatal, 2 severe, 3 light
+YEARS = list(range(2015, 2024))
+COORDINATE_STEP = 0.001
+
+CORPUS_TOPICS = [
+    "speeding", "distracted driving", "pedestrian crossings", "night driving", "wet road surfaces",
+    "motorcycle safety", "junction design", "driver fatigue", "seat belt use", "young drivers",
+    "public transport lanes", "roundabouts", "speed cameras", "alcohol and driving", "heavy vehicles",
+]
+
+
+def build_locations(seed: int = 0) -> List[Dict[str, Optional[str]]]:
+    """Build the location hierarchy the fake geocoder answers with.
+
+    Returns:
+        One address per road, with the lowercase keys Nominatim returns
+    """
+    rng = random.Random(seed)
+    locations = []
+    for city in CITIES:
+        for road_idx in range(ROADS_PER_CITY):
+            suburb_idx = rng.randrange(SUBURBS_PER_CITY)
+            locations.append({
+                "road": f"{city} Road {road_idx + 1}",
+                "suburb": f"{city} Suburb {suburb_idx + 1}",
+                "city_district": f"{city} District {suburb_idx % 2 + 1}",
+                "town": None,
+                "city": city,
+            })
+    return locations
+
+
+def location_coordinates(location_idx: int) -> Tuple[float, float]:
+    """Coordinates of a location, as stored in both tables."""
+    return 32.0 + location_idx * COORDINATE_STEP, 34.8 + location_idx * COORDINATE_STEP
+
+
+def location_index(lat: float, lon: float, num_locations: int) -> int:
+    """Inverse of location_coordinates, wrapping unknown points onto a location."""
+    return int(round((lat - 32.0) / COORDINATE_STEP)) % num_locations
+
+
+def build_accidents(locations: List[Dict[str, Optional[str]]], num_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build accident rows spread over the given locations."""
+    rng = np.random.default_rng(seed)
+    # Every location has its own coordinates, joined on by the base query
+    lat, lon = location_coordinates(rng.integers(0, len(locations), num_rows))
+
+    data = {
+        "lat": lat,
+        "lon": lon,
+        "SHNAT_TEU": rng.choice(YEARS, num_rows),
+        "HUMRAT_TEUNA": rng.choice(SEVERITIES, num_rows, p=[0.02, 0.13, 0.85]),
+        "Num_nifgaim": rng.integers(1, 6, num_rows),
+        "kle_rehev_huznu": rng.integers(1, 4, num_rows),
+    }
+    for column in dict.fromkeys(CAUSE_COLUMNS + OUTCOME_COLUMNS):
+        data[column] = rng.integers(1, 10, num_rows)
+    return pd.DataFrame(data)
+
+
+def build_geographical_locations(locations: List[Dict[str, Optional[str]]]) -> pd.DataFrame:
+    """Build the geographical_locations rows matching build_accidents coordinates."""
+    rows = []
+    for idx, location in enumerate(locations):
+        lat, lon = location_coordinates(idx)
+        rows.append({"lat": lat, "lon": lon, **{key.upper(): value for key, value in location.items()}})
+    return pd.DataFrame(rows)
+
+
+def create_accident_database(num_rows: int = 50000, seed: int = 0, path: Optional[str] = None) -> str:
+    """Write the synthetic accident tables to a SQLite file.
+
+    A file is used rather than an in-memory database so concurrent users get
+    their own connections, as they do against Postgres.
+
+    Args:
+        num_rows: Number of accident rows
+        seed: Random seed
+        path: Database file, a temporary file by default
+
+    Returns:
+        SQLAlchemy URL of the database
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="loadtest_", suffix=".sqlite")
+        os.close(fd)
+    elif os.path.exists(path):
+        os.remove(path)
+
+    locations = build_locations(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    build_accidents(locations, num_rows, seed).to_sql("accidents", engine, if_exists="replace", index=False)
+    build_geographical_locations(locations).to_sql("geographical_locations", engine, if_exists="replace", index=False)
+    engine.dispose()
+    return f"sqlite:///{path}"
+
+
+def build_corpus(num_chunks: int = 500, seed: int = 0) -> List[Dict[str, str]]:
+    """Build road safety passages standing in for the indexed PDF chunks."""
+    rng = random.Random(seed)
+    corpus = []
+    for idx in range(num_chunks):
+        topic = rng.choice(CORPUS_TOPICS)
+        city = rng.choice(CITIES)
+        share = rng.randint(5, 60)
+        corpus.append({
+            "content": (
+                f"Report {idx}: {topic} accounts for about {share}% of injury accidents in {city}. "
+                f"Measures addressing {topic} reduced severe accidents in comparable areas."
+            ),
+            "source": f"report_{idx % 40}.pdf",
+        })
+    return corpus
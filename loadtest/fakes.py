@@ -0,0 +1,353 @@
+"""Local stand-ins for the external services the app calls.
+
+Each fake answers deterministically, derived from its input, after a
+configurable delay standing in for network and generation time:
+
+- FakeChatOpenAI for ChatOpenAI, including token streaming and tool binding
+- FakeEmbeddings for OpenAIEmbeddings, a hashed bag-of-words embedding
+- fake_reverse_geocode for GeoHelper.reverse_geocode (Nominatim)
+- FakeDDGS for duckduckgo_search.DDGS
+- FakeSqlDb for SqlDb, backed by a synthetic SQLite database and an
+  in-memory stand-in for the Supabase vector search RPC
+
+install_fakes must run before the app modules are imported, since they bind
+ChatOpenAI, OpenAIEmbeddings and DDGS at import time.
+"""
+import ast
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, Field
+
+from loadtest.fake_data import build_corpus, build_locations, location_index
+
+
+@dataclass
+class FakeConfig:
+    """Latencies, in seconds, and response sizes of the fake services."""
+    llm_first_token: float = 0.5  # time to the first generated token
+    llm_per_token: float = 0.01  # time per further generated token
+    answer_tokens: int = 150  # words in free-text answers and summaries
+    embedding: float = 0.1  # per embedding request
+    geocode: float = 0.3  # per reverse geocoding request
+    search: float = 0.4  # per web search request
+    db_query: float = 0.02  # added to every SQL query, on top of SQLite's own time
+    vector_search: float = 0.05  # per vector similarity search
+    db_url: Optional[str] = None  # SQLAlchemy URL of the synthetic accident database
+
+
+FAKE_CONFIG = FakeConfig()
+
+# Location hierarchy, from the most to the least specific level
+LOCATION_LEVELS = ["ROAD", "SUBURB", "CITY_DISTRICT", "TOWN", "CITY"]
+
+LOCATIONS = build_locations()
+
+FILLER_WORDS = (
+    "accident rates severity road junction speed pedestrians drivers night weather trend increase "
+    "decrease share injuries vehicles urban data year location risk safety measures"
+).split()
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _filler_text(prompt: str, num_words: int) -> str:
+    rng = np.random.default_rng(_seed(prompt))
+    words = rng.choice(FILLER_WORDS, num_words)
+    sentences = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, num_words, 12)]
+    return " ".join(sentences)
+
+
+def _base_query_response(prompt: str) -> str:
+    """Answer the SQL agent's base_data prompt with a query for the requested locations."""
+    filter_level = re.search(r"Filter Level: (\w+)", prompt).group(1)
+    location_dict = ast.literal_eval(re.search(r"Location Dictionary: (\{.*\})", prompt).group(1))
+
+    conditions = []
+    for level in LOCATION_LEVELS[LOCATION_LEVELS.index(filter_level):]:
+        values = sorted({value for value in location_dict.get(level, {}).values() if value})
+        if values:
+            quoted = ", ".join("'" + value.replace("'", "''") + "'" for value in values)
+            conditions.append(f"g.{level} IN ({quoted})")
+
+    sql_query = (
+        "WITH base_data AS (SELECT a.* FROM accidents a JOIN geographical_locations g "
+        "ON a.lat = g.lat AND a.lon = g.lon"
+        + (" WHERE " + " AND ".join(conditions) if conditions else "")
+        + ")"
+    )
+    return "```json\n" + json.dumps({"sql_query": sql_query}) + "\n```"
+
+
+def _section_titles(prompt: str) -> List[str]:
+    return re.findall(r'"title": "([^"]+)"', prompt) or ["Overview"]
+
+
+def fake_response(prompt: str, answer_tokens: int) -> str:
+    """Build the deterministic response to a prompt.
+
+    Prompts of the SQL agent and the research agents get answers in the format
+    their parsers expect, everything else gets filler text.
+    """
+    if "CTE named `base_data`" in prompt:
+        return _base_query_response(prompt)
+    if "determine if a question is related to car accidents" in prompt:
+        return json.dumps({"is_valid": True, "reason": "The question is about car accidents"})
+    if "expert research planner" in prompt:
+        return json.dumps({"sections": [
+            {"title": "Introduction", "description": "Background of the question"},
+            {"title": "Main Factors", "description": "The main contributing factors"},
+            {"title": "Conclusions", "description": "Key findings"},
+        ]})
+    if "effective web search queries" in prompt:
+        title = _section_titles(prompt)[0]
+        return json.dumps({"search_queries": [
+            {"section_title": title, "query": f"{title} car accidents {idx}"} for idx in range(3)
+        ]})
+    if "expert research reviewer" in prompt:
+        return json.dumps({
+            "evaluation": {
+                "completeness": "complete", "relevance": "relevant",
+                "structure": "clear", "correctness": "correct"
+            },
+            "needs_enhancement": False,
+            "enhancement_queries": [],
+            "suggestions": [],
+        })
+    if "Return a JSON" in prompt and '"summary"' in prompt:
+        return json.dumps({
+            "summary": _filler_text(prompt, answer_tokens) + " [1]",
+            "citations": [{"text": "Accident statistics", "source": "Fake source", "url": "https://example.com/1"}],
+        })
+    return _filler_text(prompt, answer_tokens)
+
+
+class FakeChatOpenAI(BaseChatModel):
+    """Stand-in for ChatOpenAI accepting the same constructor arguments."""
+    model_name: str = Field(default="gpt-4o-mini", alias="model")
+    temperature: float = 0
+    streaming: bool = False
+
+    model_config = ConfigDict(populate_by_name=True, extra="ignore")
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-openai"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatOpenAI":
+        # Answers never contain tool calls, so agents finish after one step
+        return self
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        words = fake_response(prompt, FAKE_CONFIG.answer_tokens).split(" ")
+        return [word if idx == 0 else " " + word for idx, word in enumerate(words)]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        tokens = list(self._stream_tokens(messages, run_manager if self.streaming else None))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        for token in self._stream_tokens(messages, run_manager):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    def _stream_tokens(
+        self,
+        messages: List[BaseMessage],
+        run_manager: Optional[CallbackManagerForLLMRun]
+    ) -> Iterator[str]:
+        time.sleep(FAKE_CONFIG.llm_first_token)
+        for idx, token in enumerate(self._tokens(messages)):
+            if idx:
+                time.sleep(FAKE_CONFIG.llm_per_token)
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield token
+
+
+class FakeEmbeddings(Embeddings):
+    """Stand-in for OpenAIEmbeddings using hashed bag-of-words vectors."""
+
+    def __init__(self, dimensions: int = 1536, **kwargs: Any):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[_seed(word) % self.dimensions] += 1
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(FAKE_CONFIG.embedding)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(FAKE_CONFIG.embedding)
+        return self._embed(text)
+
+
+class FakeDDGS:
+    """Stand-in for duckduckgo_search.DDGS."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        pass
+
+    def text(self, keywords: str, max_results: Optional[int] = None, **kwargs: Any) -> List[Dict[str, str]]:
+        time.sleep(FAKE_CONFIG.search)
+        return [
+            {
+                "title": f"Result {idx} for {keywords}",
+                "href": f"https://example.com/{_seed(keywords) % 1000}/{idx}",
+                "body": _filler_text(f"{keywords} {idx}", 40),
+            }
+            for idx in range(max_results or 5)
+        ]
+
+
+def fake_reverse_geocode(cls, lat: float, lon: float, idx: int = 0) -> Dict[str, Any]:
+    """Stand-in for GeoHelper.reverse_geocode, answering from the synthetic locations."""
+    time.sleep(FAKE_CONFIG.geocode)
+    location = LOCATIONS[location_index(lat, lon, len(LOCATIONS))]
+    return {
+        "address": {key: value for key, value in location.items() if value is not None},
+        "display_name": ", ".join(value for value in location.values() if value),
+        "idx": idx,
+        "lat": lat,
+        "lon": lon,
+    }
+
+
+class _FakeRpcParams(dict):
+    def set(self, key: str, value: Any) -> "_FakeRpcParams":
+        return _FakeRpcParams(self, **{key: value})
+
+
+class _FakeRpcQuery:
+    def __init__(self, client: "FakeSupabaseClient", params: Dict[str, Any]):
+        self.client = client
+        self.params = _FakeRpcParams(params)
+
+    def execute(self) -> SimpleNamespace:
+        time.sleep(FAKE_CONFIG.vector_search)
+        return SimpleNamespace(data=self.client.match_documents(
+            self.params["query_embedding"],
+            int(self.params.get("limit", 5))
+        ))
+
+
+class FakeSupabaseClient:
+    """Stand-in for the Supabase client, serving the match_documents RPC from memory."""
+
+    def __init__(self, corpus: List[Dict[str, str]]):
+        self.corpus = corpus
+        self.embeddings = np.array(
+            [FakeEmbeddings()._embed(chunk["content"]) for chunk in corpus],
+            dtype=np.float32
+        )
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> _FakeRpcQuery:
+        return _FakeRpcQuery(self, params)
+
+    def match_documents(self, query_embedding: List[float], k: int) -> List[Dict[str, Any]]:
+        scores = self.embeddings @ np.asarray(query_embedding, dtype=np.float32)
+        top = np.argsort(-scores)[:k]
+        return [
+            {
+                "id": int(idx),
+                "content": self.corpus[idx]["content"],
+                "metadata": {"source": self.corpus[idx]["source"]},
+                "similarity": float(scores[idx]),
+            }
+            for idx in top
+        ]
+
+
+_supabase_client: Optional[FakeSupabaseClient] = None
+_supabase_client_lock = threading.Lock()
+
+
+def get_fake_supabase_client() -> FakeSupabaseClient:
+    """Get the process-wide fake Supabase client, embedding the corpus once."""
+    global _supabase_client
+    if _supabase_client is None:
+        with _supabase_client_lock:
+            if _supabase_client is None:
+                _supabase_client = FakeSupabaseClient(build_corpus())
+    return _supabase_client
+
+
+def _make_fake_sql_db(sql_db_class: type) -> type:
+    """Create the SqlDb stand-in as a subclass of the real class."""
+    from langchain_community.utilities import SQLDatabase
+    from sqlalchemy import create_engine
+
+    class FakeSqlDb(sql_db_class):
+        """SqlDb on the synthetic SQLite database and the fake Supabase client."""
+
+        def __init__(self, db_url: Optional[str] = None, **kwargs: Any):
+            self.url = db_url or FAKE_CONFIG.db_url
+            if self.url is None:
+                raise ValueError("No load-test database, call install_fakes with a db_url")
+            self.engine = create_engine(self.url)
+            self.db = SQLDatabase(self.engine)
+            self.client = get_fake_supabase_client()
+
+        def execute_query(self, query: str) -> pd.DataFrame:
+            time.sleep(FAKE_CONFIG.db_query)
+            return super().execute_query(query)
+
+    return FakeSqlDb
+
+
+def install_fakes(config: Optional[FakeConfig] = None) -> FakeConfig:
+    """Replace the external clients with the local stand-ins.
+
+    Args:
+        config: Latencies and database of the fakes, the defaults if not given
+
+    Returns:
+        The active configuration, which may be changed while the fakes are installed
+    """
+    global FAKE_CONFIG
+    if config is not None:
+        FAKE_CONFIG = config
+
+    import duckduckgo_search
+    import langchain_openai
+    import utils.sql.sql_db
+    from utils.map.geocoding import GeoHelper
+
+    langchain_openai.ChatOpenAI = FakeChatOpenAI
+    langchain_openai.OpenAIEmbeddings = FakeEmbeddings
+    duckduckgo_search.DDGS = FakeDDGS
+    GeoHelper.reverse_geocode = classmethod(fake_reverse_geocode)
+    utils.sql.sql_db.SqlDb = _make_fake_sql_db(utils.sql.sql_db.SqlDb)
+    return FAKE_CONFIG
@@ -0,0 +1,142 @@
+"""User flows driven by the load test, without the Streamlit UI.
+
+Each flow function performs one user request, the same calls the
+corresponding view makes, and returns a short outcome label. Per-user state
+that the app keeps in st.session_state, such as the chat conversation, is
+kept per virtual user here.
+
+The research workflow imports its modules as top-level names (config, state,
+agents), which clash with the app's own config module. It therefore needs its
+own process, set up with prepare_research_imports before anything imports
+the app's config.
+"""
+import os
+import random
+import sys
+import threading
+from typing import Callable, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANALYSIS_TYPES = ["general", "cause", "outcome"]
+FILTER_LEVELS = ["CITY", "CITY_DISTRICT", "SUBURB", "ROAD"]
+
+CHAT_QUESTIONS = [
+    "What are the main causes of accidents at night?",
+    "How does speeding affect accident severity?",
+    "Which measures reduce pedestrian injuries?",
+    "Are young drivers involved in more severe accidents?",
+    "How does wet weather change accident rates?",
+]
+
+RESEARCH_QUESTIONS = [
+    "What are the main causes for car accidents in Haifa?",
+    "How do roundabouts affect accident severity?",
+    "What is the impact of speed cameras on urban accidents?",
+]
+
+_conversations: Dict[int, object] = {}
+_research_graph = None
+_research_graph_lock = threading.Lock()
+
+
+def prepare_research_imports() -> None:
+    """Put the research workflow's directories first on the import path."""
+    research_dir = os.path.join(ROOT, "components", "research")
+    sys.path[:0] = [research_dir, os.path.join(ROOT, "components")]
+
+
+def run_map_analysis(user_id: int, iteration: int) -> str:
+    """Pick a point on the map, geocode it and run an analysis on its area.
+
+    Mirrors render_dataframe and run_streaming_analysis: the summary is
+    consumed as a stream and complete results go to the result cache.
+    """
+    from components.map.analysis_component import (
+        cache_analysis_result,
+        generate_visualization,
+        get_analysis_cache_key,
+        get_analysis_config,
+        get_cached_analysis_result,
+        query_analysis_data,
+        stream_summary,
+    )
+    from config import DF_COLUMNS
+    from loadtest.fake_data import location_coordinates
+    from loadtest.fakes import LOCATIONS
+    from utils.map.geocoding import GeoHelper
+    from utils.session.resources import get_sql_db, get_sql_llm_agent
+
+    rng = random.Random(user_id * 100003 + iteration)
+    lat, lon = location_coordinates(rng.randrange(len(LOCATIONS)))
+    address = GeoHelper.reverse_geocode(lat, lon)["address"]
+
+    filter_level = rng.choice(FILTER_LEVELS)
+    analysis_type = rng.choice(ANALYSIS_TYPES)
+    location_name_dict = {column.upper(): {0: address.get(column)} for column in DF_COLUMNS}
+
+    if get_cached_analysis_result(filter_level, location_name_dict, analysis_type) is not None:
+        return "cached"
+
+    df = query_analysis_data(filter_level, location_name_dict, analysis_type, get_sql_db(), get_sql_llm_agent())
+    fig = generate_visualization(df, analysis_type)
+    _, summary_prompt = get_analysis_config(analysis_type)
+    summary = "".join(stream_summary(df, summary_prompt))
+
+    cache_analysis_result(
+        get_analysis_cache_key(filter_level, location_name_dict, analysis_type),
+        summary,
+        fig,
+        df
+    )
+    return "computed"
+
+
+def run_chat(user_id: int, iteration: int) -> str:
+    """Ask the chat a question, consuming the streamed answer like the chat view."""
+    from utils.session.resources import get_rag
+
+    rag = get_rag()
+    if user_id not in _conversations:
+        _conversations[user_id] = rag.create_conversation()
+
+    question = CHAT_QUESTIONS[(user_id + iteration) % len(CHAT_QUESTIONS)]
+    answer = "".join(rag.stream_chat(question, _conversations[user_id]))
+    return "answered" if answer else "empty"
+
+
+def _get_research_graph():
+    global _research_graph
+    if _research_graph is None:
+        with _research_graph_lock:
+            if _research_graph is None:
+                from workflow import create_workflow_graph
+                _research_graph = create_workflow_graph()
+    return _research_graph
+
+
+def run_research(user_id: int, iteration: int) -> str:
+    """Run the research workflow on a question, as workflow.main does."""
+    from state import PlanningState
+
+    question = RESEARCH_QUESTIONS[(user_id + iteration) % len(RESEARCH_QUESTIONS)]
+    final_state = _get_research_graph().invoke(PlanningState(
+        query=question,
+        sections=[],
+        search_queries=[],
+        search_results=[],
+        summaries=[],
+        citations={},
+        needs_enhancement=False,
+        reflection_count=0,
+        is_query_valid=False,
+        query_retry_count=0
+    ))
+    return f"{len(final_state['summaries'])} summaries"
+
+
+FLOWS: Dict[str, Callable[[int, int], str]] = {
+    "map": run_map_analysis,
+    "chat": run_chat,
+    "research": run_research,
+}
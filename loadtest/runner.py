@@ -0,0 +1,129 @@
+"""Concurrent virtual users and latency statistics."""
+import threading
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+PERCENTILES = [50, 95, 99]
+
+
+@dataclass
+class FlowResult:
+    """Latencies and outcomes of one flow under load."""
+    flow: str
+    users: int
+    requests: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+    error_messages: Counter = field(default_factory=Counter)
+
+    @property
+    def throughput(self) -> float:
+        """Completed requests per second."""
+        return (self.requests - self.errors) / self.duration if self.duration else 0.0
+
+    def percentiles(self) -> Dict[int, float]:
+        """Latency percentiles of successful requests, in seconds."""
+        if not self.latencies:
+            return {p: float("nan") for p in PERCENTILES}
+        return {p: float(np.percentile(self.latencies, p)) for p in PERCENTILES}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "flow": self.flow,
+            "users": self.users,
+            "requests": self.requests,
+            "errors": self.errors,
+            "duration": self.duration,
+            "throughput": self.throughput,
+            "percentiles": {str(p): value for p, value in self.percentiles().items()},
+            "mean": float(np.mean(self.latencies)) if self.latencies else float("nan"),
+            "outcomes": dict(self.outcomes),
+            "error_messages": dict(self.error_messages),
+        }
+
+
+def run_load(
+    flow_name: str,
+    flow: Callable[[int, int], str],
+    users: int,
+    requests_per_user: int,
+    ramp_up: float = 0.0,
+    think_time: float = 0.0
+) -> FlowResult:
+    """Run a flow with concurrent virtual users.
+
+    Every user runs on its own thread, as every Streamlit session does, and
+    sends its requests one after the other.
+
+    Args:
+        flow_name: Name reported for the flow
+        flow: Callable performing one request for (user_id, iteration)
+        users: Number of concurrent virtual users
+        requests_per_user: Requests each user sends
+        ramp_up: Seconds over which user starts are spread
+        think_time: Seconds a user waits between its requests
+
+    Returns:
+        FlowResult with the latency of every successful request
+    """
+    result = FlowResult(flow=flow_name, users=users)
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(users + 1)
+
+    def user(user_id: int) -> None:
+        start_barrier.wait()
+        if ramp_up and users > 1:
+            time.sleep(ramp_up * user_id / (users - 1))
+        for iteration in range(requests_per_user):
+            start = time.perf_counter()
+            try:
+                outcome = flow(user_id, iteration)
+                latency = time.perf_counter() - start
+                with lock:
+                    result.requests += 1
+                    result.latencies.append(latency)
+                    result.outcomes[outcome] += 1
+            except Exception as e:
+                with lock:
+                    result.requests += 1
+                    result.errors += 1
+                    result.error_messages[f"{type(e).__name__}: {str(e)[:200]}"] += 1
+                    if result.errors == 1:
+                        traceback.print_exc()
+            if think_time:
+                time.sleep(think_time)
+
+    threads = [threading.Thread(target=user, args=(user_id,), daemon=True) for user_id in range(users)]
+    for thread in threads:
+        thread.start()
+
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Format FlowResult dicts as a table."""
+    header = f"{'flow':<10}{'users':>6}{'reqs':>6}{'errors':>7}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'req/s':>8}  outcomes"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        percentiles = result["percentiles"]
+        outcomes = ", ".join(f"{name}: {count}" for name, count in result["outcomes"].items())
+        lines.append(
+            f"{result['flow']:<10}{result['users']:>6}{result['requests']:>6}{result['errors']:>7}"
+            f"{percentiles['50']:>9.2f}{percentiles['95']:>9.2f}{percentiles['99']:>9.2f}"
+            f"{result['throughput']:>8.2f}  {outcomes}"
+        )
+        for message, count in result["error_messages"].items():
+            lines.append(f"    {count} x {message}")
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens. Hebrew words, road numbers and statistic names are kept whole."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass
+class _TableIndex:
+    # Version of the table the postings were loaded at
+    version: int
+    ids: List[str]
+    lengths: np.ndarray
+    # Positions of the chunks containing a term, and the term's frequency in each
+    postings: Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+class BM25Index:
+    """
+    Local inverted index scored with Okapi BM25, kept alongside the vector index.
+
+    Chunks and their postings are stored in SQLite per vector table, so the
+    index is updated incrementally with the vector rows and persists between
+    runs. Searches run on an in-memory copy of a table's postings as NumPy
+    arrays, loaded on the first search after the table changed, in this or
+    in another process such as an indexing run.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        """
+        Open or create an index.
+
+        Args:
+            path: SQLite database file
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._tables: Dict[str, _TableIndex] = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS bm25_docs (
+                table_name TEXT,
+                id TEXT,
+                length INTEGER,
+                content TEXT,
+                metadata TEXT,
+                PRIMARY KEY (table_name, id)
+            )
+        """)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS bm25_postings (
+                table_name TEXT,
+                term TEXT,
+                id TEXT,
+                tf INTEGER,
+                PRIMARY KEY (table_name, term, id)
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS bm25_postings_id ON bm25_postings (table_name, id)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS bm25_versions (table_name TEXT PRIMARY KEY, version INTEGER)"
+        )
+        self._connection.commit()
+
+    def add(self,
+            table_name: str,
+            ids: List[str],
+            contents: List[str],
+            metadatas: List[Dict[str, Any]]) -> None:
+        """Index chunks of a vector table, replacing the chunks with the same ids."""
+        docs, postings = [], []
+        for chunk_id, content, metadata in zip(ids, contents, metadatas):
+            terms = tokenize(content)
+            docs.append((table_name, chunk_id, len(terms), content,
+                         json.dumps(metadata, ensure_ascii=False, default=str)))
+            postings += [(table_name, term, chunk_id, tf) for term, tf in Counter(terms).items()]
+        with self._lock:
+            self._delete(table_name, ids)
+            self._connection.executemany("INSERT INTO bm25_docs VALUES (?, ?, ?, ?, ?)", docs)
+            self._connection.executemany("INSERT INTO bm25_postings VALUES (?, ?, ?, ?)", postings)
+            self._bump_version(table_name)
+            self._connection.commit()
+            self._tables.pop(table_name, None)
+
+    def delete(self, table_name: str, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._delete(table_name, list(ids))
+            self._bump_version(table_name)
+            self._connection.commit()
+            self._tables.pop(table_name, None)
+
+    def _delete(self, table_name: str, ids: List[str]) -> None:
+        rows = [(table_name, chunk_id) for chunk_id in ids]
+        self._connection.executemany("DELETE FROM bm25_postings WHERE table_name = ? AND id = ?", rows)
+        self._connection.executemany("DELETE FROM bm25_docs WHERE table_name = ? AND id = ?", rows)
+
+    def _bump_version(self, table_name: str) -> None:
+        self._connection.execute(
+            "INSERT INTO bm25_versions VALUES (?, 1) ON CONFLICT (table_name) DO UPDATE SET version = version + 1",
+            (table_name,)
+        )
+
+    def _version(self, table_name: str) -> int:
+        row = self._connection.execute(
+            "SELECT version FROM bm25_versions WHERE table_name = ?", (table_name,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM bm25_docs").fetchone()[0]
+
+    def _table_index(self, table_name: str) -> "_TableIndex":
+        """In-memory index of a table, loaded on first search after the table changed."""
+        version = self._version(table_name)
+        if table_name not in self._tables or self._tables[table_name].version != version:
+            docs = self._connection.execute(
+                "SELECT id, length FROM bm25_docs WHERE table_name = ?", (table_name,)
+            ).fetchall()
+            positions = {chunk_id: position for position, (chunk_id, _) in enumerate(docs)}
+            postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            for term, chunk_id, tf in self._connection.execute(
+                    "SELECT term, id, tf FROM bm25_postings WHERE table_name = ?", (table_name,)):
+                term_positions, term_tfs = postings.setdefault(term, ([], []))
+                term_positions.append(positions[chunk_id])
+                term_tfs.append(tf)
+            self._tables[table_name] = _TableIndex(
+                version=version,
+                ids=[chunk_id for chunk_id, _ in docs],
+                lengths=np.array([length for _, length in docs], dtype=np.float32),
+                postings={term: (np.array(term_positions, dtype=np.int64), np.array(term_tfs, dtype=np.float32))
+                          for term, (term_positions, term_tfs) in postings.items()}
+            )
+        return self._tables[table_name]
+
+    def search(self, table_name: str, query: str, k: int) -> List[Tuple[Document, float]]:
+        """
+        Find the chunks of a vector table that best match a query.
+
+        Args:
+            table_name: Vector table whose chunks are searched
+            query: Search text
+            k: Number of chunks to return
+
+        Returns:
+            (chunk, BM25 score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            index = self._table_index(table_name)
+        if not terms or not index.ids:
+            return []
+
+        num_docs = len(index.ids)
+        length_norm = self.k1 * (1 - self.b + self.b * index.lengths / index.lengths.mean())
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for term in terms & index.postings.keys():
+            positions, tfs = index.postings[term]
+            idf = math.log(1 + (num_docs - len(positions) + 0.5) / (len(positions) + 0.5))
+            scores[positions] += idf * tfs * (self.k1 + 1) / (tfs + length_norm[positions])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        best = matched[np.argsort(-scores[matched])]
+        scores_by_id = {index.ids[position]: score for position, score in zip(best, scores[best].tolist())}
+        documents = self._documents(table_name, list(scores_by_id))
+        return [(doc, scores_by_id[doc.id]) for doc in documents]
+
+    def _documents(self, table_name: str, ids: List[str]) -> List[Document]:
+        if not ids:
+            return []
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT id, content, metadata FROM bm25_docs WHERE table_name = ? AND id IN ({','.join('?' * len(ids))})",
+                [table_name, *ids]
+            ).fetchall()
+        by_id = {chunk_id: Document(id=chunk_id, page_content=content, metadata=json.loads(metadata))
+                 for chunk_id, content, metadata in rows}
+        # Chunks deleted since the postings were loaded are skipped
+        return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+
+
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(path: Optional[str]) -> Optional[BM25Index]:
+    """Get the process-wide index stored at path, or None if path is not set."""
+    if not path:
+        return None
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = BM25Index(path)
+        return _indexes[path]
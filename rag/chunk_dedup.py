@@ -0,0 +1,94 @@
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+
+from rag.bm25_index import tokenize
+
+# Smallest prime above 2^32, so a * hash + b stays below 2^64 for 32-bit hashes
+_PRIME = np.uint64(4294967311)
+
+
+class MinHashDeduplicator:
+    """
+    Drops chunks that nearly duplicate a chunk seen before, such as the repeated
+    headers, footers, disclaimers and tables of CBS and academic PDFs.
+
+    Chunks are compared by the Jaccard similarity of their word shingles,
+    estimated from MinHash signatures. Locality-sensitive hashing over bands of
+    the signature finds the candidates, so each chunk is compared only with
+    the few chunks sharing a band rather than with every chunk seen. Words are
+    lowercased as for the keyword index, so differences in case, spacing and
+    punctuation do not count. Adjacent chunks only share their overlap and are
+    far below the threshold.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, seed: int = 0):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            threshold: Estimated Jaccard similarity from which a chunk is a duplicate
+            num_perm: Hash functions of a signature, more make the estimate more precise
+            bands: LSH bands, num_perm must be a multiple. More bands find less similar candidates
+            shingle_size: Words per shingle
+            seed: Seed of the hash functions
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        self._signatures: List[np.ndarray] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self.seen = self.dropped = 0
+        self.seen_chars = self.dropped_chars = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text's word shingles."""
+        words = tokenize(text)
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i: i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64,
+                             count=len(shingles))
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check a text against the texts seen so far, remembering it if it is new."""
+        signature = self.signature(text)
+        bands = [(band, part.tobytes()) for band, part in enumerate(np.split(signature, self.bands))]
+        candidates = {position for key in bands for position in self._buckets.get(key, ())}
+        for position in candidates:
+            if np.mean(self._signatures[position] == signature) >= self.threshold:
+                return True
+        for key in bands:
+            self._buckets[key].append(len(self._signatures))
+        self._signatures.append(signature)
+        return False
+
+    def filter(self, chunks: List[Document]) -> List[Document]:
+        """
+        Drop the chunks that nearly duplicate an earlier chunk.
+
+        Args:
+            chunks: Chunks in document order, the first of near-duplicates is kept
+
+        Returns:
+            The remaining chunks, in order
+        """
+        kept = []
+        for chunk in chunks:
+            self.seen += 1
+            self.seen_chars += len(chunk.page_content)
+            if self.is_duplicate(chunk.page_content):
+                self.dropped += 1
+                self.dropped_chars += len(chunk.page_content)
+            else:
+                kept.append(chunk)
+        return kept
@@ -0,0 +1,120 @@
+import time
+from typing import List, Optional
+
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain.prompts import PromptTemplate
+from langchain.schema.language_model import BaseLanguageModel
+from langchain_core.messages import BaseMessage, get_buffer_string
+
+from rag.rag_config import RAG_CONFIG, SYSTEM_PROMPTS
+from utils.llm.prompt_data import count_tokens
+
+
+class SummaryWindowMemory(ConversationSummaryBufferMemory):
+    """
+    Conversation memory holding a token-budgeted window of recent turns and a rolling summary of older ones.
+
+    Once the recent turns exceed max_token_limit, the oldest whole turns are
+    folded into the summary, which the prompt caps at a number of words, so
+    the history sent to the condense-question step stays about the same size
+    however long the conversation gets. Tokens are counted with the chat
+    model's tokenizer, so Hebrew turns, which take more tokens per character
+    than English ones, are budgeted correctly.
+    """
+
+    # Used when the summarization model fails, for instance when the local model server is down
+    fallback_llm: Optional[BaseLanguageModel] = None
+    # Seconds the fallback is used directly after llm failed, so later turns do not wait for it to fail again
+    llm_cooldown: float = 0.0
+    llm_unavailable_until: float = 0.0
+
+    def _count_tokens(self, messages: List[BaseMessage]) -> int:
+        # Counted with the chat model's tokenizer, which the history is sent to
+        return sum(count_tokens(get_buffer_string([message]), RAG_CONFIG["llm_model_name"]) for message in messages)
+
+    def _pop_old_turns(self) -> List[BaseMessage]:
+        """Remove the oldest turns until the window fits the budget, always keeping the last turn."""
+        buffer = self.chat_memory.messages
+        pruned = []
+        while len(buffer) > 2 and self._count_tokens(buffer) > self.max_token_limit:
+            # A turn is a question and its answer
+            pruned += buffer[:2]
+            del buffer[:2]
+        return pruned
+
+    def _summary_llms(self) -> List[BaseLanguageModel]:
+        """Models to try in order, skipping llm while it is cooling down after a failure."""
+        llms = [self.fallback_llm]
+        if self.fallback_llm is None or time.monotonic() >= self.llm_unavailable_until:
+            llms.insert(0, self.llm)
+        return [llm for llm in llms if llm is not None]
+
+    def _summary_failed(self, llm: BaseLanguageModel, error: Exception) -> None:
+        print(f"Error summarizing conversation: {str(error)}")
+        if llm is self.llm:
+            self.llm_unavailable_until = time.monotonic() + self.llm_cooldown
+
+    def prune(self) -> None:
+        pruned = self._pop_old_turns()
+        if not pruned:
+            return
+        for llm in self._summary_llms():
+            try:
+                self.moving_summary_buffer = self._summarize(llm, pruned)
+                return
+            except Exception as e:
+                self._summary_failed(llm, e)
+        # Otherwise the turns are dropped unsummarized, the prompt stays bounded either way
+
+    async def aprune(self) -> None:
+        pruned = self._pop_old_turns()
+        if not pruned:
+            return
+        for llm in self._summary_llms():
+            try:
+                self.moving_summary_buffer = await self._asummarize(llm, pruned)
+                return
+            except Exception as e:
+                self._summary_failed(llm, e)
+
+    def _summary_input(self, messages: List[BaseMessage]) -> str:
+        return self.prompt.format(
+            summary=self.moving_summary_buffer,
+            new_lines=get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        )
+
+    @staticmethod
+    def _text(response) -> str:
+        return (getattr(response, "content", response) or "").strip()
+
+    def _summarize(self, llm: BaseLanguageModel, messages: List[BaseMessage]) -> str:
+        return self._text(llm.invoke(self._summary_input(messages)))
+
+    async def _asummarize(self, llm: BaseLanguageModel, messages: List[BaseMessage]) -> str:
+        return self._text(await llm.ainvoke(self._summary_input(messages)))
+
+
+def create_summary_memory(llm_model: Optional[BaseLanguageModel],
+                          fallback_llm_model: Optional[BaseLanguageModel] = None) -> SummaryWindowMemory:
+    """
+    Create the bounded memory of a conversation.
+
+    Args:
+        llm_model: Model summarizing older turns, the local LLM_SUMMARIZATION_MODEL by default
+        fallback_llm_model: Stand-in used when llm_model fails or is not available
+
+    Returns:
+        Memory for ConversationalRetrievalChain, under the chat_history key
+    """
+    prompt = PromptTemplate.from_template(SYSTEM_PROMPTS["conversation_summary"]).partial(
+        max_words=RAG_CONFIG["memory_summary_max_words"]
+    )
+    return SummaryWindowMemory(
+        llm=llm_model or fallback_llm_model,
+        fallback_llm=fallback_llm_model if llm_model else None,
+        llm_cooldown=RAG_CONFIG["summary_llm_cooldown"],
+        prompt=prompt,
+        max_token_limit=RAG_CONFIG["memory_max_tokens"],
+        memory_key="chat_history",
+        return_messages=True
+    )
@@ -1,29 +1,61 @@
 import logging
-from typing import List
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, Tuple
 
 from langchain.docstore.document import Document
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+from langchain_community.document_loaders import PyPDFDirectoryLoader, PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from tqdm import tqdm
 
+from rag.chunk_dedup import MinHashDeduplicator
 from rag.rag_config import RAG_CONFIG
 
 logger = logging.getLogger(__name__)
 
 
+def load_and_split_file(file_path: str, chunk_size: int, chunk_overlap: int) -> Tuple[int, List[Document]]:
+    """
+    Parse a PDF and split it into chunks. Runs in the worker processes of DocumentProcessor.iter_chunks.
+
+    Args:
+        file_path: PDF file, set as the source of the chunks
+        chunk_size: Size of text chunks for splitting
+        chunk_overlap: Overlap between chunks for context preservation
+
+    Returns:
+        Tuple of (number of pages, chunks of the file)
+    """
+    pages = PyPDFLoader(file_path).load()
+    for page in pages:
+        page.metadata["source"] = file_path
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return len(pages), text_splitter.split_documents(pages)
+
+
 class DocumentProcessor:
     def __init__(self,
                  chunk_size: int = None,
-                 chunk_overlap: int = None):
+                 chunk_overlap: int = None,
+                 max_workers: int = None,
+                 dedup_threshold: float = None,
+                 dedup_scope: str = None):
         """
         Initialize the document processor.
 
         Args:
             chunk_size: Size of text chunks for splitting
             chunk_overlap: Overlap between chunks for context preservation
+            max_workers: Processes parsing and splitting PDFs, every core by default, 1 runs in process
+            dedup_threshold: Similarity from which near-duplicate chunks are dropped before embedding, 0 keeps them
+            dedup_scope: "source" to compare the chunks of each file, "run" to compare every chunk processed together
         """
         self.chunk_size = chunk_size or RAG_CONFIG["chunk_size"]
         self.chunk_overlap = chunk_overlap or RAG_CONFIG["chunk_overlap"]
+        self.max_workers = max_workers or RAG_CONFIG["parse_workers"]
+        self.dedup_threshold = RAG_CONFIG["dedup_threshold"] if dedup_threshold is None else dedup_threshold
+        self.dedup_scope = dedup_scope or RAG_CONFIG["dedup_scope"]
         logger.debug(f"Initialized DocumentProcessor with chunk_size={self.chunk_size}, "
                      f"chunk_overlap={self.chunk_overlap}")
 
@@ -39,6 +71,14 @@ class DocumentProcessor:
             print(f"Error loading documents: {str(e)}")
             raise
 
+    @staticmethod
+    def list_files(folder_path: str) -> List[str]:
+        """List the PDFs of a folder the way PyPDFDirectoryLoader does, as source paths."""
+        return sorted(
+            str(path) for path in Path(folder_path).glob("**/[!.]*.pdf")
+            if path.is_file() and not any(part.startswith(".") for part in path.relative_to(folder_path).parts)
+        )
+
     def split_documents(self, documents: List[Document]) -> List[Document]:
         print(f"Splitting {len(documents)} documents into chunks")
         try:
@@ -53,10 +93,72 @@ class DocumentProcessor:
             print(f"Error splitting documents: {str(e)}")
             raise
 
+    def iter_chunks(self, file_paths: List[str]) -> Iterator[Tuple[str, List[Document]]]:
+        """
+        Parse and split PDFs in a process pool, yielding each file's chunks as soon as it is done.
+
+        The caller consumes the chunks of finished files, for instance embedding
+        and uploading them, while the remaining files are still being parsed.
+        Near-duplicate chunks are dropped before they are yielded, so they are
+        never embedded.
+
+        Args:
+            file_paths: PDF files to process
+
+        Yields:
+            Tuple of (file path, chunks of the file), in completion order
+        """
+        start = time.perf_counter()
+        total_pages = total_chunks = 0
+        deduplicators = []
+        if self.max_workers == 1 or len(file_paths) <= 1:
+            results = ((file_path, load_and_split_file(file_path, self.chunk_size, self.chunk_overlap))
+                       for file_path in file_paths)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            futures = {
+                executor.submit(load_and_split_file, file_path, self.chunk_size, self.chunk_overlap): file_path
+                for file_path in file_paths
+            }
+            results = ((futures[future], future.result()) for future in as_completed(futures))
+
+        try:
+            for file_path, (num_pages, chunks) in results:
+                num_chunks = len(chunks)
+                if self.dedup_threshold:
+                    if self.dedup_scope != "run" or not deduplicators:
+                        deduplicators.append(MinHashDeduplicator(self.dedup_threshold))
+                    chunks = deduplicators[-1].filter(chunks)
+                total_pages += num_pages
+                total_chunks += len(chunks)
+                elapsed = time.perf_counter() - start
+                print(f"Parsed {file_path}: {num_pages} pages, {len(chunks)} chunks "
+                      f"({num_chunks - len(chunks)} near-duplicates dropped, {total_pages / elapsed:.1f} pages/sec)")
+                yield file_path, chunks
+        except Exception as e:
+            print(f"Error processing documents: {str(e)}")
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.perf_counter() - start
+        print(f"Processed {len(file_paths)} files, {total_pages} pages into {total_chunks} chunks in "
+              f"{elapsed:.1f}s ({total_pages / elapsed if elapsed else 0:.1f} pages/sec)")
+        if deduplicators:
+            seen = sum(deduplicator.seen for deduplicator in deduplicators)
+            dropped = sum(deduplicator.dropped for deduplicator in deduplicators)
+            seen_chars = sum(deduplicator.seen_chars for deduplicator in deduplicators)
+            dropped_chars = sum(deduplicator.dropped_chars for deduplicator in deduplicators)
+            print(f"Dropped {dropped} of {seen} chunks as near-duplicates, the index shrank by "
+                  f"{dropped / seen if seen else 0:.1%} ({dropped_chars / seen_chars if seen_chars else 0:.1%} of the text)")
+
     def process_documents(self, folder_path: str) -> List[Document]:
-        documents = self.load_documents(folder_path)
-        chunks = self.split_documents(documents)
-        return chunks
+        file_paths = self.list_files(folder_path)
+        chunks_by_file = dict(self.iter_chunks(file_paths))
+        # Same order as a serial run, whatever order the files finished in
+        return [chunk for file_path in file_paths for chunk in chunks_by_file[file_path]]
 
     @staticmethod
     def build_knowledge_base(dataset):
@@ -0,0 +1,116 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+
+def content_key(text: str, model: str) -> str:
+    """Cache key of a text embedded with a model."""
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Local cache of embeddings keyed by content hash.
+
+    Vectors are stored as float32 blobs in SQLite, half the size of the
+    float64 lists returned by the embedding API, and shared by every index
+    run, so unchanged text is never embedded twice.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self._connection.commit()
+
+    def get_many(self, keys: Iterable[str], chunk_size: int = 500) -> Dict[str, List[float]]:
+        """Get the cached embeddings of the given keys. Missing keys are left out."""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), chunk_size):
+                batch = keys[i: i + chunk_size]
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, np.frombuffer(vector, dtype=np.float32).tolist()) for key, vector in rows)
+        return found
+
+    def set_many(self, items: Iterable[Tuple[str, List[float]]]) -> None:
+        """Store (key, embedding) pairs."""
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", rows)
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings whose query embeddings are kept in an in-memory LRU cache.
+
+    A repeated question, from any conversation sharing the vector store, is
+    searched without the embedding round trip. Documents are embedded by the
+    wrapped model as usual.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 1024):
+        """Initialize the cache.
+
+        Args:
+            embeddings: Embedding model to wrap
+            max_entries: Query embeddings kept before evicting the least recently used one
+        """
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return self._cache[text]
+            self.misses += 1
+        embedding = self.embeddings.embed_query(text)
+        with self._lock:
+            self._cache[text] = embedding
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return embedding
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: Optional[str]) -> Optional[EmbeddingCache]:
+    """Get the process-wide cache stored at path, or None if path is not set."""
+    if not path:
+        return None
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = EmbeddingCache(path)
+        return _caches[path]
@@ -1,10 +1,8 @@
-import os
 import random
+import time
 from typing import Tuple, List
 
 import pandas as pd
-from langchain_openai import ChatOpenAI
-
 from tqdm import tqdm
 
 from langchain.docstore.document import Document
@@ -14,9 +12,7 @@ from langchain.prompts.chat import (
 )
 from langchain.schema import SystemMessage
 
-import config
 from rag.document_processor import DocumentProcessor
-import openai
 from dotenv import load_dotenv
 
 from rag.evaluation.prompts import QA_generation_prompt, question_groundedness_critique_prompt, \
@@ -24,7 +20,8 @@ from rag.evaluation.prompts import QA_generation_prompt, question_groundedness_c
 from rag.rag_config import RAG_CONFIG
 from rag.rag_main import RAG
 from rag.vector_store_helper import VectorStoreHelper
-from utils.sql_db import SqlDb
+from utils.sql.sql_db import SqlDb
+from utils.llm.model import get_llm_model
 from config import LLM_RAG_EVAL_MODEL
 
 
@@ -42,7 +39,6 @@ class RagEvaluator:
                  llm_judge_name="GPT4",
                  sql_db=None):
         load_dotenv()
-        openai.api_key = os.getenv("OPENAI_API_KEY")
 
         self.rag = rag
         self.vector_store_helper = vector_store_helper
@@ -50,10 +46,14 @@ class RagEvaluator:
         self.path = path
         self.num_questions = num_questions
         self.document_processor = DocumentProcessor()
-        self.llm_model_name = llm_model_name or config.get("llm_model_name", "")
-        self.llm_judge_model = llm_judge_model or ChatOpenAI(model="gpt-4-1106-preview", temperature=0)
+        self.llm_model_name = llm_model_name or LLM_RAG_EVAL_MODEL
+        self.llm_judge_model = llm_judge_model or get_llm_model(
+            "openai", "gpt-4-1106-preview", feature="rag_evaluation_judge"
+        )
         self.llm_judge_name = llm_judge_name
         self.provider = provider or "openai"
+        # One metered client for all generation and critique calls
+        self.llm = get_llm_model(self.provider.lower(), self.llm_model_name, feature="rag_evaluation", max_tokens=1000)
         self.sql_db = sql_db or SqlDb()
 
     def _process_data(self):
@@ -61,18 +61,9 @@ class RagEvaluator:
         return docs_processed
 
     def call_llm(self, prompt: str):
-        if self.provider.lower() == "openai":
-            client = openai.OpenAI()
-            response = client.chat.completions.create(
-                model=self.llm_model_name,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-            )
-            return response.choices[0].message.content
-        else:
+        if self.llm is None:
             return None
+        return self.llm.invoke(prompt).content
 
     def create_synthetic_evaluation_dataset(self, evaluation_table_name="rag_evaluation_dataset", version=1):
         docs_processed = self._process_data()
@@ -99,6 +90,48 @@ class RagEvaluator:
                                               "Eval Score": faithfulness_score}])
         self.sql_db.upload_table_from_pandas_df(result_table_name, evaluation_result_df)
 
+    def evaluate_retrieval(self,
+                           evaluation_table_name="rag_evaluation_dataset",
+                           version=1,
+                           result_table_name="rag_evaluation_result",
+                           top_k=5):
+        """
+        Compare dense and hybrid retrieval on the evaluation dataset.
+
+        Recall is the share of questions whose source context is among the
+        top_k retrieved chunks, latency the mean retrieval time.
+        """
+        eval_df = pd.read_sql_query(f"select * from {evaluation_table_name} where version={version}",
+                                    self.sql_db.engine)
+        if eval_df.empty:
+            print(f"No evaluation questions in {evaluation_table_name} version {version}")
+            return
+        hybrid_retriever = self.vector_store_helper.get_hybrid_retriever(top_k)
+        retrievers = {
+            "Dense": lambda question: self.vector_store_helper.vector_store.similarity_search(question, k=top_k),
+            "Hybrid": hybrid_retriever.invoke,
+        }
+
+        results = []
+        for name, retrieve in retrievers.items():
+            hits, latencies = 0, []
+            # Every pass embeds its queries, rather than the later ones reusing the earlier ones' embeddings
+            self.vector_store_helper.embedding_helper.query_embeddings.clear()
+            for _, example in tqdm(eval_df.iterrows()):
+                start = time.perf_counter()
+                docs = retrieve(example["question"])
+                latencies.append(time.perf_counter() - start)
+                hits += any(doc.page_content.strip() == example["context"].strip() for doc in docs)
+            results += [
+                {"Eval Dataset Version": version, "Metric": f"{name} Recall@{top_k}",
+                 "Eval Score": hits / len(eval_df)},
+                {"Eval Dataset Version": version, "Metric": f"{name} Mean Latency ms",
+                 "Eval Score": 1000 * sum(latencies) / len(latencies)},
+            ]
+            print(f"{name} retrieval: recall@{top_k} {hits / len(eval_df):.2f}, "
+                  f"mean latency {1000 * sum(latencies) / len(latencies):.1f} ms")
+        self.sql_db.upload_table_from_pandas_df(result_table_name, pd.DataFrame(results))
+
     @staticmethod
     def _filter_dataset(eval_dataset, threshold=3):
         eval_dataset = eval_dataset[
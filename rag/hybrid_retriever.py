@@ -0,0 +1,135 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+from rag.bm25_index import BM25Index
+from rag.rag_embedding_helper import EmbeddingHelper
+from utils.tracing.tracer import start_span
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+
+class CrossEncoderReranker:
+    """Reorders candidate chunks by a small cross-encoder run on the CPU."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def rerank(self, query: str, documents: List[Document]) -> List[Tuple[Document, float]]:
+        if not documents:
+            return []
+        scores = self.model.predict([(query, doc.page_content) for doc in documents])
+        return sorted(zip(documents, map(float, scores)), key=lambda item: item[1], reverse=True)
+
+
+def get_reranker(model_name: Optional[str]) -> Optional[CrossEncoderReranker]:
+    """Create the reranker, or None if no model is set or sentence-transformers is not installed."""
+    if not model_name:
+        return None
+    if CrossEncoder is None:
+        print(f"sentence-transformers is not installed, retrieving without the {model_name} reranker")
+        return None
+    return CrossEncoderReranker(model_name)
+
+
+def _chunk_id(doc: Document) -> str:
+    # Rows of the local stores carry their id, Supabase results are identified by content
+    return doc.id or EmbeddingHelper.document_id(doc)
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Tuple[Document, float]]:
+    """
+    Merge rankings by reciprocal rank fusion.
+
+    A chunk scores sum(1 / (k + rank)) over the rankings it appears in. Chunks
+    are matched by their deterministic id, so the same chunk returned by the
+    vector store and the keyword index counts once.
+
+    Args:
+        rankings: Rankings of chunks, best first
+        k: Damping constant, 60 in the original paper
+
+    Returns:
+        (chunk, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            chunk_id = _chunk_id(doc)
+            documents.setdefault(chunk_id, doc)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (k + rank)
+    return sorted(((documents[chunk_id], score) for chunk_id, score in scores.items()),
+                  key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing dense similarity search with BM25 keyword search.
+
+    Dense search finds paraphrases, keyword search finds exact terms such as
+    road numbers, place names and statistic names. Both rankings are merged by
+    reciprocal rank fusion and the top candidates are optionally reranked.
+    Stage latencies and hit counts are recorded on the "retriever.hybrid" span.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: VectorStore
+    bm25_index: Optional[BM25Index] = None
+    table_name: str = "documents"
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+    reranker: Optional[Any] = None
+    rerank_top_n: int = 20
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query, self.k)]
+
+    def search_with_scores(self, query: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """
+        Retrieve chunks with their fused (or reranker) scores.
+
+        Args:
+            query: Search text
+            k: Number of chunks to return, self.k by default
+
+        Returns:
+            (chunk, score) pairs, best first
+        """
+        k = k or self.k
+        with start_span("retriever.hybrid", {"retriever.query": query, "retriever.k": k}) as span:
+            start = time.perf_counter()
+            dense = self.vector_store.similarity_search(query, k=max(self.fetch_k, k))
+            dense_done = time.perf_counter()
+            keyword = [doc for doc, _ in self.bm25_index.search(self.table_name, query, max(self.fetch_k, k))] \
+                if self.bm25_index is not None else []
+            keyword_done = time.perf_counter()
+
+            fused = reciprocal_rank_fusion([dense, keyword], self.rrf_k)
+            if self.reranker is not None:
+                candidates = fused[:self.rerank_top_n]
+                fused = self.reranker.rerank(query, [doc for doc, _ in candidates]) + fused[self.rerank_top_n:]
+            rerank_done = time.perf_counter()
+
+            dense_ids = {_chunk_id(doc) for doc in dense}
+            span.set_attributes({
+                "retriever.dense_ms": (dense_done - start) * 1000,
+                "retriever.keyword_ms": (keyword_done - dense_done) * 1000,
+                "retriever.rerank_ms": (rerank_done - keyword_done) * 1000,
+                "retriever.dense_hits": len(dense),
+                "retriever.keyword_hits": len(keyword),
+                "retriever.overlap": sum(_chunk_id(doc) in dense_ids for doc in keyword),
+                "retriever.reranked": self.reranker is not None,
+            })
+            return fused[:k]
@@ -0,0 +1,114 @@
+import hashlib
+import os
+from typing import Dict, List, Tuple
+
+from rag.document_processor import DocumentProcessor
+from rag.vector_store_helper import VectorStoreHelper
+
+Fingerprint = Tuple[float, int, str]
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """Hash a file's content without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IncrementalIndexer:
+    """Indexes a folder of PDFs, processing only the files changed since the last run.
+
+    Each indexed file is fingerprinted by mtime, size and content hash in the
+    manifest of the vector store's IndexState. A file whose mtime and size are
+    unchanged is not read at all; a file that was only touched keeps its
+    vectors. New and modified files are parsed, split and embedded, and the
+    vectors of removed files are deleted.
+    """
+
+    def __init__(self, document_processor: DocumentProcessor, vector_store_helper: VectorStoreHelper):
+        """
+        Initialize the indexer.
+
+        Args:
+            document_processor: Lists, parses and splits the PDFs
+            vector_store_helper: Stores the chunks, its IndexState holds the manifest
+        """
+        self.document_processor = document_processor
+        self.vector_store_helper = vector_store_helper
+        self.index_state = vector_store_helper.index_state
+
+    def scan(self, folder_path: str, table_name: str) -> Tuple[Dict[str, Fingerprint], List[str], Dict[str, Fingerprint]]:
+        """
+        Compare a folder to the manifest.
+
+        Args:
+            folder_path: Folder of PDFs
+            table_name: Vector table the folder is indexed in
+
+        Returns:
+            Tuple of (fingerprints of new and modified files, removed files,
+            fingerprints of touched files whose content is unchanged)
+        """
+        manifest = self.index_state.files(table_name)
+        changed, touched = {}, {}
+        files = self.document_processor.list_files(folder_path)
+        for file_path in files:
+            stat = os.stat(file_path)
+            indexed = manifest.get(file_path)
+            if indexed and indexed[0] == stat.st_mtime and indexed[1] == stat.st_size:
+                continue
+            fingerprint = (stat.st_mtime, stat.st_size, file_sha256(file_path))
+            if indexed and indexed[2] == fingerprint[2]:
+                touched[file_path] = fingerprint
+            else:
+                changed[file_path] = fingerprint
+        removed = sorted(set(manifest) - set(files))
+        return changed, removed, touched
+
+    def index_folder(self, folder_path: str, table_name: str = "documents", batch_size: int = 100) -> None:
+        """
+        Bring a vector table up to date with a folder of PDFs.
+
+        Args:
+            folder_path: Folder of PDFs
+            table_name: Vector table to index in
+            batch_size: Chunks embedded and uploaded at a time
+        """
+        changed, removed, touched = self.scan(folder_path, table_name)
+        print(f"Indexing {folder_path}: {len(changed)} new or modified, {len(removed)} removed, "
+              f"{len(touched)} touched without changes")
+
+        if removed:
+            self.vector_store_helper.remove_sources(removed, table_name=table_name)
+            self.index_state.remove_files(table_name, removed)
+
+        if changed:
+            self._index_files(list(changed), table_name, batch_size)
+
+        # Recorded last, so files of an interrupted run are processed again
+        self.index_state.set_files(table_name, {**changed, **touched})
+
+    def _index_files(self, file_paths: List[str], table_name: str, batch_size: int) -> None:
+        """
+        Embed and upload the chunks of files while the process pool is still parsing the others.
+
+        Chunks of finished files are stored once at least batch_size of them are
+        pending, always with all chunks of a file, which embed_and_store needs
+        to delete the file's stale chunks.
+        """
+        pending, empty = [], []
+        for file_path, chunks in self.document_processor.iter_chunks(file_paths):
+            if not chunks:
+                # Modified files that no longer produce any chunk keep no vectors
+                empty.append(file_path)
+                continue
+            pending.extend(chunks)
+            if len(pending) >= batch_size:
+                self.vector_store_helper.embed_and_store(pending, table_name=table_name, batch_size=batch_size)
+                pending = []
+        if pending:
+            self.vector_store_helper.embed_and_store(pending, table_name=table_name, batch_size=batch_size)
+        if empty:
+            self.vector_store_helper.remove_sources(empty, table_name=table_name)
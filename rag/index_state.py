@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, Set, Tuple
+
+
+class IndexState:
+    """Local record of the chunks indexed in each vector table, by source file.
+
+    It tells which rows of a re-indexed file are no longer produced by it, so
+    they can be deleted from the vector table. It also holds the manifest of
+    indexed files with their fingerprints, used to index only changed files.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the index state.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS indexed_chunks (
+                table_name TEXT,
+                chunk_id TEXT,
+                source TEXT,
+                PRIMARY KEY (table_name, chunk_id)
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS indexed_chunks_source ON indexed_chunks (table_name, source)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS index_versions (table_name TEXT PRIMARY KEY, version INTEGER)"
+        )
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS indexed_files (
+                table_name TEXT,
+                source TEXT,
+                mtime REAL,
+                size INTEGER,
+                sha256 TEXT,
+                PRIMARY KEY (table_name, source)
+            )
+        """)
+        self._connection.commit()
+
+    def chunk_ids(self, table_name: str, sources: Iterable[str]) -> Set[str]:
+        """Get the ids of the chunks indexed from the given sources."""
+        sources = list(sources)
+        if not sources:
+            return set()
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT chunk_id FROM indexed_chunks WHERE table_name = ? "
+                f"AND source IN ({','.join('?' * len(sources))})",
+                [table_name, *sources]
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def add_chunks(self, table_name: str, chunks: Iterable[Tuple[str, str]]) -> None:
+        """Record (chunk id, source) pairs as indexed."""
+        with self._lock:
+            changes = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO indexed_chunks VALUES (?, ?, ?)",
+                [(table_name, chunk_id, source) for chunk_id, source in chunks]
+            )
+            self._bump_version(table_name, self._connection.total_changes > changes)
+            self._connection.commit()
+
+    def remove_chunks(self, table_name: str, chunk_ids: Iterable[str]) -> None:
+        with self._lock:
+            changes = self._connection.total_changes
+            self._connection.executemany(
+                "DELETE FROM indexed_chunks WHERE table_name = ? AND chunk_id = ?",
+                [(table_name, chunk_id) for chunk_id in chunk_ids]
+            )
+            self._bump_version(table_name, self._connection.total_changes > changes)
+            self._connection.commit()
+
+    def _bump_version(self, table_name: str, changed: bool) -> None:
+        if changed:
+            self._connection.execute(
+                "INSERT INTO index_versions VALUES (?, 1) "
+                "ON CONFLICT (table_name) DO UPDATE SET version = version + 1",
+                (table_name,)
+            )
+
+    def version(self, table_name: str) -> int:
+        """Version of a table's index, incremented whenever chunks are added or removed.
+
+        It is read from the database, so changes made by an indexing process are
+        seen by the application's processes.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version FROM index_versions WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def files(self, table_name: str) -> Dict[str, Tuple[float, int, str]]:
+        """Get the manifest of a table: (mtime, size, sha256) by indexed source file."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT source, mtime, size, sha256 FROM indexed_files WHERE table_name = ?", (table_name,)
+            ).fetchall()
+        return {source: (mtime, size, sha256) for source, mtime, size, sha256 in rows}
+
+    def set_files(self, table_name: str, files: Dict[str, Tuple[float, int, str]]) -> None:
+        """Record the fingerprints of indexed source files."""
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO indexed_files VALUES (?, ?, ?, ?, ?)",
+                [(table_name, source, *fingerprint) for source, fingerprint in files.items()]
+            )
+            self._connection.commit()
+
+    def remove_files(self, table_name: str, sources: Iterable[str]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM indexed_files WHERE table_name = ? AND source = ?",
+                [(table_name, source) for source in sources]
+            )
+            self._connection.commit()
@@ -0,0 +1,406 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain.embeddings.base import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store persisted in a folder, an offline alternative to Supabase.
+
+    Embeddings are normalized and appended to a float32 file that is memory
+    mapped for search, so scores are cosine similarities like those of
+    Supabase's match_documents. Contents and metadata are kept in SQLite, keyed
+    by the row position in the matrix. Deleted rows are masked out and the
+    matrix is compacted once most of it is dead.
+
+    Search is exact, by NumPy dot products over blocks of rows, unless an IVF
+    index is enabled: the rows are then clustered by k-means and a query only
+    scans the rows of its nprobe nearest clusters.
+
+    One process writes the store at a time, for instance an indexing run,
+    while other processes search it. Every change increments a version kept
+    in SQLite, and a searching process reloads the store when the version
+    changed. Compaction writes a new generation of the matrix file, so a
+    process still mapping the previous one keeps consistent positions until
+    it reloads.
+    """
+
+    def __init__(self,
+                 path: str,
+                 embedding: Embeddings,
+                 ivf_lists: int = 0,
+                 ivf_nprobe: int = 8,
+                 block_size: int = 65536):
+        """
+        Open or create a store.
+
+        Args:
+            path: Folder of the store
+            embedding: Embedding model for the queries and added texts
+            ivf_lists: Number of IVF clusters, 0 keeps search exact
+            ivf_nprobe: Clusters scanned per query when the IVF index is used
+            block_size: Rows scored at a time by exact search
+        """
+        self.path = path
+        self._embedding = embedding
+        self.ivf_lists = ivf_lists
+        self.ivf_nprobe = ivf_nprobe
+        self.block_size = block_size
+        self._lock = threading.RLock()
+
+        os.makedirs(path, exist_ok=True)
+        self._meta_file = os.path.join(path, "meta.json")
+        self._centroids_file = os.path.join(path, "ivf_centroids.npy")
+        self._assignments_file = os.path.join(path, "ivf_assignments.npy")
+
+        self._connection = sqlite3.connect(os.path.join(path, "rows.sqlite"), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rows (position INTEGER PRIMARY KEY, id TEXT UNIQUE, content TEXT, metadata TEXT)"
+        )
+        self._connection.execute("CREATE TABLE IF NOT EXISTS store_state (key TEXT PRIMARY KEY, value INTEGER)")
+        self._connection.commit()
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def _state(self, key: str) -> int:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM store_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_state(self, key: str, value: int) -> None:
+        self._connection.execute(
+            "INSERT INTO store_state VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, value)
+        )
+
+    def _bump_version(self) -> None:
+        """Record a change for the other processes, committed with the change itself."""
+        self._version = self._state("version") + 1
+        self._set_state("version", self._version)
+
+    def _refresh(self) -> int:
+        """Reload the store if another process changed it, returning the version in use."""
+        with self._lock:
+            if self._state("version") != self._version:
+                self._load()
+            return self._version
+
+    @property
+    def _vectors_file(self) -> str:
+        # Every compaction writes a new generation of the matrix
+        return os.path.join(self.path, f"vectors.{self._generation}.f32" if self._generation else "vectors.f32")
+
+    def _load(self) -> None:
+        # Read first, so a change made while loading is seen by the next _refresh
+        self._version = self._state("version")
+        self._generation = self._state("generation")
+        self._meta = {"dim": None, "indexed_rows": 0}
+        if os.path.exists(self._meta_file):
+            with open(self._meta_file) as f:
+                self._meta.update(json.load(f))
+        self._map_vectors()
+
+        positions = [row[0] for row in self._connection.execute("SELECT position FROM rows")]
+        self._alive = np.zeros(len(self._vectors), dtype=bool)
+        self._alive[positions] = True
+
+        self._centroids = self._assignments = None
+        if self.ivf_lists and os.path.exists(self._centroids_file):
+            self._centroids = np.load(self._centroids_file)
+            self._assignments = np.load(self._assignments_file)
+
+    def _map_vectors(self) -> None:
+        dim = self._meta["dim"]
+        if dim and os.path.exists(self._vectors_file) and os.path.getsize(self._vectors_file):
+            self._vectors = np.memmap(self._vectors_file, dtype=np.float32, mode="r").reshape(-1, dim)
+        else:
+            self._vectors = np.zeros((0, dim or 0), dtype=np.float32)
+
+    def _save_meta(self) -> None:
+        with open(self._meta_file, "w") as f:
+            json.dump(self._meta, f)
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def existing_ids(self, ids: Iterable[str], chunk_size: int = 500) -> Set[str]:
+        """Get the ids among the given ones that are stored."""
+        ids = list(ids)
+        found = set()
+        with self._lock:
+            for i in range(0, len(ids), chunk_size):
+                batch = ids[i: i + chunk_size]
+                rows = self._connection.execute(
+                    f"SELECT id FROM rows WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def add_rows(self,
+                 ids: List[str],
+                 contents: List[str],
+                 embeddings: List[List[float]],
+                 metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Store embedded rows, replacing the rows with the same ids.
+
+        Args:
+            ids: Row ids
+            contents: Texts of the rows
+            embeddings: Embeddings of the texts
+            metadatas: Metadata of the rows
+        """
+        if not ids:
+            return
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            if self._meta["dim"] is None:
+                self._meta["dim"] = vectors.shape[1]
+                self._save_meta()
+            elif vectors.shape[1] != self._meta["dim"]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the store's {self._meta['dim']}")
+
+            self._delete_rows(ids)
+            start = len(self._vectors)
+            with open(self._vectors_file, "ab") as f:
+                f.write(vectors.tobytes())
+            self._connection.executemany(
+                "INSERT INTO rows VALUES (?, ?, ?, ?)",
+                [(start + i, row_id, content, json.dumps(metadata, ensure_ascii=False, default=str))
+                 for i, (row_id, content, metadata) in enumerate(zip(ids, contents, metadatas))]
+            )
+            self._bump_version()
+            self._connection.commit()
+            self._map_vectors()
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+
+            if self._centroids is not None:
+                self._assignments = np.concatenate([self._assignments, self._assign(vectors)])
+                np.save(self._assignments_file, self._assignments)
+            if self.ivf_lists and len(self) >= 2 * max(self._meta["indexed_rows"], self.ivf_lists * 39):
+                # Clusters are trained again whenever the corpus doubled since the last training
+                self.build_index()
+
+    def _delete_rows(self, ids: List[str], chunk_size: int = 500) -> int:
+        positions = []
+        for i in range(0, len(ids), chunk_size):
+            batch = ids[i: i + chunk_size]
+            placeholders = ",".join("?" * len(batch))
+            positions += [row[0] for row in self._connection.execute(
+                f"SELECT position FROM rows WHERE id IN ({placeholders})", batch
+            )]
+            self._connection.execute(f"DELETE FROM rows WHERE id IN ({placeholders})", batch)
+        if positions:
+            self._bump_version()
+        self._connection.commit()
+        self._alive[positions] = False
+        return len(positions)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete rows by id, compacting the matrix once more than half of it is deleted."""
+        if not ids:
+            return False
+        with self._lock:
+            deleted = self._delete_rows(list(ids))
+            if len(self._alive) > 1000 and self._alive.sum() < len(self._alive) / 2:
+                self.compact()
+        return deleted > 0
+
+    def compact(self) -> None:
+        """Rewrite the matrix without its deleted rows."""
+        with self._lock:
+            keep = np.flatnonzero(self._alive)
+            old_file = self._vectors_file
+            self._generation += 1
+            np.ascontiguousarray(self._vectors[keep]).tofile(self._vectors_file)
+            if self._centroids is not None:
+                self._assignments = self._assignments[keep]
+                np.save(self._assignments_file, self._assignments)
+            # Rows keep their order, so no new position collides with a row not moved yet
+            self._connection.executemany(
+                "UPDATE rows SET position = ? WHERE position = ?",
+                [(new, int(old)) for new, old in enumerate(keep) if new != old]
+            )
+            # The new positions and the matrix they refer to become visible together
+            self._set_state("generation", self._generation)
+            self._bump_version()
+            self._connection.commit()
+            self._map_vectors()
+            self._alive = np.ones(len(keep), dtype=bool)
+            try:
+                # Processes still mapping the old matrix keep reading it until they reload
+                os.remove(old_file)
+            except OSError as e:
+                print(f"Could not remove {old_file}: {str(e)}")
+
+    def build_index(self, iterations: int = 10, sample_size: int = 256) -> None:
+        """
+        Train the IVF clusters by spherical k-means and assign every row to one.
+
+        Args:
+            iterations: k-means iterations
+            sample_size: Training rows per cluster
+        """
+        with self._lock:
+            alive = np.flatnonzero(self._alive)
+            n_lists = min(self.ivf_lists, len(alive))
+            if n_lists == 0:
+                return
+            rng = np.random.default_rng(0)
+            sample = self._vectors[np.sort(rng.choice(alive, min(len(alive), n_lists * sample_size), replace=False))]
+            centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for cluster in range(n_lists):
+                    members = sample[labels == cluster]
+                    if len(members):
+                        centroids[cluster] = members.sum(axis=0)
+                centroids = self._normalize(centroids)
+
+            self._centroids = centroids.astype(np.float32)
+            self._assignments = np.concatenate([
+                self._assign(self._vectors[i: i + self.block_size]) for i in range(0, len(self._vectors), self.block_size)
+            ])
+            np.save(self._centroids_file, self._centroids)
+            np.save(self._assignments_file, self._assignments)
+            self._meta["indexed_rows"] = len(alive)
+            self._save_meta()
+            # Other processes load the new clusters
+            self._bump_version()
+            self._connection.commit()
+            print(f"Built IVF index of {n_lists} clusters over {len(alive)} rows")
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def search_vectors(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """
+        Find the rows most similar to each query.
+
+        Args:
+            queries: Query embeddings, one per row
+            k: Number of rows per query
+
+        Returns:
+            (position, cosine similarity) pairs per query, most similar first
+        """
+        queries = self._normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        with self._lock:
+            vectors, alive = self._vectors, self._alive
+            centroids, assignments = self._centroids, self._assignments
+        if not alive.any():
+            return [[] for _ in queries]
+
+        if centroids is not None:
+            return [self._search_ivf(query, k, vectors, alive, centroids, assignments) for query in queries]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_positions = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(vectors), self.block_size):
+            block_scores = queries @ vectors[start: start + self.block_size].T
+            block_scores[:, ~alive[start: start + self.block_size]] = -np.inf
+            scores = np.concatenate([best_scores, block_scores], axis=1)
+            positions = np.concatenate(
+                [best_positions, np.broadcast_to(np.arange(start, start + block_scores.shape[1]), block_scores.shape)],
+                axis=1
+            )
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+                positions = np.take_along_axis(positions, top, axis=1)
+            best_scores, best_positions = scores, positions
+
+        results = []
+        for scores, positions in zip(best_scores, best_positions):
+            order = np.argsort(-scores)
+            results.append([(int(positions[i]), float(scores[i])) for i in order if np.isfinite(scores[i])])
+        return results
+
+    def _search_ivf(self, query, k, vectors, alive, centroids, assignments) -> List[Tuple[int, float]]:
+        probes = np.argsort(-(centroids @ query))[:self.ivf_nprobe]
+        candidates = np.flatnonzero(np.isin(assignments, probes) & alive[:len(assignments)])
+        if len(candidates) == 0:
+            return []
+        scores = vectors[candidates] @ query
+        top = np.argsort(-scores)[:k]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def _documents(self, results: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        if not results:
+            return []
+        positions = [position for position, _ in results]
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT position, id, content, metadata FROM rows WHERE position IN ({','.join('?' * len(positions))})",
+                positions
+            ).fetchall()
+        by_position = {position: (row_id, content, metadata) for position, row_id, content, metadata in rows}
+        return [
+            (Document(id=by_position[position][0], page_content=by_position[position][1],
+                      metadata=json.loads(by_position[position][2])), score)
+            for position, score in results if position in by_position
+        ]
+
+    def add_texts(self,
+                  texts: Iterable[str],
+                  metadatas: Optional[List[dict]] = None,
+                  *,
+                  ids: Optional[List[str]] = None,
+                  **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.add_rows(ids, texts, self._embedding.embed_documents(texts), metadatas or [{} for _ in texts])
+        return ids
+
+    def similarity_search_with_score_by_vector(self,
+                                               embedding: List[float],
+                                               k: int = 4,
+                                               **kwargs: Any) -> List[Tuple[Document, float]]:
+        for _ in range(3):
+            version = self._refresh()
+            documents = self._documents(self.search_vectors(np.asarray([embedding]), k)[0])
+            # Positions are only meaningful for the version they were searched in
+            if self._state("version") == version:
+                break
+        return documents
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls,
+                   texts: List[str],
+                   embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None,
+                   *,
+                   ids: Optional[List[str]] = None,
+                   path: str = "vector_store",
+                   **kwargs: Any) -> "LocalVectorStore":
+        store = cls(path, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -5,25 +5,69 @@ try:
 except ImportError:
     LLM_MODEL = "gpt-4o"  # Default fallback
 
+try:
+    from config import LLM_SUMMARIZATION_MODEL
+except ImportError:
+    LLM_SUMMARIZATION_MODEL = "llama3.2:1b-instruct-q2_K"  # Default fallback
+
 # RAG system configuration
 RAG_CONFIG: Dict[str, Any] = {
     # Document processing
     "chunk_size": 1000,
     "chunk_overlap": 200,
+    "dedup_threshold": 0.8,  # estimated similarity from which near-duplicate chunks are dropped, 0 keeps them
+    # "source" compares the chunks of each file, "run" every chunk indexed together, which also drops
+    # boilerplate shared by files, but a file keeps missing those chunks if the file holding them is removed
+    "dedup_scope": "source",
 
     # Retrieval
     "top_k": 5,
+    "retrieval_mode": "hybrid",  # "dense" for similarity search only, "hybrid" to fuse it with BM25
+    "hybrid_fetch_k": 20,  # candidates taken from each of the dense and keyword searches
+    "rrf_k": 60,  # reciprocal rank fusion damping constant
+    "reranker_model": None,  # cross-encoder reranking the fused candidates, needs sentence-transformers
+    "rerank_top_n": 20,  # fused candidates passed to the reranker
+    "query_embedding_cache_size": 1024,  # query embeddings kept in memory
+    "retrieval_cache_size": 1024,  # retrieval results kept in memory
+    "retrieval_cache_bits": 128,  # random hyperplanes of the query embedding bucket, more bits make buckets narrower
 
     # Models
     "embedding_model_name": "openai",
     "llm_provider": "openai",
     "llm_model_name": LLM_MODEL,
 
+    # Answering
+    "answer_max_retries": 2,  # retries of a failed answer
+    "answer_deadline": 30,  # seconds an answer may take, retries included
+    "answer_backoff_base": 0.5,  # seconds before the first retry, doubled on every retry
+    "answer_backoff_max": 4,
+
+    # Conversation memory
+    "memory_max_tokens": 1000,  # tokens of recent turns kept verbatim, older turns are summarized
+    "memory_summary_max_words": 150,
+    "summary_llm_provider": "ollama",
+    "summary_llm_model_name": LLM_SUMMARIZATION_MODEL,
+    "summary_fallback_llm_model_name": "gpt-4o-mini",  # stand-in used when the local model fails
+    "summary_llm_cooldown": 300,  # seconds the fallback is used directly after the local model failed
+
     # Database
-    "db_name": "supabase",
+    "db_name": "supabase",  # "supabase", or "local" for the in-process LocalVectorStore
+    "local_store_path": "vector_store",  # folder of the local store, one subfolder per table
+    "local_ivf_lists": 0,  # IVF clusters of the local store, 0 keeps search exact
+    "local_ivf_nprobe": 8,  # clusters scanned per query when IVF is enabled
 
     # Processing
     "batch_size": 100,
+    "parse_workers": None,  # processes parsing and splitting PDFs, None uses every core
+    "embedding_concurrency": 4,  # embedding requests in flight
+    "embedding_batch_tokens": 100000,  # estimated tokens per embedding request, below the provider's limit
+    "embedding_max_retries": 6,  # retries of a rate limited embedding request, with exponential backoff
+    "upload_batch_size": 500,  # rows written to the vector table at a time
+
+    # Local indexing state
+    "embedding_cache_path": "embedding_cache.sqlite",  # float32 embeddings by content hash, None disables
+    "index_state_path": "rag_index.sqlite",  # chunk ids indexed per source file
+    "bm25_index_path": "bm25_index.sqlite",  # keyword index kept alongside the vector index
 
     # Table names
     "documents_table": "documents",
@@ -35,5 +79,16 @@ SYSTEM_PROMPTS = {
 car accidents. Your task is to read through a provided text (extracted from PDF files) and generate a concise summary 
 of the specified text, focusing only on relevant information for understanding accident trends. 
 Don't add any details that are not specified directly in the text itself.
-"""
+""",
+    "conversation_summary": """Progressively summarize the lines of a conversation about car accidents, adding onto 
+the previous summary and returning a new summary of at most {max_words} words. Keep the places, roads, years, 
+statistics and questions the user asked about. Return only the summary.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
 }
\ No newline at end of file
@@ -1,11 +1,54 @@
+import asyncio
 import logging
-from typing import  Optional
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
 
 from langchain.chains.conversational_retrieval.base import ConversationalRetrievalChain, \
     BaseConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
+from langchain.memory.chat_memory import BaseChatMemory
 from langchain.schema.language_model import BaseLanguageModel
-import time
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.retrievers import BaseRetriever
+
+from rag.rag_config import RAG_CONFIG
+from utils.tracing.tracer import run_in_context
+
+
+class _TokenQueueHandler(BaseCallbackHandler):
+    """Callback handler forwarding streamed LLM tokens to a queue."""
+
+    # Called on the event loop of the async chain, keeping the tokens in order
+    run_inline = True
+
+    def __init__(self, token_queue: queue.Queue):
+        self.token_queue = token_queue
+        self.streamed = False
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if token:
+            self.streamed = True
+            self.token_queue.put(token)
+
+
+@dataclass
+class AnswerResult:
+    """Outcome of answering a question."""
+
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    # "timeout" past the answer deadline, "cancelled" by a newer question, or "failed" after the retries
+    error_type: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error_type is None
+
 
 class RAGConversation:
     """
@@ -15,30 +58,38 @@ class RAGConversation:
     def __init__(self,
                  retriever,
                  llm_model: BaseLanguageModel,
-                 memory: Optional[ConversationBufferMemory] = None):
+                 memory: Optional[BaseChatMemory] = None,
+                 streaming_llm_model: Optional[BaseLanguageModel] = None):
         """
         Initialize the RAG conversation manager.
 
         Args:
-            retriever: Document retriever to use for finding relevant context
+            retriever: Document retriever to use for finding relevant context, or a vector store to search
             llm_model: Language model to use for answering questions
-            memory: Memory instance to maintain conversation history
+            memory: Memory instance to maintain conversation history, a full buffer by default
+            streaming_llm_model: Streaming language model used for the final answer, so tokens
+                can be shown as they are generated. The question condensing step keeps using llm_model.
         """
         self.retriever = retriever
         self.llm_model = llm_model
+        self.streaming_llm_model = streaming_llm_model
         self.memory = memory or ConversationBufferMemory(
             memory_key='chat_history',
             return_messages=True
         )
 
         self.conversation_chain = self._setup_conversation_chain()
+        # Answer in progress, cancelled when a new question comes in
+        self._active_task: Optional[asyncio.Task] = None
+        self._task_lock = threading.Lock()
         print("Initialized RAGConversation with retriever and LLM")
 
     def _setup_conversation_chain(self) -> BaseConversationalRetrievalChain:
         try:
             chain = ConversationalRetrievalChain.from_llm(
-                llm=self.llm_model,
-                retriever=self.retriever.as_retriever(),
+                llm=self.streaming_llm_model or self.llm_model,
+                condense_question_llm=self.llm_model,
+                retriever=self.retriever if isinstance(self.retriever, BaseRetriever) else self.retriever.as_retriever(),
                 memory=self.memory
             )
             return chain
@@ -46,15 +97,132 @@ class RAGConversation:
             print(f"Error setting up conversation chain: {str(e)}")
             raise
 
-    def answer_question(self, question: str, retry=3) -> str:
-        for i in range(retry):
+    async def aanswer_question(self, question: str) -> AnswerResult:
+        """
+        Answer a question without blocking the calling thread.
+
+        Failed attempts are retried with exponential backoff and jitter within
+        a total deadline. A new question on this conversation cancels the
+        answer still in progress.
+
+        Args:
+            question: The user's question
+
+        Returns:
+            The answer, or the typed error that prevented it
+        """
+        return await self._answer(question)
+
+    async def _answer(self,
+                      question: str,
+                      callbacks: Optional[List[BaseCallbackHandler]] = None,
+                      can_retry: Callable[[], bool] = lambda: True) -> AnswerResult:
+        task = asyncio.current_task()
+        with self._task_lock:
+            previous, self._active_task = self._active_task, task
+        if previous is not None and not previous.done():
+            # The user moved on to a new message
+            previous.get_loop().call_soon_threadsafe(previous.cancel)
+
+        max_retries = RAG_CONFIG["answer_max_retries"]
+        deadline = time.monotonic() + RAG_CONFIG["answer_deadline"]
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    result = await asyncio.wait_for(
+                        self.conversation_chain.ainvoke({"question": question}, config={"callbacks": callbacks}),
+                        timeout=deadline - time.monotonic()
+                    )
+                    return AnswerResult(answer=result.get("answer", "No answer found."), attempts=attempt)
+                except asyncio.TimeoutError:
+                    return AnswerResult(error="The answer took too long", error_type="timeout", attempts=attempt)
+                except Exception as e:
+                    print(f"Error answering question (attempt {attempt}): {str(e)}")
+                    delay = min(RAG_CONFIG["answer_backoff_max"], RAG_CONFIG["answer_backoff_base"] * 2 ** (attempt - 1))
+                    delay *= 0.5 + random.random()
+                    if attempt > max_retries or not can_retry() or time.monotonic() + delay >= deadline:
+                        return AnswerResult(error=str(e), error_type="failed", attempts=attempt)
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return AnswerResult(error="Cancelled by a newer question", error_type="cancelled", attempts=attempt)
+        finally:
+            with self._task_lock:
+                if self._active_task is task:
+                    self._active_task = None
+
+    def answer_question(self, question: str) -> str:
+        """
+        Answer a question, blocking until the answer or a typed error is ready.
+
+        Args:
+            question: The user's question
+
+        Returns:
+            The answer, or a message describing the error
+        """
+        result = asyncio.run(self.aanswer_question(question))
+        if result.ok:
+            print("Question answered successfully")
+            return result.answer
+        return f"I encountered an error while processing your question: {result.error}"
+
+    def stream_answer(self, question: str) -> Iterator[str]:
+        """
+        Answer a question, yielding the answer tokens as they are generated.
+
+        The answer runs on an event loop in a worker thread while tokens are
+        forwarded through a queue, so the caller can render them incrementally.
+        Failures are retried as in aanswer_question until the first token is
+        shown. If the caller stops reading, for instance because a Streamlit
+        rerun replaced the request, the answer is cancelled.
+
+        Args:
+            question: The user's question
+
+        Yields:
+            Chunks of the answer text
+        """
+        token_queue: queue.Queue = queue.Queue()
+        done = object()
+        handler = _TokenQueueHandler(token_queue)
+        result = {}
+        loop = asyncio.new_event_loop()
+
+        async def run_answer():
+            try:
+                result["result"] = await self._answer(question, [handler], can_retry=lambda: not handler.streamed)
+            finally:
+                token_queue.put(done)
+
+        task = loop.create_task(run_answer())
+
+        def run_loop():
             try:
-                result = self.conversation_chain({"question": question})
-                answer = result.get("answer", "No answer found.")
-                print(f"Question answered successfully")
-                return answer
-            except Exception as e:
-                print(f"Error answering question: {str(e)}")
-                error_msg = f"I encountered an error while processing your question: {str(e)}"
-                print(error_msg)
-                time.sleep(10)
\ No newline at end of file
+                loop.run_until_complete(task)
+            finally:
+                loop.close()
+
+        # The worker keeps the caller's current span, so its LLM calls join the request trace
+        worker = threading.Thread(target=run_in_context(run_loop), daemon=True)
+        worker.start()
+
+        try:
+            while (token := token_queue.get()) is not done:
+                yield token
+        finally:
+            if worker.is_alive():
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    # The loop closed in the meantime
+                    pass
+
+        answer = result["result"]
+        if not answer.ok:
+            print(f"Error answering question: {answer.error}")
+            yield f"I encountered an error while processing your question: {answer.error}"
+        elif not handler.streamed:
+            # The model did not stream, return the whole answer at once
+            yield answer.answer
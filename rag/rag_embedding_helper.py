@@ -1,19 +1,50 @@
+import hashlib
+import random
+import time
 import uuid
 from typing import List, Dict, Any
 
+import openai
 from langchain.docstore.document import Document
 from langchain.embeddings.base import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
+from rag.embedding_cache import CachedQueryEmbeddings, EmbeddingCache, content_key, get_embedding_cache
 from rag.rag_config import RAG_CONFIG
 
 
 class EmbeddingHelper:
-    def __init__(self, embedding_model_name: str = None):
+    def __init__(self, embedding_model_name: str = None, cache: EmbeddingCache = None):
         self.embedding_model_name = embedding_model_name or RAG_CONFIG["embedding_model_name"]
         self.embedding_model = self._get_embedding_model()
+        self.cache = cache or get_embedding_cache(RAG_CONFIG["embedding_cache_path"])
+        # Used by the vector stores to embed search queries
+        self.query_embeddings = CachedQueryEmbeddings(self.embedding_model, RAG_CONFIG["query_embedding_cache_size"])
         print(f"Initialized EmbeddingManager with model: {self.embedding_model_name}")
 
+    @property
+    def model_id(self) -> str:
+        """Identifier of the embedding model, part of the embedding cache key."""
+        return getattr(self.embedding_model, "model", None) or self.embedding_model_name
+
+    @staticmethod
+    def document_id(document: Document) -> str:
+        """Deterministic id of a chunk, derived from its source and content.
+
+        Re-indexing an unchanged chunk gives the same id, so it is recognized
+        as already stored instead of being added again.
+        """
+        content_hash = hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document.metadata.get('source', '')}#{content_hash}"))
+
+    @staticmethod
+    def is_document_id(row_id: str) -> bool:
+        """Whether a stored row id was produced by document_id, rather than randomly by earlier versions."""
+        try:
+            return uuid.UUID(str(row_id)).version == 5
+        except ValueError:
+            return False
+
     def _get_embedding_model(self) -> Embeddings:
         try:
             if self.embedding_model_name.lower() == "openai":
@@ -32,7 +63,7 @@ class EmbeddingHelper:
         contents = [doc.page_content for doc in documents]
         metadata = [doc.metadata for doc in documents]
         embeddings = self.compute_embeddings(contents)
-        ids = [str(uuid.uuid4()) for _ in range(len(contents))]
+        ids = [self.document_id(doc) for doc in documents]
 
         return {
             "ids": ids,
@@ -41,5 +72,39 @@ class EmbeddingHelper:
             "metadata": metadata
         }
 
+    def _embed_with_backoff(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, retrying rate limited requests with exponential backoff and jitter.
+
+        The Retry-After header of a 429 response is honored when it asks for a longer wait.
+        """
+        max_retries = RAG_CONFIG["embedding_max_retries"]
+        for attempt in range(max_retries + 1):
+            try:
+                return self.embedding_model.embed_documents(texts)
+            except openai.RateLimitError as e:
+                if attempt == max_retries:
+                    raise
+                delay = min(2 ** attempt, 60) * (0.5 + random.random())
+                retry_after = e.response.headers.get("retry-after") if e.response is not None else None
+                if retry_after and retry_after.replace(".", "", 1).isdigit():
+                    delay = max(delay, float(retry_after))
+                print(f"Embedding request rate limited, retrying in {delay:.1f}s "
+                      f"({attempt + 1}/{max_retries})")
+                time.sleep(delay)
+
     def compute_embeddings(self, content):
-        return self.embedding_model.embed_documents(content)
\ No newline at end of file
+        """Embed texts, reusing cached embeddings and embedding only the texts not seen before."""
+        if self.cache is None:
+            return self._embed_with_backoff(content)
+
+        keys = [content_key(text, self.model_id) for text in content]
+        embeddings = self.cache.get_many(set(keys))
+        missing = list({key: text for key, text in zip(keys, content) if key not in embeddings}.items())
+        if missing:
+            new_embeddings = self._embed_with_backoff([text for _, text in missing])
+            new_items = [(key, embedding) for (key, _), embedding in zip(missing, new_embeddings)]
+            self.cache.set_many(new_items)
+            embeddings.update(new_items)
+        print(f"Embedded {len(missing)} texts, {len(content) - len(missing)} served from the embedding cache")
+        return [embeddings[key] for key in keys]
\ No newline at end of file
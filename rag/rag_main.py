@@ -1,19 +1,22 @@
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 
 from dotenv import load_dotenv
 
 from config import MAX_LLM_TOKENS
 from rag.utils import count_tokens, shorten_prompt
 from rag.rag_config import RAG_CONFIG
+from rag.conversation_memory import create_summary_memory
 from rag.document_processor import DocumentProcessor
+from rag.incremental_indexer import IncrementalIndexer
 from rag.rag_embedding_helper import EmbeddingHelper
 from rag.vector_store_helper import  VectorStoreHelper
-from rag.rag_conversation import RAGConversation
+from rag.rag_conversation import AnswerResult, RAGConversation
 from utils.llm.model import get_llm_model
+from utils.sql.sql_db import SqlDb
 
 
 class RAG:
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None, sql_db: SqlDb = None):
 
         load_dotenv()
         self.config = config or RAG_CONFIG
@@ -31,33 +34,64 @@ class RAG:
         self.vector_store_manager = VectorStoreHelper(
             db_name=self.config["db_name"],
             embedding_model_name=self.config["embedding_model_name"],
-            table_name=self.config["documents_table"]
+            table_name=self.config["documents_table"],
+            db=sql_db,
+            embedding_helper=self.embedding_helper
         )
 
+        self.indexer = IncrementalIndexer(self.document_processor, self.vector_store_manager)
+
         self.llm_model = get_llm_model(
             provider=self.config["llm_provider"],
-            model_name=self.config["llm_model_name"]
+            model_name=self.config["llm_model_name"],
+            feature="chat"
+        )
+        self.streaming_llm_model = get_llm_model(
+            provider=self.config["llm_provider"],
+            model_name=self.config["llm_model_name"],
+            streaming=True,
+            feature="chat"
+        )
+        # Summarizes the older turns of every conversation, with a hosted stand-in for the local model
+        self.summary_llm_model = get_llm_model(
+            provider=self.config["summary_llm_provider"],
+            model_name=self.config["summary_llm_model_name"],
+            feature="chat_summary"
+        )
+        self.summary_fallback_llm_model = get_llm_model(
+            provider=self.config["llm_provider"],
+            model_name=self.config["summary_fallback_llm_model_name"],
+            feature="chat_summary"
         )
 
-        # Initialize conversation after setting up the vector store
+        # Default conversation, set up on first chat
         self.conversation = None
-        self.setup_conversation()
 
-    def setup_conversation(self):
+    def create_conversation(self) -> RAGConversation:
         """
-        Set up the conversation component with the retriever.
+        Create a conversation with its own bounded memory on the shared retriever and LLMs.
         """
-        retriever = self.vector_store_manager.get_retriever()
-        self.conversation = RAGConversation(
+        retriever = self.vector_store_manager.get_conversation_retriever()
+        return RAGConversation(
             retriever=retriever,
-            llm_model=self.llm_model
+            llm_model=self.llm_model,
+            memory=create_summary_memory(self.summary_llm_model, self.summary_fallback_llm_model),
+            streaming_llm_model=self.streaming_llm_model
         )
 
-    def load_and_index_documents(self, folder_path: str) -> None:
-        chunks = self.document_processor.process_documents(folder_path)
+    def setup_conversation(self):
+        """
+        Set up the default conversation component with the retriever.
+        """
+        self.conversation = self.create_conversation()
 
-        self.vector_store_manager.embed_and_store(
-            chunks,
+    def load_and_index_documents(self, folder_path: str) -> None:
+        """
+        Index the new and modified PDFs of a folder and delete the vectors of removed ones.
+        """
+        self.indexer.index_folder(
+            folder_path,
+            table_name=self.config["documents_table"],
             batch_size=self.config["batch_size"]
         )
 
@@ -65,11 +99,21 @@ class RAG:
         top_k = top_k or self.config["top_k"]
         return self.vector_store_manager.retrieve_similar_documents(query, top_k)
 
-    def chat(self, question: str = "") -> str:
+    def _get_conversation(self, conversation: RAGConversation = None) -> RAGConversation:
+        if conversation:
+            return conversation
         if not self.conversation:
             self.setup_conversation()
+        return self.conversation
+
+    def chat(self, question: str = "", conversation: RAGConversation = None) -> str:
+        return self._get_conversation(conversation).answer_question(question)
+
+    async def achat(self, question: str = "", conversation: RAGConversation = None) -> AnswerResult:
+        return await self._get_conversation(conversation).aanswer_question(question)
 
-        return self.conversation.answer_question(question)
+    def stream_chat(self, question: str = "", conversation: RAGConversation = None) -> Iterator[str]:
+        return self._get_conversation(conversation).stream_answer(question)
 
 
 
@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from utils.tracing.tracer import set_span_attributes
+
+
+class RetrievalCache:
+    """
+    In-memory LRU cache of retrieval results, keyed by a bucket of the query embedding.
+
+    The bucket is the sign pattern of the embedding against fixed random
+    hyperplanes (SimHash). Two queries share a bucket only if their embeddings
+    are nearly identical, so a repeated question, or the same question with
+    the small variations of the embedding API, is answered from the cache.
+    Keys also hold the index version, so results retrieved before the index
+    changed are never served.
+    """
+
+    def __init__(self, max_entries: int = 1024, num_bits: int = 128, seed: int = 0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Results kept before evicting the least recently used one
+            num_bits: Hyperplanes of the bucket, more make buckets narrower
+            seed: Seed of the hyperplanes
+        """
+        self.max_entries = max_entries
+        self.num_bits = num_bits
+        self.seed = seed
+        self.hits = self.misses = 0
+        self._hyperplanes: Dict[int, np.ndarray] = {}
+        self._cache: "OrderedDict[Hashable, List[Document]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket(self, embedding: List[float]) -> bytes:
+        """SimHash of an embedding."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if len(vector) not in self._hyperplanes:
+                rng = np.random.default_rng(self.seed)
+                self._hyperplanes[len(vector)] = rng.standard_normal((self.num_bits, len(vector))).astype(np.float32)
+            hyperplanes = self._hyperplanes[len(vector)]
+        return np.packbits(hyperplanes @ vector > 0).tobytes()
+
+    def get(self, key: Hashable) -> Optional[List[Document]]:
+        with self._lock:
+            documents = self._cache.get(key)
+            if documents is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+        return list(documents)
+
+    def set(self, key: Hashable, documents: List[Document]) -> None:
+        with self._lock:
+            self._cache[key] = list(documents)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Retriever serving repeated queries from a RetrievalCache.
+
+    The query is embedded with the vector store's query embeddings, whose own
+    LRU cache makes a repeated question free, and its bucket, the index version
+    and the wrapped retriever's name form the cache key. Misses are retrieved
+    by the wrapped retriever, which reuses the cached query embedding.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    embeddings: Embeddings
+    cache: RetrievalCache
+    index_version: Callable[[], int]
+    # Identifies the wrapped retriever and its k in the cache key
+    cache_name: str
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        key: Tuple = (self.cache_name, self.index_version(), self.cache.bucket(self.embeddings.embed_query(query)))
+        documents = self.cache.get(key)
+        set_span_attributes(**{"retriever.cache_hit": documents is not None})
+        if documents is None:
+            documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            self.cache.set(key, documents)
+        return documents
@@ -1,14 +1,24 @@
 import logging
-from typing import List
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Set
 
 import pandas as pd
-import math
 
 from langchain.docstore.document import Document
 from langchain_community.vectorstores import SupabaseVectorStore
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
 
+from rag.bm25_index import BM25Index, get_bm25_index
+from rag.hybrid_retriever import HybridRetriever, get_reranker
+from rag.index_state import IndexState
+from rag.retrieval_cache import CachedRetriever, RetrievalCache
+from rag.local_vector_store import LocalVectorStore
 from rag.rag_config import RAG_CONFIG
 from rag.rag_embedding_helper import EmbeddingHelper
+from utils.llm.meter import estimate_tokens
 from utils.sql.sql_db import SqlDb
 
 logger = logging.getLogger(__name__)
@@ -18,19 +28,36 @@ class VectorStoreHelper:
     def __init__(self,
                  db_name: str = None,
                  embedding_model_name: str = None,
-                 table_name: str = None):
+                 table_name: str = None,
+                 db: SqlDb = None,
+                 embedding_helper: EmbeddingHelper = None,
+                 index_state: IndexState = None,
+                 bm25_index: BM25Index = None):
         self.db_name = db_name or RAG_CONFIG["db_name"]
-        self.embedding_helper = EmbeddingHelper(embedding_model_name)
+        self.embedding_helper = embedding_helper or EmbeddingHelper(embedding_model_name)
         self.table_name = table_name or RAG_CONFIG["documents_table"]
-        self.db = self._get_db()
+        self._local_stores = {}
+        self.db = db or self._get_db()
+        self.index_state = index_state or IndexState(RAG_CONFIG["index_state_path"])
+        self.bm25_index = bm25_index or get_bm25_index(RAG_CONFIG["bm25_index_path"])
+        self.reranker = get_reranker(RAG_CONFIG["reranker_model"])
+        # Shared by every conversation on this helper
+        self.retrieval_cache = RetrievalCache(RAG_CONFIG["retrieval_cache_size"], RAG_CONFIG["retrieval_cache_bits"])
         self.vector_store = self._initialize_vector_store()
         logger.info(f"Initialized VectorStoreManager with db: {self.db_name}, "
                     f"table: {self.table_name}")
 
+    @property
+    def is_local(self) -> bool:
+        return self.db_name.lower() == "local"
+
     def _get_db(self):
         try:
             if self.db_name.lower() == "supabase":
                 return SqlDb()
+            elif self.is_local:
+                # The local store keeps its rows itself
+                return None
             else:
                 # Add support for other database backends here
                 logger.warning(f"Unsupported database: {self.db_name}, using Supabase as fallback")
@@ -39,7 +66,7 @@ class VectorStoreHelper:
             logger.error(f"Error initializing database connection: {str(e)}")
             raise
 
-    def _initialize_vector_store(self) -> SupabaseVectorStore:
+    def _initialize_vector_store(self) -> VectorStore:
         """
         Initialize the vector store with the current embedding model.
 
@@ -55,16 +82,19 @@ class VectorStoreHelper:
                 self.vector_store = SupabaseVectorStore(
                     client=self.db.client,
                     table_name=self.table_name,
-                    embedding=self.embedding_helper.embedding_model
+                    embedding=self.embedding_helper.query_embeddings
                 )
                 return self.vector_store
+            elif self.is_local:
+                self.vector_store = self._local_store(self.table_name)
+                return self.vector_store
             else:
                 # Add support for other database backends here
                 logger.warning(f"Unsupported database: {self.db_name}, using Supabase as fallback")
                 self.vector_store = SupabaseVectorStore(
                     client=self.db.client,
                     table_name=self.table_name,
-                    embedding=self.embedding_helper.embedding_model
+                    embedding=self.embedding_helper.query_embeddings
                 )
                 return self.vector_store
 
@@ -72,24 +102,225 @@ class VectorStoreHelper:
             logger.error(f"Error initializing vector store: {str(e)}")
             raise
 
+    def _local_store(self, table_name: str) -> LocalVectorStore:
+        if table_name not in self._local_stores:
+            self._local_stores[table_name] = LocalVectorStore(
+                os.path.join(RAG_CONFIG["local_store_path"], table_name),
+                self.embedding_helper.query_embeddings,
+                ivf_lists=RAG_CONFIG["local_ivf_lists"],
+                ivf_nprobe=RAG_CONFIG["local_ivf_nprobe"]
+            )
+        return self._local_stores[table_name]
+
+    def _existing_ids(self, table_name: str, ids: List[str]) -> Set[str]:
+        if self.is_local:
+            return self._local_store(table_name).existing_ids(ids)
+        return self.db.fetch_existing_values(table_name, "ids", ids)
+
+    def _delete_ids(self, table_name: str, ids: Set[str]) -> None:
+        if self.is_local:
+            self._local_store(table_name).delete(list(ids))
+        else:
+            self.db.delete_rows(table_name, "ids", ids)
+        if self.bm25_index is not None:
+            self.bm25_index.delete(table_name, ids)
+
+    def _write_rows(self, table_name: str, rows: Dict[str, List[Any]]) -> None:
+        if self.is_local:
+            self._local_store(table_name).add_rows(rows["ids"], rows["contents"], rows["embeddings"], rows["metadata"])
+        else:
+            self.db.upload_table_from_pandas_df(table_name, pd.DataFrame(rows))
+        if self.bm25_index is not None:
+            self.bm25_index.add(table_name, rows["ids"], rows["contents"], rows["metadata"])
+
     def embed_and_store(self, chunk_list, table_name="documents", batch_size=100):
-        total_chunks = len(chunk_list)
-        num_batches = math.ceil(total_chunks / batch_size)
-        for i in range(0, total_chunks, batch_size):
-            print(f"Processing batch {i // batch_size} / {num_batches}")
-            chunk_batch_list = chunk_list[i: i + batch_size]
-            embed_dict = self.embedding_helper.embed_documents(chunk_batch_list)
-            df = pd.DataFrame(embed_dict)
-            self.db.upload_table_from_pandas_df(table_name, df)
+        """
+        Idempotently index chunks: unchanged chunks are skipped, new and changed
+        chunks are embedded and uploaded, and the chunks their source files no
+        longer produce are deleted.
+
+        Args:
+            chunk_list: Chunks of the indexed source files
+            table_name: Vector table to upload to
+            batch_size: Maximum chunks per embedding request
+        """
+        # Chunks are identified by source and content, identical chunks of a file are stored once
+        chunks_by_id = {}
+        for chunk in chunk_list:
+            chunks_by_id.setdefault(EmbeddingHelper.document_id(chunk), chunk)
+
+        existing_ids = self._existing_ids(table_name, list(chunks_by_id))
+        sources = {chunk.metadata.get("source", "") for chunk in chunks_by_id.values()}
+        self._delete_legacy_rows(table_name, sources)
+        stale_ids = self.index_state.chunk_ids(table_name, sources) - set(chunks_by_id)
+        if stale_ids:
+            self._delete_ids(table_name, stale_ids)
+            self.index_state.remove_chunks(table_name, stale_ids)
+        self.index_state.add_chunks(
+            table_name, [(chunk_id, chunks_by_id[chunk_id].metadata.get("source", "")) for chunk_id in existing_ids]
+        )
+
+        new_chunks = [chunk for chunk_id, chunk in chunks_by_id.items() if chunk_id not in existing_ids]
+        print(f"Indexing {len(new_chunks)} new chunks, skipping {len(existing_ids)} unchanged, "
+              f"deleted {len(stale_ids)} stale")
+
+        if new_chunks:
+            self._embed_and_upload(self._token_batches(new_chunks, batch_size), len(new_chunks), table_name)
+
+    def _delete_legacy_rows(self, table_name: str, sources: Set[str]) -> None:
+        """
+        Delete the rows of re-indexed sources that were uploaded with random ids.
+
+        Rows stored before chunk ids were derived from the source and content
+        have uuid4 ids, which no later run recognizes, so a re-indexed source
+        would otherwise keep both copies. Once a source has been re-indexed it
+        has no such rows left. The local store and the keyword index never held
+        random ids.
+        """
+        if self.is_local:
+            return
+        legacy_ids = {
+            row_id for row_id in self.db.fetch_values_by_json_key(table_name, "ids", "metadata", "source", sources)
+            if not EmbeddingHelper.is_document_id(row_id)
+        }
+        if legacy_ids:
+            deleted = self.db.delete_rows(table_name, "ids", legacy_ids)
+            print(f"Deleted {deleted} rows with random ids of {len(sources)} re-indexed sources")
+
+    @staticmethod
+    def _token_batches(chunks: List[Document], batch_size: int) -> Iterator[List[Document]]:
+        """
+        Group chunks into embedding requests of at most batch_size chunks and
+        RAG_CONFIG["embedding_batch_tokens"] estimated tokens.
+        """
+        max_tokens = RAG_CONFIG["embedding_batch_tokens"]
+        batch, batch_tokens = [], 0
+        for chunk in chunks:
+            tokens = estimate_tokens(chunk.page_content)
+            if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_tokens):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(chunk)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def _embed_and_upload(self, batches: Iterator[List[Document]], total_chunks: int, table_name: str) -> None:
+        """
+        Embed batches concurrently and upload the results in bulk on a separate thread.
+
+        At most RAG_CONFIG["embedding_concurrency"] embedding requests are in
+        flight; rate limited ones back off in EmbeddingHelper. Completed batches
+        are written RAG_CONFIG["upload_batch_size"] rows at a time while the next
+        ones are embedded, with at most one upload waiting behind the running one.
+        """
+        concurrency = RAG_CONFIG["embedding_concurrency"]
+        upload_batch_size = RAG_CONFIG["upload_batch_size"]
+        start = time.perf_counter()
+        completed, uploads = [], []
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed") as embedder, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload") as uploader:
+            def submit_next():
+                batch = next(batches, None)
+                if batch is not None:
+                    in_flight.add(embedder.submit(self.embedding_helper.embed_documents, batch))
+
+            def submit_upload():
+                if len(uploads) > 1:
+                    uploads[-2].result()
+                uploads.append(uploader.submit(self._upload, table_name, list(completed)))
+                completed.clear()
+
+            in_flight = set()
+            for _ in range(concurrency):
+                submit_next()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+                    completed.append(future.result())
+                    submit_next()
+                if sum(len(embed_dict["ids"]) for embed_dict in completed) >= upload_batch_size:
+                    submit_upload()
+            if completed:
+                submit_upload()
+            uploaded = sum(upload.result() for upload in uploads)
+
+        elapsed = time.perf_counter() - start
+        print(f"Embedded and uploaded {uploaded} / {total_chunks} chunks in {elapsed:.1f}s "
+              f"({uploaded / elapsed if elapsed else 0:.1f} chunks/sec)")
+
+    def _upload(self, table_name: str, embed_dicts: List[Dict[str, Any]]) -> int:
+        """Write embedded batches to the vector table in one upload and record them as indexed."""
+        rows = {column: [value for embed_dict in embed_dicts for value in embed_dict[column]]
+                for column in embed_dicts[0]}
+        self._write_rows(table_name, rows)
+        self.index_state.add_chunks(
+            table_name, [(chunk_id, meta.get("source", "")) for chunk_id, meta in zip(rows["ids"], rows["metadata"])]
+        )
+        return len(rows["ids"])
+
+    def remove_sources(self, sources, table_name="documents"):
+        """
+        Delete the rows indexed from the given source files.
+
+        Args:
+            sources: Source files whose chunks are deleted
+            table_name: Vector table to delete from
+        """
+        sources = list(sources)
+        chunk_ids = self.index_state.chunk_ids(table_name, sources)
+        if chunk_ids:
+            self._delete_ids(table_name, chunk_ids)
+            self.index_state.remove_chunks(table_name, chunk_ids)
+        print(f"Deleted {len(chunk_ids)} chunks of {len(sources)} removed sources")
 
     def get_retriever(self):
         return self.vector_store
 
+    def get_hybrid_retriever(self, top_k: int = None) -> HybridRetriever:
+        """
+        Create a retriever fusing the vector store's similarity search with the BM25 keyword index.
+
+        Args:
+            top_k: Number of documents it returns
+        """
+        return HybridRetriever(
+            vector_store=self.vector_store,
+            bm25_index=self.bm25_index,
+            table_name=self.table_name,
+            k=top_k or RAG_CONFIG["top_k"],
+            fetch_k=RAG_CONFIG["hybrid_fetch_k"],
+            rrf_k=RAG_CONFIG["rrf_k"],
+            reranker=self.reranker,
+            rerank_top_n=RAG_CONFIG["rerank_top_n"]
+        )
+
+    def _cached(self, retriever: BaseRetriever, cache_name: str) -> CachedRetriever:
+        """Serve a retriever's repeated queries from the shared retrieval cache until the index changes."""
+        return CachedRetriever(
+            retriever=retriever,
+            embeddings=self.embedding_helper.query_embeddings,
+            cache=self.retrieval_cache,
+            index_version=lambda: self.index_state.version(self.table_name),
+            cache_name=cache_name
+        )
+
+    def get_conversation_retriever(self):
+        """Retriever for the conversation chain, per RAG_CONFIG["retrieval_mode"]."""
+        if RAG_CONFIG["retrieval_mode"] == "hybrid":
+            return self._cached(self.get_hybrid_retriever(), f"hybrid:{RAG_CONFIG['top_k']}")
+        return self._cached(self.vector_store.as_retriever(), "dense:4")
+
     def retrieve_similar_documents(self, query: str, top_k: int = None) -> List[Document]:
         top_k = top_k or RAG_CONFIG["top_k"]
         try:
-            retriever = self.get_retriever()
-            documents = retriever.similarity_search(query, k=top_k)
+            if RAG_CONFIG["retrieval_mode"] == "hybrid":
+                retriever = self._cached(self.get_hybrid_retriever(top_k), f"hybrid:{top_k}")
+            else:
+                retriever = self._cached(self.vector_store.as_retriever(search_kwargs={"k": top_k}), f"dense:{top_k}")
+            documents = retriever.invoke(query)
             logger.info(f"Retrieved {len(documents)} documents for query: {query[:50]}...")
             return documents
         except Exception as e:
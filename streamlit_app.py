@@ -1,9 +1,18 @@
+import importlib
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from config import TRACE_DEBUG_PANEL
 from utils.session.session_handler import initialize_session
-from views.main_screen import show_main_screen_view
-from views.map_view import show_map_view
-from views.chat_view import show_chat_view
-from views.research_view import show_research_view 
+
+# View functions by name, as (module, function). Views are imported on first
+# navigation so the main menu renders without loading map, LLM and database
+# dependencies.
+VIEWS = {
+    "main": ("views.main_screen", "show_main_screen_view"),
+    "map": ("views.map_view", "show_map_view"),
+    "chat": ("views.chat_view", "show_chat_view"),
+    "research": ("views.research_view", "show_research_view"),
+}
 
 class CarAccidentApp:
     def __init__(self):
@@ -20,14 +29,21 @@ class CarAccidentApp:
                     
 
     def run(self):
-        if st.session_state.current_view == "main":
-            show_main_screen_view()
-        elif st.session_state.current_view == "map":
-            show_map_view()
-        elif st.session_state.current_view == "chat":
-            show_chat_view()
-        elif st.session_state.current_view == "research":
-            show_research_view()
+        view = VIEWS.get(st.session_state.current_view)
+        if view is None:
+            return
+        module_name, function_name = view
+        if st.session_state.current_view != "main":
+            # LLM usage is metered, and budgeted, per session
+            from utils.llm.meter import set_llm_session, start_metrics_endpoint
+            start_metrics_endpoint()
+            set_llm_session(get_script_run_ctx().session_id)
+        getattr(importlib.import_module(module_name), function_name)()
+
+        # The trace panel is drawn after the view, once the request spans have ended
+        if (TRACE_DEBUG_PANEL or st.query_params.get("debug") == "1") and "last_trace_id" in st.session_state:
+            from components.debug.trace_panel import show_trace_panel
+            show_trace_panel()
 
 
 if __name__ == "__main__":
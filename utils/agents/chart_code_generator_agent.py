@@ -1,11 +1,16 @@
 from typing import Optional, Any, Iterator
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from pydantic import BaseModel, Field
 import pandas as pd
 import plotly.express as px
+import plotly.io as pio
 from utils.agents.chart_designer_agent import ChartDesign
 from utils.agents.question_generator_agent import DataQuestion
 from langchain.prompts import ChatPromptTemplate
+from utils.sandbox.chart_execution_pool import get_chart_execution_pool
+from utils.llm.prompt_data import compact_dataframe
+from utils.llm.model import get_llm_model
+from config import AGENT_PROMPT_DATA_TOKEN_BUDGET
 import json
 
 
@@ -22,7 +27,8 @@ class ChartCodeGeneratorAgent:
         self,
         model_name: str = "gpt-4o-mini",
         temperature: float = 0,
-        verbose: bool = True
+        verbose: bool = True,
+        llm: Optional[BaseChatModel] = None
     ):
         """Initialize the chart code generator agent.
 
@@ -30,8 +36,9 @@ class ChartCodeGeneratorAgent:
             model_name: The OpenAI model to use
             temperature: Model temperature (0 for deterministic results)
             verbose: Whether to print agent's reasoning
+            llm: Shared chat model to use instead of creating a new client
         """
-        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature)
+        self.llm = llm or get_llm_model("openai", model_name, temperature=temperature, feature="charts")
         self.verbose = verbose
 
     def _get_system_message(self) -> str:
@@ -50,7 +57,7 @@ class ChartCodeGeneratorAgent:
         """
 
     def generate_chart(self, df: pd.DataFrame, question: DataQuestion, design: ChartDesign) -> Optional[Any]:
-        """Generate and execute Python code to create the chart based on the design.
+        """Generate Python code to create the chart and execute it in the sandboxed worker pool.
 
         Args:
             df: The DataFrame containing the data
@@ -79,8 +86,8 @@ class ChartCodeGeneratorAgent:
         Data Types:
         {df[question.data_columns].dtypes}
         
-        Sample Data:
-        {df[question.data_columns]}
+        Data (the code receives the full DataFrame):
+        {compact_dataframe(df[question.data_columns], max_tokens=AGENT_PROMPT_DATA_TOKEN_BUDGET)}
         
         Code Generation Steps:
         1. Data Preparation:
@@ -145,18 +152,18 @@ class ChartCodeGeneratorAgent:
                     print("No code was generated")
                 return None
                 
-            # Execute the code and get the figure
-            local_vars = {'df': df, 'px': px}
-            exec(chart_code.code, globals(), local_vars)
+            # Execute the code in an isolated, time- and memory-limited worker
+            result = get_chart_execution_pool().execute(chart_code.code, df)
+            if self.verbose:
+                print(f"Chart code executed in {result.wall_time:.2f}s "
+                      f"(cpu {result.cpu_time:.2f}s, peak rss {result.max_rss_mb:.0f}MB)")
             
-            # Get the figure from the local namespace
-            fig = local_vars.get('fig')
-            if fig is None:
+            if result.error:
                 if self.verbose:
-                    print("No figure was created by the code")
+                    print(result.error)
                 return None
                 
-            return fig
+            return pio.from_json(result.fig_json)
             
         except Exception as e:
             if self.verbose:
@@ -1,8 +1,11 @@
 from typing import List, Optional
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from pydantic import BaseModel, Field
 import pandas as pd
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+from utils.llm.prompt_data import compact_dataframe
+from config import AGENT_PROMPT_DATA_TOKEN_BUDGET
+from utils.llm.model import get_llm_model
 
 
 class ChartDesign(BaseModel):
@@ -22,7 +25,8 @@ class ChartDesignerAgent:
         self,
         model_name: str = "gpt-4o-mini",
         temperature: float = 0,
-        verbose: bool = True
+        verbose: bool = True,
+        llm: Optional[BaseChatModel] = None
     ):
         """Initialize the chart designer agent.
 
@@ -30,8 +34,9 @@ class ChartDesignerAgent:
             model_name: The OpenAI model to use
             temperature: Model temperature (0 for deterministic results)
             verbose: Whether to print agent's reasoning
+            llm: Shared chat model to use instead of creating a new client
         """
-        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature)
+        self.llm = llm or get_llm_model("openai", model_name, temperature=temperature, feature="charts")
         self.verbose = verbose
         
         # Chart design response schemas
@@ -70,8 +75,8 @@ class ChartDesignerAgent:
         Data Types:
         {df[data_columns].dtypes}
         
-        Sample Data:
-        {df[data_columns].head(30)}
+        Data:
+        {compact_dataframe(df[data_columns], max_tokens=AGENT_PROMPT_DATA_TOKEN_BUDGET)}
         
         Guidelines:
         1. Choose ONE of these chart types:
@@ -0,0 +1,85 @@
+from typing import Optional
+from langchain_core.language_models import BaseChatModel
+from pydantic import BaseModel, Field
+import pandas as pd
+
+from utils.agents.question_generator_agent import DataQuestion
+from utils.agents.chart_designer_agent import ChartDesign
+from utils.llm.prompt_data import compact_dataframe
+from config import AGENT_PROMPT_DATA_TOKEN_BUDGET
+from utils.llm.model import get_llm_model
+
+
+class ChartPlan(BaseModel):
+    """Model for a combined question and chart design."""
+    question: DataQuestion = Field(description="The most valuable question to answer with a chart")
+    design: ChartDesign = Field(description="The chart design answering the question")
+
+
+class ChartPlannerAgent:
+    """Agent for choosing the question to visualize and its chart design in a single call."""
+
+    def __init__(
+        self,
+        model_name: str = "gpt-4o-mini",
+        temperature: float = 0,
+        verbose: bool = True,
+        llm: Optional[BaseChatModel] = None
+    ):
+        """Initialize the chart planner agent.
+
+        Args:
+            model_name: The OpenAI model to use
+            temperature: Model temperature (0 for deterministic results)
+            verbose: Whether to print agent's reasoning
+            llm: Shared chat model to use instead of creating a new client
+        """
+        self.llm = llm or get_llm_model("openai", model_name, temperature=temperature, feature="charts")
+        self.verbose = verbose
+        self.structured_llm = self.llm.with_structured_output(ChartPlan, method="json_schema", strict=True)
+
+    def get_chart_plan(self, df: pd.DataFrame, feedback: Optional[str] = None) -> Optional[ChartPlan]:
+        """Determine the most important question and the chart design answering it.
+
+        Args:
+            df: The DataFrame to analyze
+            feedback: Validation errors of a previous plan, used when retrying
+
+        Returns:
+            ChartPlan with the question and design, or None if no plan could be made
+        """
+        plan_prompt = f"""Task: Choose the single most valuable question that can be answered by a chart of this data,
+        and design the chart that answers it.
+
+        Question guidelines:
+        1. The question must be specific and answerable with the available columns
+        2. Prefer trends, comparisons and distributions that lead to actionable road safety insights
+        3. data_columns must list the exact column names needed, taken from the columns below
+        4. Set importance to High, Medium or Low
+
+        Design guidelines:
+        1. chart_type must be one of: line, bar, pie, scatter
+           - line: trends over time or another ordered numeric axis
+           - bar: comparing categories
+           - pie: proportions of a whole
+           - scatter: relationship between two numeric columns
+        2. x_axis and y_axis must be exact column names from data_columns
+        3. y_axis must be a numeric column (for pie charts, the values column)
+        4. Describe any aggregation or filtering in data_transformation, or null if none is needed
+        5. Give a clear, descriptive title
+
+        Data:
+        {compact_dataframe(df, max_tokens=AGENT_PROMPT_DATA_TOKEN_BUDGET)}
+        """
+        if feedback:
+            plan_prompt += f"""
+        A previous plan was rejected, fix these issues:
+        {feedback}
+        """
+
+        try:
+            return self.structured_llm.invoke(plan_prompt)
+        except Exception as e:
+            if self.verbose:
+                print(f"Error generating chart plan: {str(e)}")
+            return None
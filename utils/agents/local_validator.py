@@ -0,0 +1,98 @@
+from typing import List
+import pandas as pd
+
+from utils.agents.question_generator_agent import DataQuestion
+from utils.agents.chart_designer_agent import ChartDesign
+from utils.agents.validator_agent import ValidationResult
+
+
+# Supported chart types and the dtype requirements of their axes
+SUPPORTED_CHART_TYPES = ["line", "bar", "pie", "scatter"]
+NUMERIC_X_CHART_TYPES = ["scatter"]
+
+
+class LocalValidator:
+    """Deterministic validator for questions and chart designs, requiring no LLM calls."""
+
+    @staticmethod
+    def normalize_chart_type(chart_type: str) -> str:
+        """Normalize chart type names such as 'Bar Chart' to 'bar'."""
+        return chart_type.lower().replace("chart", "").strip()
+
+    @staticmethod
+    def validate_question(question: DataQuestion, df: pd.DataFrame) -> ValidationResult:
+        """Validate that a question can be answered with the available data.
+
+        Args:
+            question: The question to validate
+            df: The DataFrame the question is about
+
+        Returns:
+            ValidationResult containing validation status and any error messages
+        """
+        if df.empty:
+            return ValidationResult(is_valid=False, error_message="There is no data to visualize")
+
+        if not question.question.strip():
+            return ValidationResult(is_valid=False, error_message="The question is empty")
+
+        if not question.data_columns:
+            return ValidationResult(
+                is_valid=False,
+                error_message="The question does not name any data columns",
+                suggestions=[f"Use columns from: {', '.join(df.columns)}"]
+            )
+
+        missing_columns = [col for col in question.data_columns if col not in df.columns]
+        if missing_columns:
+            return ValidationResult(
+                is_valid=False,
+                error_message=f"Columns not found in the data: {', '.join(missing_columns)}",
+                suggestions=[f"Use only these columns: {', '.join(df.columns)}"]
+            )
+
+        return ValidationResult(is_valid=True)
+
+    @staticmethod
+    def validate_design(design: ChartDesign, question: DataQuestion, df: pd.DataFrame) -> ValidationResult:
+        """Validate that a chart design fits the question and the column dtypes.
+
+        Args:
+            design: The chart design to validate
+            question: The question the chart should answer
+            df: The DataFrame the chart is drawn from
+
+        Returns:
+            ValidationResult containing validation status and any error messages
+        """
+        errors: List[str] = []
+        suggestions: List[str] = []
+
+        chart_type = LocalValidator.normalize_chart_type(design.chart_type)
+        if chart_type not in SUPPORTED_CHART_TYPES:
+            errors.append(f"Unsupported chart type: {design.chart_type}")
+            suggestions.append(f"Use one of: {', '.join(SUPPORTED_CHART_TYPES)}")
+
+        for axis_name, column in (("x_axis", design.x_axis), ("y_axis", design.y_axis)):
+            if column not in df.columns:
+                errors.append(f"{axis_name} '{column}' is not a column of the data")
+                suggestions.append(f"Set {axis_name} to one of: {', '.join(question.data_columns)}")
+
+        if not errors:
+            if not pd.api.types.is_numeric_dtype(df[design.y_axis]):
+                errors.append(f"y_axis '{design.y_axis}' must be numeric for a {chart_type} chart")
+                suggestions.append("Use a count or measure column on the y-axis")
+            if chart_type in NUMERIC_X_CHART_TYPES and not pd.api.types.is_numeric_dtype(df[design.x_axis]):
+                errors.append(f"x_axis '{design.x_axis}' must be numeric for a {chart_type} chart")
+            if chart_type == "pie" and df[design.x_axis].nunique() > 12:
+                errors.append(f"x_axis '{design.x_axis}' has too many categories for a pie chart")
+                suggestions.append("Use a bar chart for many categories")
+
+        if errors:
+            return ValidationResult(
+                is_valid=False,
+                error_message="; ".join(errors),
+                suggestions=suggestions or None
+            )
+
+        return ValidationResult(is_valid=True)
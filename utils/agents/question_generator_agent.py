@@ -1,8 +1,11 @@
 from typing import List, Optional
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from pydantic import BaseModel, Field
 import pandas as pd
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+from utils.llm.prompt_data import compact_dataframe
+from config import AGENT_PROMPT_DATA_TOKEN_BUDGET
+from utils.llm.model import get_llm_model
 
 
 class DataQuestion(BaseModel):
@@ -20,7 +23,8 @@ class QuestionGeneratorAgent:
         self,
         model_name: str = "gpt-4o-mini",
         temperature: float = 0,  # Deterministic for consistent results
-        verbose: bool = True
+        verbose: bool = True,
+        llm: Optional[BaseChatModel] = None
     ):
         """Initialize the question generator agent.
 
@@ -28,8 +32,9 @@ class QuestionGeneratorAgent:
             model_name: The OpenAI model to use
             temperature: Model temperature (0 for deterministic results)
             verbose: Whether to print agent's reasoning
+            llm: Shared chat model to use instead of creating a new client
         """
-        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature)
+        self.llm = llm or get_llm_model("openai", model_name, temperature=temperature, feature="charts")
         self.verbose = verbose
         
         # Question generation response schemas
@@ -68,11 +73,8 @@ class QuestionGeneratorAgent:
         7. Prioritize questions that could lead to actionable insights
         8. Ensure at least one question is marked as High importance
 
-        DataFrame Info:
-        {df.info()}
-
-        Sample Data:
-        {df.head(20)}
+        Data:
+        {compact_dataframe(df, max_tokens=AGENT_PROMPT_DATA_TOKEN_BUDGET)}
 
         {self.question_parser.get_format_instructions()}
 
@@ -1,10 +1,11 @@
 from typing import Optional, Any, Dict
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langchain.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
 from utils.agents.question_generator_agent import DataQuestion
 from utils.agents.chart_designer_agent import ChartDesign
+from utils.llm.model import get_llm_model
 
 
 class ValidationResult(BaseModel):
@@ -21,7 +22,8 @@ class ValidatorAgent:
         self,
         model_name: str = "gpt-4o-mini",
         temperature: float = 0,
-        verbose: bool = True
+        verbose: bool = True,
+        llm: Optional[BaseChatModel] = None
     ):
         """Initialize the validator agent.
 
@@ -29,8 +31,9 @@ class ValidatorAgent:
             model_name: The OpenAI model to use
             temperature: Model temperature (0 for deterministic results)
             verbose: Whether to print agent's reasoning
+            llm: Shared chat model to use instead of creating a new client
         """
-        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature)
+        self.llm = llm or get_llm_model("openai", model_name, temperature=temperature, feature="charts")
         self.verbose = verbose
 
     def validate_question(self, question: DataQuestion, df_columns: list[str]) -> ValidationResult:
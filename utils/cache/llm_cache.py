@@ -0,0 +1,285 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from utils.llm.llm_config import LLM_CACHE_CONFIG
+from utils.llm.meter import get_meter
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_prompt(prompt: str) -> Tuple[str, Optional[str]]:
+    """Split a serialized message list into its context and the last user message.
+
+    Args:
+        prompt: Messages serialized by LangChain, as passed to BaseCache.lookup
+
+    Returns:
+        Tuple of (hash of every message but the last user message, last user message text),
+        the text is None if the prompt has no user message
+    """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return _hash(prompt), None
+    if not isinstance(messages, list):
+        return _hash(prompt), None
+
+    for idx in range(len(messages) - 1, -1, -1):
+        message = messages[idx]
+        if isinstance(message, dict) and message.get("id", [""])[-1] in ("HumanMessage", "HumanMessageChunk"):
+            content = message.get("kwargs", {}).get("content")
+            if isinstance(content, str):
+                context = messages[:idx] + messages[idx + 1:]
+                return _hash(json.dumps(context, sort_keys=True)), content
+    return _hash(prompt), None
+
+
+class SQLiteLLMStore:
+    """Process-wide SQLite store of LLM responses with TTL and LRU eviction.
+
+    One connection is shared by all threads and guarded by a lock, SQLite
+    serializes writers anyway.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        """Initialize the store.
+
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of responses kept before evicting the least recently used ones
+            ttl: Seconds a response is served after it was stored
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                feature TEXT,
+                llm_hash TEXT,
+                context_hash TEXT,
+                response TEXT,
+                embedding BLOB,
+                created_at REAL,
+                last_access REAL
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_semantic ON llm_cache (llm_hash, context_hash, created_at)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_lru ON llm_cache (last_access)")
+        self._connection.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a serialized response, refreshing its LRU position. Expired responses are missing."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                self._connection.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._connection.commit()
+        return row[0] if row else None
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM llm_cache WHERE key = ? AND created_at > ?", (key, time.time() - self.ttl)
+            ).fetchone()
+        return row is not None
+
+    def candidates(self, llm_hash: str, context_hash: str, limit: int) -> List[Tuple[str, bytes]]:
+        """Get (key, embedding) of the most recent live responses sharing a model and prompt context."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT key, embedding FROM llm_cache "
+                "WHERE llm_hash = ? AND context_hash = ? AND embedding IS NOT NULL AND created_at > ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (llm_hash, context_hash, time.time() - self.ttl, limit)
+            ).fetchall()
+
+    def set(
+        self,
+        key: str,
+        feature: str,
+        llm_hash: str,
+        context_hash: str,
+        response: str,
+        embedding: Optional[bytes] = None
+    ) -> None:
+        """Store a serialized response, evicting expired and least recently used ones."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, feature, llm_hash, context_hash, response, embedding, now, now)
+            )
+            self._connection.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl,))
+            self._connection.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._connection.commit()
+
+    def clear(self, feature: Optional[str] = None) -> None:
+        with self._lock:
+            if feature is None:
+                self._connection.execute("DELETE FROM llm_cache")
+            else:
+                self._connection.execute("DELETE FROM llm_cache WHERE feature = ?", (feature,))
+            self._connection.commit()
+
+
+class LLMCache(BaseCache):
+    """LangChain cache of one feature's LLM responses, on the shared SQLite store.
+
+    The exact tier keys responses on the model, its parameters and the full
+    message list. The optional semantic tier behind it serves a response
+    whose prompt differs only by a paraphrased last user message, matched by
+    embedding similarity. Every lookup is counted in the LLM meter.
+    """
+
+    def __init__(
+        self,
+        feature: str,
+        store: SQLiteLLMStore,
+        semantic: bool = False,
+        embeddings: Optional[Any] = None,
+        threshold: float = LLM_CACHE_CONFIG["semantic_threshold"],
+        max_candidates: int = LLM_CACHE_CONFIG["semantic_max_candidates"]
+    ):
+        """Initialize the cache.
+
+        Args:
+            feature: Feature whose responses are cached, used for metrics and clearing
+            store: Shared response store
+            semantic: Whether to enable the semantic tier
+            embeddings: LangChain embeddings for the semantic tier, created on first use if not given
+            threshold: Minimum cosine similarity of the user messages for a semantic hit
+            max_candidates: Most recent responses compared on a semantic lookup
+        """
+        self.feature = feature
+        self.store = store
+        self.semantic = semantic
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self._embeddings = embeddings
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+            self._embeddings = OpenAIEmbeddings(model=LLM_CACHE_CONFIG["embedding_model"])
+        return self._embeddings
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return _hash(f"{llm_string}\n{prompt}")
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def record_lookup(self, tier: str, hit: bool) -> None:
+        """Count a lookup in the LLM meter's hit-rate metrics."""
+        get_meter().record_cache_lookup(self.feature, tier, hit)
+
+    def contains(self, prompt: str, llm_string: str) -> bool:
+        """Whether the exact tier holds a response, without counting a lookup."""
+        return self.store.contains(self._key(prompt, llm_string))
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        response = self.store.get(self._key(prompt, llm_string))
+        self.record_lookup("exact", response is not None)
+        if response is None and self.semantic:
+            try:
+                response = self._semantic_lookup(prompt, llm_string)
+            except Exception as e:
+                print(f"Error in semantic LLM cache lookup: {str(e)}")
+            self.record_lookup("semantic", response is not None)
+        return loads(response, allowed_objects="core") if response is not None else None
+
+    def _semantic_lookup(self, prompt: str, llm_string: str) -> Optional[str]:
+        context_hash, question = split_prompt(prompt)
+        if not question:
+            return None
+        candidates = self.store.candidates(_hash(llm_string), context_hash, self.max_candidates)
+        if not candidates:
+            return None
+
+        keys = [key for key, _ in candidates]
+        matrix = np.stack([np.frombuffer(embedding, dtype=np.float32) for _, embedding in candidates])
+        similarities = matrix @ self._embed(question)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self.store.get(keys[best])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        context_hash, question = split_prompt(prompt)
+        embedding = None
+        if self.semantic and question:
+            try:
+                embedding = self._embed(question).tobytes()
+            except Exception as e:
+                # The response is still cached for exact matches
+                print(f"Error embedding LLM cache entry: {str(e)}")
+        self.store.set(
+            self._key(prompt, llm_string),
+            self.feature,
+            _hash(llm_string),
+            context_hash,
+            dumps(return_val),
+            embedding
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear(self.feature)
+
+
+_store: Optional[SQLiteLLMStore] = None
+_caches: Dict[str, LLMCache] = {}
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache(feature: str, features: Optional[Dict[str, str]] = None) -> Optional[LLMCache]:
+    """Get the process-wide cache of a feature, or None if the feature is not opted in.
+
+    Args:
+        feature: Feature of the LLM client
+        features: Tier by opted-in feature, LLM_CACHE_CONFIG["features"] by default
+
+    Returns:
+        The feature's cache, shared by all its clients, or None
+    """
+    global _store
+    tier = (features if features is not None else LLM_CACHE_CONFIG["features"]).get(feature)
+    if tier is None:
+        return None
+
+    with _cache_lock:
+        if feature not in _caches:
+            if _store is None:
+                _store = SQLiteLLMStore(
+                    LLM_CACHE_CONFIG["path"], LLM_CACHE_CONFIG["max_entries"], LLM_CACHE_CONFIG["ttl"]
+                )
+            _caches[feature] = LLMCache(feature, _store, semantic=tier == "semantic")
+        return _caches[feature]
+
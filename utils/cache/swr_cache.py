@@ -0,0 +1,111 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache:
+    """Thread-safe cache that serves expired entries while refreshing them in the background.
+
+    An entry is fresh for `ttl` seconds. For the following `max_stale` seconds
+    it is still returned immediately, and a background worker recomputes it.
+    Older entries are treated as missing.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_stale: float,
+        max_entries: int = 128,
+        refresh_workers: int = 1
+    ):
+        """Initialize the cache.
+
+        Args:
+            ttl: Number of seconds an entry is considered fresh
+            max_stale: Number of seconds after expiry during which a stale entry may still be served
+            max_entries: Maximum number of entries kept before evicting the least recently used one
+            refresh_workers: Number of background threads used to refresh stale entries
+        """
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=refresh_workers,
+            thread_name_prefix="cache-refresh"
+        )
+
+    def get(self, key: Hashable, make_refresh: Optional[Callable[[], Callable[[], Any]]] = None) -> Optional[Any]:
+        """Get a value from the cache.
+
+        Args:
+            key: The cache key
+            make_refresh: Factory of the callable recomputing the value, only called when the entry is stale.
+                The callable is then run in the background.
+
+        Returns:
+            The cached value (fresh or stale), or None if the key is missing or too old
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age > self.ttl + self.max_stale:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            schedule_refresh = age > self.ttl and make_refresh is not None and key not in self._refreshing
+            if schedule_refresh:
+                self._refreshing.add(key)
+
+        if schedule_refresh:
+            # Built outside the lock, the factory may resolve slow clients
+            try:
+                # In a copy of the caller's context, so the refresh is billed to the same LLM session
+                self._executor.submit(contextvars.copy_context().run, self._refresh, key, make_refresh())
+            except Exception:
+                logger.exception("Error scheduling the refresh of a cache entry")
+                with self._lock:
+                    self._refreshing.discard(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value in the cache.
+
+        Args:
+            key: The cache key
+            value: The value to store
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refresh(self, key: Hashable, refresh: Callable[[], Any]) -> None:
+        """Recompute a stale entry, keeping the stale value if the refresh fails."""
+        try:
+            value = refresh()
+            if value is not None:
+                self.set(key, value)
+        except Exception:
+            logger.exception("Error refreshing cache entry")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
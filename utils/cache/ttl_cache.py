@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe in-memory cache with per-entry time-to-live and LRU eviction.
+
+    Instances are meant to be shared across Streamlit sessions, so every
+    operation is guarded by a lock.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        """Initialize the cache.
+
+        Args:
+            ttl: Number of seconds an entry stays valid after it was stored
+            max_entries: Maximum number of entries kept before evicting the least recently used one
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value from the cache.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None if the key is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value in the cache.
+
+        Args:
+            key: The cache key
+            value: The value to store
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Get a value from the cache, computing and storing it on a miss.
+
+        The computation runs outside the lock, so concurrent misses on the same
+        key may compute the value more than once. Exceptions are propagated and
+        nothing is stored.
+
+        Args:
+            key: The cache key
+            compute: Callable producing the value on a cache miss
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = compute()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
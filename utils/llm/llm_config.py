@@ -0,0 +1,57 @@
+from typing import Any, Dict
+
+# LLM metering configuration. It lives next to the LLM factory rather than in
+# the root config, so the research workflow, which has its own config module,
+# can use the factory too.
+LLM_METER_CONFIG: Dict[str, Any] = {
+    # Per-session budget, in prompt + completion tokens. Sessions over budget are
+    # served by the cheaper fallback model. None disables budgets.
+    "session_token_budget": 300_000,
+    "budget_fallback_models": {
+        "gpt-4o": "gpt-4o-mini",
+        "gpt-4-1106-preview": "gpt-4o-mini",
+        "gpt-3.5-turbo": "gpt-4o-mini",
+    },
+
+    # Prometheus text metrics served on http://localhost:<port>/metrics, None disables
+    "metrics_port": 9464,
+    # Interface of the metrics endpoint, which exposes per-session usage and cost, "0.0.0.0" serves every interface
+    "metrics_host": "127.0.0.1",
+
+    # Request latency histogram buckets, in seconds
+    "latency_buckets": [0.25, 0.5, 1, 2, 5, 10, 20, 40, 60],
+
+    # USD per 1M (prompt, completion) tokens, used for the estimated cost
+    "prices_per_million_tokens": {
+        "gpt-4o": (2.5, 10.0),
+        "gpt-4o-mini": (0.15, 0.6),
+        "gpt-3.5-turbo": (0.5, 1.5),
+        "gpt-4-1106-preview": (10.0, 30.0),
+    },
+}
+
+# LLM response cache, shared by all clients created with get_llm_model
+LLM_CACHE_CONFIG: Dict[str, Any] = {
+    "path": "llm_cache.sqlite",
+    "max_entries": 20_000,  # least recently used responses are evicted beyond this
+    "ttl": 7 * 24 * 3600,  # seconds a response is served after it was stored
+
+    # Features whose calls are cached, with the cache tier: "exact" serves
+    # identical requests, "semantic" also serves paraphrases of the last user
+    # message when the rest of the prompt is identical. Other features are not cached.
+    # Only features whose last user message is the user's own question are semantic,
+    # templated payloads of different requests are too similar to tell apart.
+    "features": {
+        "analysis": "exact",
+        "charts": "exact",
+        "research": "exact",
+        "research_question": "semantic",  # research steps taking the raw question
+        "rag_evaluation": "exact",
+        "rag_evaluation_judge": "exact",
+    },
+
+    # Semantic tier
+    "embedding_model": "text-embedding-3-small",
+    "semantic_threshold": 0.95,  # cosine similarity of the user messages
+    "semantic_max_candidates": 500,  # most recent entries compared per prompt
+}
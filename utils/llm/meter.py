@@ -0,0 +1,342 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from utils.llm.llm_config import LLM_METER_CONFIG
+
+# Session of calls made outside a user session, such as scripts and evaluators. It is not budgeted.
+DEFAULT_LLM_SESSION = "global"
+
+# Session the current LLM calls are billed to. Worker threads started with a
+# copy of the context, as LangGraph nodes are, keep the session.
+_llm_session: contextvars.ContextVar[str] = contextvars.ContextVar("llm_session", default=DEFAULT_LLM_SESSION)
+
+# Sessions whose token totals are kept for budgets, least recently used dropped first
+MAX_TRACKED_SESSIONS = 10000
+
+
+def set_llm_session(session_id: str) -> None:
+    """Bill the LLM calls of the current context to a session."""
+    _llm_session.set(session_id)
+
+
+def get_llm_session() -> str:
+    return _llm_session.get()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, used when a response carries no usage."""
+    return max(len(text) // 4, 1) if text else 0
+
+
+def _match_model(model: str, table: Dict[str, Any]) -> Optional[str]:
+    """Find the table key of a model name, dated model versions match their base name."""
+    matches = [name for name in table if model == name or model.startswith(f"{name}-")]
+    return max(matches, key=len) if matches else None
+
+
+class LLMMeter:
+    """Process-wide LLM usage accounting.
+
+    Counts calls, tokens, estimated cost and latency by feature and model,
+    keeps per-session token totals for budgets, and renders everything in the
+    Prometheus text format.
+    """
+
+    def __init__(self, config: Dict[str, Any] = LLM_METER_CONFIG):
+        self.config = config
+        self.buckets: List[float] = sorted(config["latency_buckets"])
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: Dict[Tuple, List[float]] = {}
+        self._session_tokens: "OrderedDict[str, int]" = OrderedDict()
+
+    def estimate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prices = self.config["prices_per_million_tokens"]
+        name = _match_model(model, prices)
+        if name is None:
+            return 0.0
+        prompt_price, completion_price = prices[name]
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+    def record(
+        self,
+        feature: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency: float,
+        cached: bool = False,
+        error: bool = False,
+        session_id: Optional[str] = None
+    ) -> None:
+        """Record a finished LLM call.
+
+        Args:
+            feature: Application feature that made the call
+            model: Model that served the call
+            prompt_tokens: Prompt tokens used
+            completion_tokens: Completion tokens generated
+            latency: Call duration in seconds
+            cached: Whether the response came from an LLM cache
+            error: Whether the call failed
+            session_id: Session billed, the current session by default
+        """
+        session_id = session_id or get_llm_session()
+        labels = (feature, model)
+        cost = 0.0 if cached else self.estimate_cost(model, prompt_tokens, completion_tokens)
+
+        with self._lock:
+            self._counters["llm_requests_total"][labels + (str(cached).lower(),)] += 1
+            if error:
+                self._counters["llm_errors_total"][labels] += 1
+            self._counters["llm_prompt_tokens_total"][labels] += prompt_tokens
+            self._counters["llm_completion_tokens_total"][labels] += completion_tokens
+            self._counters["llm_cost_usd_total"][labels] += cost
+
+            histogram = self._histograms.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+            for idx, bound in enumerate(self.buckets):
+                if latency <= bound:
+                    histogram[idx] += 1
+            histogram[-2] += 1  # count, the +Inf bucket
+            histogram[-1] += latency  # sum
+
+            if not cached:
+                self._session_tokens[session_id] = (
+                    self._session_tokens.get(session_id, 0) + prompt_tokens + completion_tokens
+                )
+                self._session_tokens.move_to_end(session_id)
+                while len(self._session_tokens) > MAX_TRACKED_SESSIONS:
+                    self._session_tokens.popitem(last=False)
+
+    def record_cache_lookup(self, feature: str, tier: str, hit: bool) -> None:
+        """Record an LLM cache lookup of a feature in a cache tier."""
+        with self._lock:
+            self._counters["llm_cache_lookups_total"][(feature, tier, "hit" if hit else "miss")] += 1
+
+    def cache_hit_ratios(self) -> Dict[Tuple[str, str], float]:
+        """Hit ratio of every (feature, tier) looked up so far."""
+        with self._lock:
+            lookups = dict(self._counters.get("llm_cache_lookups_total", {}))
+        totals: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0.0, 0.0])
+        for (feature, tier, result), count in lookups.items():
+            totals[(feature, tier)][0] += count if result == "hit" else 0
+            totals[(feature, tier)][1] += count
+        return {labels: hits / count for labels, (hits, count) in totals.items()}
+
+    def session_tokens(self, session_id: Optional[str] = None) -> int:
+        """Tokens used by a session, the current session by default."""
+        with self._lock:
+            return self._session_tokens.get(session_id or get_llm_session(), 0)
+
+    def budget_model(self, model: str, session_id: Optional[str] = None) -> str:
+        """Get the model to serve a request with, degraded if the session is over budget.
+
+        Args:
+            model: Requested model
+            session_id: Session billed, the current session by default
+
+        Returns:
+            The requested model, or its cheaper fallback when the session is over budget
+        """
+        fallback = self.fallback_model(model, session_id)
+        if fallback is None:
+            return model
+        with self._lock:
+            self._counters["llm_budget_degradations_total"][(model, fallback)] += 1
+        return fallback
+
+    def fallback_model(self, model: str, session_id: Optional[str] = None) -> Optional[str]:
+        """Get the cheaper model replacing model for an over-budget session, or None if it is not degraded."""
+        session_id = session_id or get_llm_session()
+        budget = self.config["session_token_budget"]
+        if budget is None or session_id == DEFAULT_LLM_SESSION or self.session_tokens(session_id) < budget:
+            return None
+        fallbacks = self.config["budget_fallback_models"]
+        name = _match_model(model, fallbacks)
+        return None if name is None else fallbacks[name]
+
+    def snapshot(self) -> Dict[str, Dict[Tuple, float]]:
+        """Copy of the counters, keyed by metric name and label values."""
+        with self._lock:
+            return {name: dict(values) for name, values in self._counters.items()}
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        label_names = {
+            "llm_requests_total": ("feature", "model", "cached"),
+            "llm_budget_degradations_total": ("model", "fallback"),
+            "llm_cache_lookups_total": ("feature", "tier", "result"),
+        }
+        hit_ratios = self.cache_hit_ratios()
+        lines = []
+        with self._lock:
+            for name, values in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{name}{{{_format_labels(label_names.get(name, ('feature', 'model')), labels)}}} {value}")
+
+            budget = self.config["session_token_budget"]
+            over_budget = sum(tokens >= budget for tokens in self._session_tokens.values()) if budget else 0
+            lines.append("# TYPE llm_sessions_over_budget gauge")
+            lines.append(f"llm_sessions_over_budget {over_budget}")
+
+            lines.append("# TYPE llm_cache_hit_ratio gauge")
+            for labels, ratio in sorted(hit_ratios.items()):
+                lines.append(f"llm_cache_hit_ratio{{{_format_labels(('feature', 'tier'), labels)}}} {ratio}")
+
+            lines.append("# TYPE llm_request_duration_seconds histogram")
+            for labels, histogram in sorted(self._histograms.items()):
+                label_text = _format_labels(("feature", "model"), labels)
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(f'llm_request_duration_seconds_bucket{{{label_text},le="{bound}"}} {count}')
+                lines.append(f'llm_request_duration_seconds_bucket{{{label_text},le="+Inf"}} {histogram[-2]}')
+                lines.append(f"llm_request_duration_seconds_count{{{label_text}}} {histogram[-2]}")
+                lines.append(f"llm_request_duration_seconds_sum{{{label_text}}} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+class LLMMeterCallback(BaseCallbackHandler):
+    """Records the usage of every call of the LLM client it is attached to."""
+
+    def __init__(self, feature: str, meter: Optional[LLMMeter] = None):
+        """Initialize the callback.
+
+        Args:
+            feature: Application feature the client's calls are attributed to
+            meter: Meter to record to, the process-wide meter by default
+        """
+        self.feature = feature
+        self.meter = meter
+        self._calls: Dict[UUID, Tuple[float, str, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, kwargs: Dict[str, Any], prompt_text: str) -> None:
+        params = kwargs.get("invocation_params") or {}
+        metadata = kwargs.get("metadata") or {}
+        model = params.get("model_name") or params.get("model") or metadata.get("ls_model_name") or "unknown"
+        with self._lock:
+            self._calls[run_id] = (time.perf_counter(), model, estimate_tokens(prompt_text), get_llm_session())
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, kwargs, "".join(prompts))
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, kwargs, "".join(str(message.content) for batch in messages for message in batch))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        start, model, estimated_prompt_tokens, session_id = call
+
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        model = llm_output.get("model_name") or model
+        cached = False
+        text = ""
+        for generations in response.generations:
+            for generation in generations:
+                text += generation.text
+                message = getattr(generation, "message", None)
+                message_usage = getattr(message, "usage_metadata", None) or {}
+                # LangChain zeroes the cost of responses served from its cache
+                cached = cached or "total_cost" in message_usage
+                if prompt_tokens is None and message_usage.get("input_tokens") is not None:
+                    prompt_tokens = message_usage["input_tokens"]
+                    completion_tokens = message_usage.get("output_tokens", 0)
+                model = (getattr(message, "response_metadata", None) or {}).get("model_name") or model
+
+        (self.meter or get_meter()).record(
+            feature=self.feature,
+            model=model,
+            prompt_tokens=prompt_tokens if prompt_tokens is not None else estimated_prompt_tokens,
+            completion_tokens=completion_tokens if completion_tokens is not None else estimate_tokens(text),
+            latency=time.perf_counter() - start,
+            cached=cached,
+            session_id=session_id
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        start, model, estimated_prompt_tokens, session_id = call
+        (self.meter or get_meter()).record(
+            feature=self.feature,
+            model=model,
+            prompt_tokens=estimated_prompt_tokens,
+            completion_tokens=0,
+            latency=time.perf_counter() - start,
+            error=True,
+            session_id=session_id
+        )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_meter().to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """Serve the meter's metrics on http://<host>:<port>/metrics from a daemon thread, localhost only by default."""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Could not start the LLM metrics endpoint on port {port}: {str(e)}")
+        return None
+    threading.Thread(target=server.serve_forever, name="llm-metrics", daemon=True).start()
+    print(f"LLM metrics served on http://{host}:{port}/metrics")
+    return server
+
+
+_meter: Optional[LLMMeter] = None
+_meter_lock = threading.Lock()
+_metrics_server_started = False
+
+
+def get_meter() -> LLMMeter:
+    """Get the process-wide meter."""
+    global _meter
+    if _meter is None:
+        with _meter_lock:
+            if _meter is None:
+                _meter = LLMMeter()
+    return _meter
+
+
+def start_metrics_endpoint() -> None:
+    """Start the configured metrics endpoint once per process. Called by the app, not by scripts."""
+    global _metrics_server_started
+    with _meter_lock:
+        if _metrics_server_started or not LLM_METER_CONFIG["metrics_port"]:
+            return
+        _metrics_server_started = True
+    start_metrics_server(LLM_METER_CONFIG["metrics_port"], LLM_METER_CONFIG["metrics_host"])
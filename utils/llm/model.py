@@ -1,12 +1,113 @@
 import os
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessageChunk, BaseMessageChunk, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration
+from langchain_core.runnables import RunnableConfig
+from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI
 
+from utils.cache.llm_cache import LLMCache, get_llm_cache
+from utils.llm.meter import LLMMeterCallback, get_meter
+
+
+class MeteredChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose requests are served by a cheaper model once the session is over budget.
+
+    Streamed calls also go through the response cache, which LangChain only
+    consults for non-streamed calls.
+    """
+
+    def _get_request_payload(
+        self,
+        input_: LanguageModelInput,
+        *,
+        stop: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> dict:
+        payload = super()._get_request_payload(input_, stop=stop, **kwargs)
+        payload["model"] = get_meter().budget_model(payload["model"])
+        return payload
+
+    def _get_llm_string(self, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        # Responses of the fallback model are cached apart from the requested model's
+        llm_string = super()._get_llm_string(stop=stop, **kwargs)
+        fallback = get_meter().fallback_model(self.model_name)
+        return llm_string if fallback is None else f"{llm_string}---budget_model={fallback}"
+
+    def stream(
+        self,
+        input: LanguageModelInput,
+        config: Optional[RunnableConfig] = None,
+        *,
+        stop: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> Iterator[BaseMessageChunk]:
+        if not isinstance(self.cache, LLMCache):
+            yield from super().stream(input, config, stop=stop, **kwargs)
+            return
 
-def get_llm_model(provider, model_name):
+        prompt = dumps(self._convert_input(input).to_messages())
+        llm_string = self._get_llm_string(stop=stop, **kwargs)
+        if self.cache.contains(prompt, llm_string):
+            # Served from the cache through invoke, so callbacks still see the call
+            message = self.invoke(input, config, stop=stop, **kwargs)
+            yield AIMessageChunk(content=message.content, response_metadata=message.response_metadata)
+            return
+
+        self.cache.record_lookup("exact", hit=False)
+        response = None
+        for chunk in super().stream(input, config, stop=stop, **kwargs):
+            response = chunk if response is None else response + chunk
+            yield chunk
+        if response is not None:
+            self.cache.update(prompt, llm_string, [ChatGeneration(message=message_chunk_to_message(response))])
+
+
+def get_llm_model(provider, model_name, streaming=False, temperature=0, feature="default", **kwargs):
+    """Create an LLM client whose calls are metered.
+
+    Every client created here reports its tokens, latency, model and cache
+    hits to the process-wide LLMMeter, attributed to the calling feature.
+    Features opted in LLM_CACHE_CONFIG["features"] share a response cache.
+
+    Args:
+        provider: LLM provider, "openai" or "ollama" for local models
+        model_name: Model to use
+        streaming: Whether to stream the response tokens
+        temperature: Sampling temperature
+        feature: Application feature the calls are attributed to, such as "chat" or "charts"
+        **kwargs: Further client options
+
+    Returns:
+        The chat model, or None for an unsupported provider
+    """
     if provider == "openai":
         openai_api_key = os.environ.get("OPENAI_API_KEY")
-        llm = ChatOpenAI(model=model_name, openai_api_key=openai_api_key, temperature=0)
+        llm = MeteredChatOpenAI(
+            model=model_name,
+            openai_api_key=openai_api_key,
+            temperature=temperature,
+            streaming=streaming,
+            # Streamed responses report their token usage only when asked to
+            stream_usage=True,
+            callbacks=[LLMMeterCallback(feature)],
+            cache=get_llm_cache(feature),
+            **kwargs
+        )
         return llm
 
+    elif provider == "ollama":
+        # Local models served by Ollama are metered and cached, but not budget limited
+        return ChatOllama(
+            model=model_name,
+            temperature=temperature,
+            callbacks=[LLMMeterCallback(feature)],
+            cache=get_llm_cache(feature),
+            **kwargs
+        )
+
     else:
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,165 @@
+from functools import lru_cache
+from typing import Optional
+
+import pandas as pd
+import tiktoken
+
+from config import LLM_MODEL, PROMPT_DATA_TOKEN_BUDGET
+
+# Columns treated as the measure to aggregate, in order of preference
+COUNT_COLUMNS = ["accident_count", "count"]
+
+# Larger DataFrames are never rendered in full, which keeps compaction cheap
+FULL_RENDER_MAX_ROWS = 500
+
+
+# Approximate characters per token, used when the tokenizer cannot be loaded
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str):
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken downloads its vocabularies on first use, which fails offline
+        print(f"Error loading tokenizer, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model_name: str = LLM_MODEL) -> int:
+    """Count the tokens of a text for the given model."""
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: str = LLM_MODEL) -> str:
+    """Cut a text down to at most max_tokens tokens, marking the cut."""
+    if count_tokens(text, model_name) <= max_tokens:
+        return text
+
+    marker = "\n... (truncated)"
+    budget = max(max_tokens - count_tokens(marker, model_name), 0)
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return text[:budget * CHARS_PER_TOKEN] + marker
+    return encoding.decode(encoding.encode(text)[:budget]) + marker
+
+
+def describe_schema(df: pd.DataFrame) -> str:
+    """Describe the shape and column types of a DataFrame."""
+    columns = "\n".join(
+        f"- {column} ({dtype}, {df[column].nunique(dropna=True)} distinct, {df[column].isna().sum()} missing)"
+        for column, dtype in df.dtypes.items()
+    )
+    return f"Rows: {len(df)}\nColumns:\n{columns}"
+
+
+def _count_column(df: pd.DataFrame) -> Optional[str]:
+    for column in COUNT_COLUMNS:
+        if column in df.columns and pd.api.types.is_numeric_dtype(df[column]):
+            return column
+    return None
+
+
+def _summary_statistics(df: pd.DataFrame) -> Optional[str]:
+    numeric_df = df.select_dtypes("number")
+    if numeric_df.empty:
+        return None
+    return "Summary statistics:\n" + numeric_df.describe().round(2).to_string()
+
+
+def _year_severity_pivot(df: pd.DataFrame) -> Optional[str]:
+    count_column = _count_column(df)
+    if count_column is None or not {"year", "severity"}.issubset(df.columns):
+        return None
+
+    if "category" in df.columns and not df.empty:
+        # Long-format rows repeat every accident once per category, so the totals are taken from one category
+        df = df[df["category"] == df["category"].iloc[0]]
+
+    pivot = df.pivot_table(index="year", columns="severity", values=count_column, aggfunc="sum", fill_value=0)
+    return f"Total {count_column} by year and severity:\n" + pivot.to_string()
+
+
+def _top_values(df: pd.DataFrame, top_k: int) -> Optional[str]:
+    """Top values per category for long-format data, or per categorical column otherwise."""
+    count_column = _count_column(df)
+
+    if count_column is not None and {"category", "value"}.issubset(df.columns):
+        totals = df.groupby(["category", "value"], dropna=False)[count_column].sum().reset_index()
+        totals["share_pct"] = (
+            100 * totals[count_column] / totals.groupby("category")[count_column].transform("sum")
+        ).round(1)
+        top = (
+            totals.sort_values(["category", count_column], ascending=[True, False])
+            .groupby("category")
+            .head(top_k)
+        )
+        return f"Top {top_k} values per category (summed over all rows):\n" + top.to_string(index=False)
+
+    sections = []
+    for column in df.select_dtypes(exclude="number").columns:
+        counts = df[column].value_counts(dropna=False).head(top_k)
+        sections.append(f"{column}: " + ", ".join(f"{value} ({count})" for value, count in counts.items()))
+    if not sections:
+        return None
+    return f"Top {top_k} values per column (row counts):\n" + "\n".join(sections)
+
+
+def compact_dataframe(
+    df: pd.DataFrame,
+    max_tokens: int = PROMPT_DATA_TOKEN_BUDGET,
+    model_name: str = LLM_MODEL
+) -> str:
+    """Build a token-budgeted text representation of a DataFrame for LLM prompts.
+
+    Small DataFrames are returned in full. Larger ones are replaced by their
+    schema, summary statistics, a year x severity pivot and the top values per
+    category, plus as many sample rows as the budget allows. The result never
+    exceeds max_tokens tokens.
+
+    Args:
+        df: The DataFrame to represent
+        max_tokens: Token budget for the representation
+        model_name: Model whose tokenizer is used for counting
+
+    Returns:
+        Text representation of the DataFrame
+    """
+    schema = describe_schema(df)
+    if len(df) <= FULL_RENDER_MAX_ROWS:
+        full = f"{schema}\n\nData:\n{df.to_string(index=False)}"
+        if count_tokens(full, model_name) <= max_tokens:
+            return full
+
+    # Aggregates are computed once, the budget loop only reassembles them
+    aggregates = [part for part in (_year_severity_pivot(df), _summary_statistics(df)) if part]
+    top_values = {}
+
+    def build(top_k: int, sample_rows: int, num_aggregates: int) -> str:
+        parts = [f"{schema}\n\n(Compacted view of {len(df)} rows)"]
+        if top_k and top_k not in top_values:
+            top_values[top_k] = _top_values(df, top_k)
+        if top_k and top_values[top_k]:
+            parts.append(top_values[top_k])
+        parts.extend(aggregates[:num_aggregates])
+        if sample_rows:
+            parts.append(f"First {sample_rows} rows:\n" + df.head(sample_rows).to_string(index=False))
+        return "\n\n".join(parts)
+
+    # Shrink the least informative parts first: sample rows, summary statistics,
+    # top-k depth, and finally the year x severity pivot
+    candidates = [(10, sample_rows, len(aggregates)) for sample_rows in (20, 10, 5, 0)]
+    candidates += [(top_k, 0, min(len(aggregates), 1)) for top_k in (10, 5, 3, 1)]
+    candidates += [(1, 0, 0), (0, 0, 0)]
+    for top_k, sample_rows, num_aggregates in candidates:
+        text = build(top_k, sample_rows, num_aggregates)
+        if count_tokens(text, model_name) <= max_tokens:
+            return text
+
+    return truncate_to_tokens(text, max_tokens, model_name)
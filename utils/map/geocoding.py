@@ -3,6 +3,8 @@ import requests
 from geopy.distance import geodesic
 from pyproj import CRS, Transformer
 
+from utils.tracing.tracer import start_span
+
 
 class GeoHelper:
     # Class-level configuration
@@ -23,37 +25,41 @@ class GeoHelper:
         if time_since_last_request < cls.MIN_REQUEST_INTERVAL:
             time.sleep(cls.MIN_REQUEST_INTERVAL - time_since_last_request)
 
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "format": "jsonv2",
-            "addressdetails": 1,
-            "extratags": 1,
-            "namedetails": 1,
-            "zoom": 18
-        }
+        with start_span("geocode.reverse", {"geocode.lat": lat, "geocode.lon": lon}) as span:
+            params = {
+                "lat": lat,
+                "lon": lon,
+                "format": "jsonv2",
+                "addressdetails": 1,
+                "extratags": 1,
+                "namedetails": 1,
+                "zoom": 18
+            }
 
-        for attempt in range(3):  # Retry up to 3 times
-            try:
-                response = requests.get(
-                    cls.BASE_URL,
-                    params=params,
-                    headers=cls.HEADERS,
-                    timeout=5
-                )
-                response.raise_for_status()
-                cls._last_request_time = time.time()
+            for attempt in range(3):  # Retry up to 3 times
+                span.set_attribute("geocode.attempts", attempt + 1)
+                try:
+                    response = requests.get(
+                        cls.BASE_URL,
+                        params=params,
+                        headers=cls.HEADERS,
+                        timeout=5
+                    )
+                    response.raise_for_status()
+                    cls._last_request_time = time.time()
                 
-                res = response.json()
-                res["idx"] = idx
-                res["lat"] = lat
-                res["lon"] = lon
-                return res
+                    res = response.json()
+                    res["idx"] = idx
+                    res["lat"] = lat
+                    res["lon"] = lon
+                    return res
 
-            except requests.exceptions.RequestException as e:
-                print(f"API Error: {e}, retrying ({attempt + 1}/3)...")
-                time.sleep(2)  # Wait before retrying
-        return None
+                except requests.exceptions.RequestException as e:
+                    print(f"API Error: {e}, retrying ({attempt + 1}/3)...")
+                    span.add_event("retry", {"error": str(e)})
+                    time.sleep(2)  # Wait before retrying
+            span.set_attribute("geocode.found", False)
+            return None
 
     @staticmethod
     def calc_distance(point_1, point_2):
@@ -1,7 +1,7 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import List, Dict, Union, Optional
+from typing import List, Dict, Optional
 
 def create_line_chart(
     data: List[Dict],
@@ -90,4 +90,114 @@ def create_line_chart(
         marker=dict(size=marker_size)
     )
     
-    return fig 
\ No newline at end of file
+    return fig
+
+
+def create_category_breakdown_chart(
+    data: List[Dict],
+    category_column: str,
+    value_column: str,
+    y_column: str,
+    group_column: str,
+    title: str = "Category Breakdown",
+    y_label: Optional[str] = None,
+    group_label: Optional[str] = None,
+    top_n: Optional[int] = 10,
+    height: Optional[int] = None,
+    width: Optional[int] = None
+) -> go.Figure:
+    """
+    Create a stacked bar chart per category with a dropdown to switch between categories.
+
+    Intended for long-format data where each row holds one value of one category
+    (e.g., the output of the cause and outcome analysis queries).
+
+    Args:
+        data (List[Dict]): List of dictionaries containing the data
+        category_column (str): Name of the column holding the category name (e.g., 'category')
+        value_column (str): Name of the column holding the category value (e.g., 'value')
+        y_column (str): Name of the column to sum for y-axis (e.g., 'count')
+        group_column (str): Name of the column to stack by (e.g., 'severity')
+        title (str): Title of the chart
+        y_label (str, optional): Label for y-axis. If None, uses y_column
+        group_label (str, optional): Label for the group legend. If None, uses group_column
+        top_n (int, optional): Number of most frequent values shown per category. If None, shows all
+        height (int, optional): Height of the chart in pixels
+        width (int, optional): Width of the chart in pixels
+
+    Returns:
+        go.Figure: A Plotly figure object
+
+    Example:
+        data = [
+            {'category': 'TEURA', 'value': 'Day', 'severity': 'light', 'count': 20},
+            {'category': 'TEURA', 'value': 'Night', 'severity': 'fatal', 'count': 2},
+            {'category': 'RAMZOR', 'value': 'Working', 'severity': 'light', 'count': 8}
+        ]
+        fig = create_category_breakdown_chart(
+            data=data,
+            category_column='category',
+            value_column='value',
+            y_column='count',
+            group_column='severity',
+            title='Accident Factors by Severity'
+        )
+    """
+    df = pd.DataFrame(data)
+
+    required_columns = [category_column, value_column, y_column, group_column]
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
+    df[value_column] = df[value_column].astype(str)
+    grouped_df = df.groupby([category_column, value_column, group_column], as_index=False)[y_column].sum()
+    categories = list(dict.fromkeys(df[category_column]))
+    groups = sorted(grouped_df[group_column].astype(str).unique())
+
+    fig = go.Figure()
+    for category_idx, category in enumerate(categories):
+        category_df = grouped_df[grouped_df[category_column] == category]
+
+        # Keep the most frequent values and order them by total
+        totals = category_df.groupby(value_column)[y_column].sum().sort_values(ascending=False)
+        if top_n is not None:
+            totals = totals.head(top_n)
+
+        for group in groups:
+            group_df = (
+                category_df[category_df[group_column].astype(str) == group]
+                .set_index(value_column)[y_column]
+                .reindex(totals.index, fill_value=0)
+            )
+            fig.add_trace(go.Bar(
+                x=list(group_df.index),
+                y=list(group_df.values),
+                name=group,
+                legendgroup=group,
+                visible=category_idx == 0
+            ))
+
+    # One dropdown entry per category, toggling that category's traces
+    buttons = []
+    for category_idx, category in enumerate(categories):
+        visible = [
+            trace_category_idx == category_idx
+            for trace_category_idx in range(len(categories))
+            for _ in groups
+        ]
+        buttons.append(dict(label=str(category), method="update", args=[{"visible": visible}]))
+
+    fig.update_layout(
+        title=title,
+        barmode="stack",
+        yaxis_title=y_label or y_column,
+        showlegend=True,
+        legend_title=group_label or group_column,
+        hovermode='x unified',
+        height=height,
+        width=width,
+        updatemenus=[dict(buttons=buttons, direction="down", x=1.0, xanchor="right", y=1.15, yanchor="top")]
+    )
+
+    return fig
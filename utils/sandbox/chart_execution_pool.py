@@ -0,0 +1,303 @@
+import atexit
+import builtins
+import io
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from config import (
+    CHART_SANDBOX_WORKERS,
+    CHART_SANDBOX_TIMEOUT,
+    CHART_SANDBOX_CPU_SECONDS,
+    CHART_SANDBOX_MEMORY_MB,
+)
+
+try:
+    import resource
+except ImportError:  # resource limits are only available on Unix
+    resource = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# Modules generated chart code may import
+ALLOWED_MODULES = {
+    "pandas",
+    "numpy",
+    "plotly",
+    "plotly.express",
+    "plotly.graph_objects",
+    "plotly.subplots",
+    "plotly.io",
+    "math",
+    "datetime",
+}
+
+# Builtins exposed to generated chart code
+ALLOWED_BUILTINS = [
+    "abs", "all", "any", "bool", "dict", "enumerate", "filter", "float", "format",
+    "int", "isinstance", "len", "list", "map", "max", "min", "print", "range",
+    "reversed", "round", "set", "slice", "sorted", "str", "sum", "tuple", "zip",
+    "Exception", "KeyError", "IndexError", "TypeError", "ValueError", "ZeroDivisionError",
+]
+
+
+class ChartExecutionResult(BaseModel):
+    """Model for the outcome of a sandboxed chart code execution."""
+    fig_json: Optional[str] = Field(description="The generated Plotly figure serialized to JSON", default=None)
+    error: Optional[str] = Field(description="Error message if the execution failed", default=None)
+    wall_time: float = Field(description="Wall-clock seconds spent on the execution, including transfer", default=0.0)
+    cpu_time: float = Field(description="CPU seconds used by the worker for the execution", default=0.0)
+    max_rss_mb: float = Field(description="Peak resident memory of the worker in MB", default=0.0)
+
+
+def _serialize_df(df: pd.DataFrame) -> tuple[str, bytes]:
+    """Serialize a DataFrame for the worker, using Arrow IPC when possible."""
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return "arrow", sink.getvalue().to_pybytes()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # Mixed-type object columns cannot be represented in Arrow
+            pass
+    return "pickle", pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _deserialize_df(data_format: str, payload: bytes) -> pd.DataFrame:
+    """Rebuild a DataFrame sent by the parent process."""
+    if data_format == "arrow":
+        return pa.ipc.open_stream(io.BytesIO(payload)).read_pandas()
+    return pickle.loads(payload)
+
+
+def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Import hook allowing only the modules needed to build charts."""
+    if level != 0 or name not in ALLOWED_MODULES:
+        raise ImportError(f"Import of '{name}' is not allowed in chart code")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+def _cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _worker_main(conn, memory_limit_mb: int) -> None:
+    """Worker process loop executing chart code sent by the pool."""
+    import numpy as np
+    import plotly.express as px
+    import plotly.graph_objects as go
+    # Imported before the memory limit is set, like the modules above
+    import plotly.io
+    import plotly.subplots
+
+    if resource is not None:
+        memory_limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    safe_builtins = {name: getattr(builtins, name) for name in ALLOWED_BUILTINS}
+    safe_builtins["__import__"] = _restricted_import
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        code, data_format, payload, cpu_seconds = message
+        metrics: Dict[str, float] = {}
+        start_cpu = _cpu_time() if resource is not None else 0.0
+
+        if resource is not None:
+            # Exceeding the soft limit raises SIGXCPU, which terminates the worker
+            _, hard_limit = resource.getrlimit(resource.RLIMIT_CPU)
+            resource.setrlimit(resource.RLIMIT_CPU, (int(start_cpu + cpu_seconds) + 1, hard_limit))
+
+        try:
+            namespace = {
+                "__builtins__": safe_builtins,
+                "df": _deserialize_df(data_format, payload),
+                "pd": pd,
+                "np": np,
+                "px": px,
+                "go": go,
+            }
+            exec(code, namespace)
+
+            fig = namespace.get("fig")
+            if fig is None or not hasattr(fig, "to_json"):
+                response = ("error", "No figure was created by the code")
+            else:
+                response = ("ok", fig.to_json())
+        except MemoryError:
+            response = ("error", "Chart code exceeded the memory limit")
+        except BaseException as e:
+            response = ("error", f"Error executing chart code: {str(e)}")
+
+        if resource is not None:
+            metrics["cpu_time"] = _cpu_time() - start_cpu
+            metrics["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        conn.send(response + (metrics,))
+
+
+class _Worker:
+    """A pre-started worker process and the parent end of its pipe."""
+
+    def __init__(self, context, memory_limit_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, memory_limit_mb),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def terminate(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ChartExecutionPool:
+    """Pool of pre-started worker processes executing generated chart code.
+
+    Each execution runs in a separate process with a restricted namespace,
+    a CPU-time limit, an address-space limit and a wall-clock timeout. Workers
+    that time out or crash are replaced, so a pathological snippet never stalls
+    the Streamlit server.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = CHART_SANDBOX_WORKERS,
+        timeout: float = CHART_SANDBOX_TIMEOUT,
+        cpu_seconds: float = CHART_SANDBOX_CPU_SECONDS,
+        memory_limit_mb: int = CHART_SANDBOX_MEMORY_MB
+    ):
+        """Initialize the pool and start its workers.
+
+        Args:
+            num_workers: Number of worker processes
+            timeout: Wall-clock seconds before an execution is killed
+            cpu_seconds: CPU seconds a single execution may use
+            memory_limit_mb: Address-space limit of each worker in MB
+        """
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_limit_mb = memory_limit_mb
+
+        # Forking a threaded server process is unsafe, start workers from a clean process
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers_lock = threading.Lock()
+        self._workers = []
+        for _ in range(num_workers):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self._context, self.memory_limit_mb)
+        with self._workers_lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace_worker(self, worker: _Worker) -> None:
+        worker.terminate()
+        with self._workers_lock:
+            self._workers.remove(worker)
+        self._idle.put(self._start_worker())
+
+    def execute(self, code: str, df: pd.DataFrame) -> ChartExecutionResult:
+        """Execute chart code against a DataFrame in a sandboxed worker.
+
+        Args:
+            code: Python code assigning a Plotly figure to a variable named 'fig'
+            df: The DataFrame exposed to the code as 'df'
+
+        Returns:
+            ChartExecutionResult with the figure JSON or an error, and timing metrics
+        """
+        start = time.perf_counter()
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            return ChartExecutionResult(error="No chart worker available", wall_time=time.perf_counter() - start)
+
+        healthy = False
+        try:
+            data_format, payload = _serialize_df(df)
+            worker.conn.send((code, data_format, payload, self.cpu_seconds))
+
+            remaining = self.timeout - (time.perf_counter() - start)
+            if not worker.conn.poll(max(remaining, 0)):
+                return ChartExecutionResult(
+                    error=f"Chart code timed out after {self.timeout} seconds",
+                    wall_time=time.perf_counter() - start
+                )
+
+            status, value, metrics = worker.conn.recv()
+            healthy = True
+            return ChartExecutionResult(
+                fig_json=value if status == "ok" else None,
+                error=value if status != "ok" else None,
+                wall_time=time.perf_counter() - start,
+                **metrics
+            )
+        except (EOFError, OSError):
+            return ChartExecutionResult(
+                error="Chart worker was terminated, the code exceeded its CPU or memory limit",
+                wall_time=time.perf_counter() - start
+            )
+        finally:
+            if healthy:
+                self._idle.put(worker)
+            else:
+                self._replace_worker(worker)
+
+    def shutdown(self) -> None:
+        """Stop all worker processes."""
+        with self._workers_lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.terminate()
+
+
+# Process-wide pool, started on first use
+_CHART_EXECUTION_POOL: Optional[ChartExecutionPool] = None
+_CHART_EXECUTION_POOL_LOCK = threading.Lock()
+
+
+def get_chart_execution_pool() -> ChartExecutionPool:
+    """Get the process-wide chart execution pool, starting its workers on first use.
+
+    Returns:
+        ChartExecutionPool: The shared pool
+    """
+    global _CHART_EXECUTION_POOL
+    if _CHART_EXECUTION_POOL is None:
+        with _CHART_EXECUTION_POOL_LOCK:
+            if _CHART_EXECUTION_POOL is None:
+                _CHART_EXECUTION_POOL = ChartExecutionPool()
+                atexit.register(_CHART_EXECUTION_POOL.shutdown)
+    return _CHART_EXECUTION_POOL
@@ -0,0 +1,53 @@
+"""Process-wide clients shared by all Streamlit sessions and reruns.
+
+These objects are expensive to build (database engines, LLM clients, vector
+store connections) and hold no per-user state, so each is created once per
+process with st.cache_resource. Per-session state such as chat memory and
+map selections stays in st.session_state.
+
+Clients are created on first use rather than at session start, and their
+modules are imported inside the accessors, so pages that do not need a
+client never pay for its dependencies.
+"""
+from typing import TYPE_CHECKING
+
+import streamlit as st
+
+from config import LLM_MODEL
+
+if TYPE_CHECKING:
+    from rag.rag_main import RAG
+    from utils.sql.sql_db import SqlDb
+    from utils.sql.sql_llm_agent import SqlLLMAgent
+
+
+@st.cache_resource(show_spinner=False)
+def get_sql_db() -> "SqlDb":
+    """Get the shared database connection."""
+    from utils.sql.sql_db import SqlDb
+    return SqlDb()
+
+
+@st.cache_resource(show_spinner=False)
+def get_sql_llm_agent() -> "SqlLLMAgent":
+    """Get the shared SQL agent, built on the shared database connection."""
+    from utils.sql.sql_llm_agent import SqlLLMAgent
+    return SqlLLMAgent(db=get_sql_db())
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_llm_model(provider: str = "openai", model_name: str = LLM_MODEL, feature: str = "analysis"):
+    """Get a shared LLM client for the given provider, model and metered feature."""
+    from utils.llm.model import get_llm_model
+    return get_llm_model(provider=provider, model_name=model_name, feature=feature)
+
+
+@st.cache_resource(show_spinner=False)
+def get_rag() -> "RAG":
+    """Get the shared RAG pipeline.
+
+    Conversations, which hold chat memory, are created per session with
+    RAG.create_conversation.
+    """
+    from rag.rag_main import RAG
+    return RAG(sql_db=get_sql_db())
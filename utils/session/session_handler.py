@@ -1,8 +1,5 @@
 import streamlit as st
-from config import INITIAL_DF, LLM_MODEL
-from utils.sql.sql_llm_agent import SqlLLMAgent
-from utils.llm.model import get_llm_model
-from utils.sql.sql_db import SqlDb
+from config import INITIAL_DF
 
 def initialize_session() -> None:
     """Initialize Streamlit session state variables."""
@@ -12,13 +9,9 @@ def initialize_session() -> None:
     st.session_state.new_entry = False
     st.session_state.clear_data = False
     st.session_state.current_view = "main"
-    
-    # Initialize database connection
-    st.session_state.db = SqlDb()
-    
-    # Initialize agents and models
-    st.session_state.sql_llm_agent = SqlLLMAgent()
-    st.session_state.llm_model = get_llm_model(provider="openai", model_name=LLM_MODEL)
+
+    # Database connections, agents and models are not created here, they are
+    # built on first use by the accessors in utils.session.resources
 
     if "messages" not in st.session_state:
         st.session_state.messages = []
@@ -1,12 +1,14 @@
 import os
 import urllib.parse
 
-from sqlalchemy import create_engine, Table, insert, MetaData, text
+from sqlalchemy import create_engine, Table, insert, delete, select, inspect, MetaData, text, bindparam
 from langchain_community.utilities import SQLDatabase
 from dotenv import load_dotenv
 from supabase import create_client
 import pandas as pd
 
+from utils.tracing.tracer import start_span
+
 
 class SqlDb:
     def __init__(self, password=None, db_url=None, supabase_url=None, key=None):
@@ -42,12 +44,15 @@ class SqlDb:
         Raises:
             Exception: If there's an error executing the query
         """
-        try:
-            with self.engine.connect() as connection:
-                result = connection.execute(text(query))
-                return pd.DataFrame(result.fetchall(), columns=result.keys())
-        except Exception as e:
-            raise Exception(f"Error executing query: {str(e)}")
+        with start_span("db.query", {"db.system": self.engine.dialect.name, "db.statement": query}) as span:
+            try:
+                with self.engine.connect() as connection:
+                    result = connection.execute(text(query))
+                    df = pd.DataFrame(result.fetchall(), columns=result.keys())
+            except Exception as e:
+                raise Exception(f"Error executing query: {str(e)}")
+            span.set_attribute("db.rows", len(df))
+            return df
 
     def upload_table_from_pandas_df(self, table_name, df, if_exists="append"):
         assert self.engine, "SQL Engine is not configured"
@@ -65,6 +70,77 @@ class SqlDb:
                 stmt = insert(sql_table).values(data)
                 connection.execute(stmt)
 
+    def fetch_existing_values(self, table_name, column, values, chunk_size=500):
+        """Get which of the given values are present in a table column.
+
+        Args:
+            table_name: Table to look in
+            column: Column holding the values
+            values: Values to look for
+            chunk_size: Values per query, to keep the IN lists short
+
+        Returns:
+            Set of the values present, empty if the table does not exist
+        """
+        if not values or not inspect(self.engine).has_table(table_name):
+            return set()
+
+        sql_table = Table(table_name, MetaData(), autoload_with=self.engine)
+        values = list(values)
+        existing = set()
+        with self.engine.connect() as connection:
+            for i in range(0, len(values), chunk_size):
+                stmt = select(sql_table.c[column]).where(sql_table.c[column].in_(values[i: i + chunk_size]))
+                existing.update(row[0] for row in connection.execute(stmt))
+        return existing
+
+    def fetch_values_by_json_key(self, table_name, column, json_column, key, json_values, chunk_size=500):
+        """Get the column values of the rows whose JSON column holds one of the given values under a key.
+
+        Args:
+            table_name: Table to look in
+            column: Column whose values are returned
+            json_column: JSON column to filter on
+            key: Key of the JSON objects compared
+            json_values: Values looked for under key
+            chunk_size: Values per query, to keep the IN lists short
+
+        Returns:
+            Set of the column values, empty if the table does not exist
+        """
+        if not json_values or not inspect(self.engine).has_table(table_name):
+            return set()
+
+        stmt = text(
+            f'SELECT "{column}" FROM "{table_name}" WHERE "{json_column}"->>:key IN :values'
+        ).bindparams(bindparam("values", expanding=True))
+        json_values = list(json_values)
+        found = set()
+        with self.engine.connect() as connection:
+            for i in range(0, len(json_values), chunk_size):
+                rows = connection.execute(stmt, {"key": key, "values": json_values[i: i + chunk_size]})
+                found.update(row[0] for row in rows)
+        return found
+
+    def delete_rows(self, table_name, column, values, chunk_size=500):
+        """Delete the rows whose column value is one of the given values.
+
+        Returns:
+            Number of rows deleted
+        """
+        if not values or not inspect(self.engine).has_table(table_name):
+            return 0
+
+        sql_table = Table(table_name, MetaData(), autoload_with=self.engine)
+        values = list(values)
+        deleted = 0
+        with self.engine.connect() as connection:
+            with connection.begin():
+                for i in range(0, len(values), chunk_size):
+                    stmt = delete(sql_table).where(sql_table.c[column].in_(values[i: i + chunk_size]))
+                    deleted += connection.execute(stmt).rowcount
+        return deleted
+
     def load_data_from_db(self, table_name):
         df = pd.read_sql_table(table_name, self.engine)
         return df
@@ -11,11 +11,11 @@ from config import INFERENCE_COLUMNS, SQL_LLM_MODEL
 
 
 class SqlLLMAgent:
-    def __init__(self):
+    def __init__(self, db: SqlDb = None):
         load_dotenv()
 
-        self.db = SqlDb().db
-        self.llm = get_llm_model(provider="openai", model_name=SQL_LLM_MODEL)
+        self.db = (db or SqlDb()).db
+        self.llm = get_llm_model(provider="openai", model_name=SQL_LLM_MODEL, feature="sql")
 
         if self.llm:
             self.db_tools = self._get_db_tools()
@@ -0,0 +1,96 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+try:
+    from config import TRACE_JSON_FILE, TRACE_STORE_MAX_TRACES
+except ImportError:
+    # The research workflow runs with its own config module
+    TRACE_JSON_FILE, TRACE_STORE_MAX_TRACES = "traces.jsonl", 50
+
+
+class InMemoryTraceStore:
+    """Keeps the spans of the most recent traces for the debug panel.
+
+    Spans are grouped by trace id. When more than max_traces traces are held,
+    the least recently updated trace is dropped.
+    """
+
+    def __init__(self, max_traces: int = TRACE_STORE_MAX_TRACES):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span) -> None:
+        with self._lock:
+            spans = self._traces.setdefault(span.trace_id, [])
+            spans.append(span.to_dict())
+            self._traces.move_to_end(span.trace_id)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Get the ended spans of a trace, ordered by start time."""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        return sorted(spans, key=lambda span: span["start_time"])
+
+    def trace_ids(self) -> List[str]:
+        """Ids of the held traces, most recent last."""
+        with self._lock:
+            return list(self._traces)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+class ConsoleSpanExporter:
+    """Prints one line per ended span."""
+
+    def export(self, span) -> None:
+        attributes = ", ".join(f"{key}={value}" for key, value in span.attributes.items())
+        print(f"[trace {span.trace_id[:8]}] {span.name} {span.duration_ms:.1f} ms {span.status} {attributes}")
+
+
+class JsonLinesSpanExporter:
+    """Appends every ended span as a JSON line, in the OpenTelemetry console exporter layout."""
+
+    def __init__(self, file_name: str = TRACE_JSON_FILE):
+        self.file_name = file_name
+        self._lock = threading.Lock()
+
+    def export(self, span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False)
+        with self._lock:
+            with open(self.file_name, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+# Process-wide store read by the debug panel
+trace_store = InMemoryTraceStore()
+
+
+def create_exporters(names: List[str]) -> List[Any]:
+    """Create the exporters named in TRACING_EXPORTERS.
+
+    "otel" is not an exporter here, spans are mirrored to the OpenTelemetry
+    API by the tracer and exported by the SDK configured by the application.
+    """
+    exporters = []
+    for name in names:
+        if name == "memory":
+            exporters.append(trace_store)
+        elif name == "console":
+            exporters.append(ConsoleSpanExporter())
+        elif name == "json":
+            exporters.append(JsonLinesSpanExporter())
+        elif name != "otel":
+            print(f"Unknown trace exporter: {name}")
+    return exporters
+
+
+def get_trace(trace_id: Optional[str]) -> List[Dict[str, Any]]:
+    """Get the spans of a trace held in memory, or an empty list."""
+    return trace_store.get_trace(trace_id) if trace_id else []
@@ -0,0 +1,135 @@
+import contextvars
+import threading
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from utils.tracing.tracer import Span, get_current_span, get_tracer
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records every LangChain LLM call and retrieval as a span.
+
+    Spans are children of the span current when the call starts, and carry
+    the model, token usage, time to first streamed token and retries.
+    """
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, name: str, attributes: Dict[str, Any]) -> None:
+        span = get_tracer().start_span(name, attributes, parent=get_current_span())
+        with self._lock:
+            self._spans[run_id] = span
+
+    def _get(self, run_id: UUID) -> Optional[Span]:
+        with self._lock:
+            return self._spans.get(run_id)
+
+    def _end(self, run_id: UUID) -> Optional[Span]:
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.end()
+        return span
+
+    def _start_llm(self, run_id: UUID, serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], prompt_chars: int) -> None:
+        params = kwargs.get("invocation_params") or {}
+        metadata = kwargs.get("metadata") or {}
+        self._start(run_id, "llm.call", {
+            "llm.provider": metadata.get("ls_provider"),
+            "llm.model": params.get("model_name") or params.get("model") or metadata.get("ls_model_name"),
+            "llm.temperature": params.get("temperature"),
+            "llm.streaming": bool(params.get("stream") or params.get("streaming")),
+            "llm.prompt_chars": prompt_chars,
+            "llm.class": (serialized or {}).get("name"),
+        })
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._start_llm(run_id, serialized, kwargs, sum(len(prompt) for prompt in prompts))
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        self._start_llm(run_id, serialized, kwargs, prompt_chars)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._get(run_id)
+        if span is None:
+            return
+        if "llm.time_to_first_token_ms" not in span.attributes:
+            span.set_attribute("llm.time_to_first_token_ms", round(span.duration_ms, 1))
+        span.set_attribute("llm.streamed_chunks", span.attributes.get("llm.streamed_chunks", 0) + 1)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._get(run_id)
+        if span is None:
+            return
+
+        usage = dict((response.llm_output or {}).get("token_usage") or {})
+        if not usage:
+            # Streamed chat models report usage on the message instead
+            for generations in response.generations:
+                for generation in generations:
+                    message_usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if message_usage:
+                        usage = {
+                            "prompt_tokens": message_usage.get("input_tokens"),
+                            "completion_tokens": message_usage.get("output_tokens"),
+                            "total_tokens": message_usage.get("total_tokens"),
+                        }
+        span.set_attributes({
+            "llm.prompt_tokens": usage.get("prompt_tokens"),
+            "llm.completion_tokens": usage.get("completion_tokens"),
+            "llm.total_tokens": usage.get("total_tokens"),
+            "llm.response_chars": sum(len(generation.text) for generations in response.generations for generation in generations),
+        })
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._get(run_id)
+        if span is not None:
+            span.record_exception(error)
+            self._end(run_id)
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._get(run_id)
+        if span is not None:
+            span.set_attribute("llm.retries", span.attributes.get("llm.retries", 0) + 1)
+            span.add_event("retry", {"attempt": getattr(retry_state, "attempt_number", None)})
+
+    def on_retriever_start(self, serialized: Dict[str, Any], query: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "retriever.search", {
+            "retriever.class": (serialized or {}).get("name"),
+            "retriever.query": query,
+        })
+
+    def on_retriever_end(self, documents: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._get(run_id)
+        if span is not None:
+            span.set_attribute("retriever.documents", len(documents))
+            self._end(run_id)
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._get(run_id)
+        if span is not None:
+            span.record_exception(error)
+            self._end(run_id)
+
+
+_instrumented = False
+
+
+def instrument_langchain() -> None:
+    """Trace every LangChain LLM call and retrieval of the process."""
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+    # LangChain adds the value of a registered variable to the callbacks of
+    # every run, in every thread, so no call site has to pass the handler
+    handler_var = contextvars.ContextVar("tracing_callback_handler", default=TracingCallbackHandler())
+    register_configure_hook(handler_var, inheritable=True)
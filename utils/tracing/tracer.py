@@ -0,0 +1,239 @@
+import contextvars
+import functools
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    from config import TRACING_ENABLED, TRACING_EXPORTERS
+except ImportError:
+    # The research workflow runs with its own config module
+    TRACING_ENABLED, TRACING_EXPORTERS = True, ["memory"]
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# Span of the code currently running, parent of the spans it starts
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+# Longest string attribute kept, SQL statements and prompts are cut
+MAX_ATTRIBUTE_LENGTH = 1000
+
+
+def _clean_attribute(value: Any) -> Any:
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_clean_attribute(item) for item in value]
+    return str(value)[:MAX_ATTRIBUTE_LENGTH]
+
+
+class Span:
+    """A timed operation, shaped like an OpenTelemetry span.
+
+    Trace and span ids, times in Unix nanoseconds, attributes, events and the
+    status follow the OpenTelemetry data model, so exported spans can be read
+    by OpenTelemetry tooling.
+    """
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.status_description: Optional[str] = None
+        self.thread_name = threading.current_thread().name
+        self._otel_span = None
+        self.set_attributes(attributes or {})
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = _clean_attribute(value)
+        if self._otel_span is not None and value is not None:
+            self._otel_span.set_attribute(key, self.attributes[key])
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append({
+            "name": name,
+            "timestamp": time.time_ns(),
+            "attributes": {key: _clean_attribute(value) for key, value in (attributes or {}).items()},
+        })
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.add_event("exception", {
+            "exception.type": type(exception).__name__,
+            "exception.message": str(exception),
+        })
+        self.status = "ERROR"
+        self.status_description = str(exception)[:MAX_ATTRIBUTE_LENGTH]
+        if self._otel_span is not None:
+            self._otel_span.record_exception(exception)
+
+    def end(self) -> None:
+        """End the span and hand it to the exporters. Later calls do nothing."""
+        if self.end_time is not None:
+            return
+        self.end_time = time.time_ns()
+        if self._otel_span is not None:
+            self._otel_span.end(end_time=self.end_time)
+        self.tracer.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end_time = self.end_time or time.time_ns()
+        return (end_time - self.start_time) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize in the layout of the OpenTelemetry console exporter."""
+        return {
+            "name": self.name,
+            "context": {"trace_id": self.trace_id, "span_id": self.span_id},
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": self.duration_ms,
+            "status": {"status_code": self.status, "description": self.status_description},
+            "attributes": self.attributes,
+            "events": self.events,
+            "thread": self.thread_name,
+        }
+
+
+class Tracer:
+    """Creates spans, tracks the current span and sends ended spans to the exporters."""
+
+    def __init__(self, exporters: Optional[List[Any]] = None, use_otel: bool = False):
+        """Initialize the tracer.
+
+        Args:
+            exporters: Objects with an export(span) method, called for every ended span
+            use_otel: Whether to mirror spans to the OpenTelemetry API, if it is installed
+        """
+        self.exporters = exporters or []
+        self._otel_tracer = otel_trace.get_tracer(__name__) if use_otel and otel_trace else None
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None
+    ) -> Span:
+        """Start a span without making it current. It must be ended with Span.end().
+
+        Args:
+            name: Name of the operation
+            attributes: Initial span attributes
+            parent: Parent span, the current span by default
+        """
+        parent = parent or _current_span.get()
+        span = Span(self, name, parent, attributes)
+        if self._otel_tracer is not None:
+            context = otel_trace.set_span_in_context(parent._otel_span) if parent and parent._otel_span else None
+            span._otel_span = self._otel_tracer.start_span(
+                name, context=context, attributes=span.attributes, start_time=span.start_time
+            )
+        return span
+
+    @contextmanager
+    def start_as_current_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        """Run a block in a new span, which is the parent of spans started inside it."""
+        span = self.start_span(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def export(self, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"Error exporting span {span.name}: {str(e)}")
+
+
+class NoOpTracer(Tracer):
+    """Tracer used when tracing is disabled. Spans are timed but never exported."""
+
+    def export(self, span: Span) -> None:
+        pass
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer, configured by TRACING_ENABLED and TRACING_EXPORTERS."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                from utils.tracing.exporters import create_exporters
+                from utils.tracing.llm_callback import instrument_langchain
+
+                if TRACING_ENABLED:
+                    _tracer = Tracer(create_exporters(TRACING_EXPORTERS), use_otel="otel" in TRACING_EXPORTERS)
+                    instrument_langchain()
+                else:
+                    _tracer = NoOpTracer()
+    return _tracer
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Context manager running a block in a new current span of the process-wide tracer."""
+    return get_tracer().start_as_current_span(name, attributes)
+
+
+def get_current_span() -> Optional[Span]:
+    """Get the current span, or None outside of any span."""
+    return _current_span.get()
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Set attributes on the current span, if there is one."""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attributes(attributes)
+
+
+def traced(name: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None) -> Callable:
+    """Decorator running a function in a span named after it, or after name."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name, attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def run_in_context(func: Callable, *args, **kwargs) -> Callable[[], Any]:
+    """Bind func to the current context, so spans it starts on another thread keep their parent."""
+    context = contextvars.copy_context()
+    return lambda: context.run(func, *args, **kwargs)
@@ -1,7 +1,9 @@
 import streamlit as st
 from components.qa.dialog import Dialog
 from utils.session.session_handler import initialize_session
+from utils.tracing.tracer import traced
 
+@traced("render.chat_view")
 def show_chat_view():
     # Initialize session if needed
     if not st.session_state.get("initialized"):
@@ -10,6 +10,7 @@ from components.map.data_component import (
 )
 from components.map.analysis_component import analyze_dataframe
 from utils.session.session_handler import clear_dataframe
+from utils.tracing.tracer import traced
 
 def render_header() -> None:
     """Render the page header."""
@@ -24,6 +25,7 @@ def render_header() -> None:
         st.rerun()
 
 
+@traced("render.map")
 def render_map_section() -> Dict[str, Any]:
     """Render the map section and return the draw data."""
     try:
@@ -44,6 +46,7 @@ def render_map_section() -> Dict[str, Any]:
         st.error(f"Error rendering map: {str(e)}")
         return {}
 
+@traced("render.dataframe")
 def render_dataframe_section(draw_data: Dict[str, Any]) -> Tuple[list, str, Any]:
     """Render the dataframe section and return filtered data."""
     try:
@@ -56,6 +59,7 @@ def render_dataframe_section(draw_data: Dict[str, Any]) -> Tuple[list, str, Any]
         st.error(f"Error processing dataframe: {str(e)}")
         return [], "", None
 
+@traced("render.analysis")
 def render_analysis_sections(filtered_data: Tuple[list, str, Any]) -> None:
     """Render analysis sections based on filtered data."""
     filtered_locations, filter_level, filtered_df = filtered_data
@@ -77,6 +81,7 @@ def render_analysis_sections(filtered_data: Tuple[list, str, Any]) -> None:
         with st.container():
             analyze_dataframe(filtered_locations, filter_level, filtered_df, analysis_type)
 
+@traced("render.map_view")
 def show_map_view() -> None:
     """Main function to show the map view."""
     try:
@@ -4,6 +4,8 @@ from components.qa.dialog import Dialog
 def show_research_view():
     st.markdown('<h1 style="text-align: center; color: #2E86C1;">AI Road Expert Chat</h1>', unsafe_allow_html=True)
 
+    dialog = Dialog()
+
     research_question = st.text_area(
             "Enter your research question:",
             placeholder="e.g., What are the most common causes of accidents in urban areas?",
@@ -11,13 +13,11 @@ def show_research_view():
         )
         
     if research_question:
-        with st.chat_message("user"):
-            Dialog.show_message(research_question)
+        dialog.show_message(research_question, "user")
         
         with st.chat_message("assistant"):
-            response = Dialog.rag.chat(research_question)
-            Dialog.show_message(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            response = st.write_stream(dialog.rag.stream_chat(research_question, dialog.conversation))
+        st.session_state.messages.append({"role": "assistant", "content": response})
 
     if st.button("Clear Research"):
         st.session_state.messages = []